@@ -1,5 +1,16 @@
 """A class represnting a node in an AVL tree"""
 
+import functools
+import math
+import operator
+import pickle
+import struct
+import sys
+import time
+from array import array
+from collections import Counter
+from collections.abc import MutableMapping
+
 class AVLNode(object):
 	"""Constructor, you are allowed to add more fields. 
 	
@@ -8,6 +19,12 @@ class AVLNode(object):
 	@type value: string
 	@param value: data of your node
 	"""
+	# fixed attribute layout instead of a per-instance __dict__, keeps nodes small and attribute access fast.
+	# a node takes 104 bytes on 64 bit CPython. agg and lazy take 16 of them on every node, also in trees
+	# without a monoid or range updates, because set_monoid, update_range and join can turn any tree into one
+	# of those while it keeps its nodes
+	__slots__ = ("key", "value", "left", "right", "parent", "height", "_size", "agg", "lazy")
+
 	def __init__(self, key, value, left=None, right=None, parent=None):
 		self.key = key
 		self.value = value
@@ -15,8 +32,9 @@ class AVLNode(object):
 		self.right = right
 		self.parent = parent
 		self.height = 0 if key is not None else -1
-		#just for testing
-		# self._size = 0
+		self._size = 1 if key is not None else 0 # number of real nodes in the subtree rooted at self
+		self.agg = None # aggregate of the subtree rooted at self, only kept in trees with a monoid
+		self.lazy = None # (update, tag) of a range update applied to self but not yet to its children, see update_range
 
 
 	"""returns whether self is not a virtual node 
@@ -30,19 +48,221 @@ class AVLNode(object):
 # Define the external leaf as singleton object (all external will point to this)
 EXTERNAL_LEAF = AVLNode(key=None, value=None)
 
+# default of AVLTree.pop, tells a missing default apart from default=None
+_MISSING = object()
+
+
+"""
+A class describing an aggregate kept in every node of an AVLTree: the measure of every item,
+combined in key order with an associative function that has an identity element.
+"""
+class Monoid(object):
+
+	"""
+	Constructor.
+
+	@type combine: function
+	@param combine: an associative function of two aggregates. it does not have to be commutative,
+	the left argument always holds smaller keys
+	@param identity: the aggregate of an empty range, combine(identity, a) == combine(a, identity) == a
+	@type measure: function
+	@param measure: measure(key, value) is the aggregate of a single item, the value if None
+	"""
+	def __init__(self, combine, identity, measure=None):
+		self.combine = combine
+		self.identity = identity
+		self.measure = measure if measure is not None else _value_of
+
+def _value_of(key, value):
+	return value
+
+def _one(key, value):
+	return 1
+
+SUM = Monoid(operator.add, 0)
+MIN = Monoid(min, math.inf)
+MAX = Monoid(max, -math.inf)
+COUNT = Monoid(operator.add, 0, _one)
+
+
+"""
+A class describing an update of values that update_range applies to a whole key range at once. the update
+of a subtree is kept as a tag in its root and reaches the nodes below only when they are visited.
+"""
+class LazyUpdate(object):
+
+	"""
+	Constructor.
+
+	@type apply: function
+	@param apply: apply(value, tag) is the value after the update
+	@type compose: function
+	@param compose: compose(first, second) is a single tag doing the update of first and then of second
+	@type apply_aggregate: function
+	@param apply_aggregate: apply_aggregate(agg, tag, size) is the aggregate of a subtree of size items after
+	the update of all of them. needed only in trees with a monoid
+	"""
+	def __init__(self, apply, compose, apply_aggregate=None):
+		self.apply = apply
+		self.compose = compose
+		self.apply_aggregate = apply_aggregate
+
+ADD = LazyUpdate(operator.add, operator.add)
+
+
+"""
+A class collecting operation counters and latencies of an AVLTree created with collect_stats=True.
+"""
+class AVLTreeStats(object):
+
+	"""
+	Constructor, all counters start at zero.
+	"""
+	def __init__(self):
+		self.reset()
+
+	"""sets all counters back to zero"""
+	def reset(self):
+		self.edges = 0 # edges walked by searches and inserts, as returned by them
+		self.promotes = 0
+		self.single_rotations = 0
+		self.double_rotations = 0
+		self.rebalance_loops = {"delete": Counter(), "join": Counter()} # loop length -> number of calls
+		self.calls = Counter() # operation -> number of calls
+		self.seconds = Counter() # operation -> total time
+		self.latencies = {} # operation -> Counter of latency buckets, see record_latency
+		self._running = False # True while a recorded operation runs, so nested operations are not timed twice
+
+	"""records one call of an operation
+
+	@type operation: str
+	@type seconds: float
+	@param seconds: the duration of the call. it is counted in the bucket of the smallest power of 2
+	microseconds that is larger than it
+	"""
+	def record_latency(self, operation, seconds):
+		self.calls[operation] += 1
+		self.seconds[operation] += seconds
+		bucket = 1 << int(seconds * 1e6).bit_length()
+		self.latencies.setdefault(operation, Counter())[bucket] += 1
+
+	"""returns all counters as plain dicts, e.g. to be written as JSON
+
+	@rtype: dict
+	"""
+	def as_dict(self):
+		return {
+			"edges": self.edges,
+			"promotes": self.promotes,
+			"single_rotations": self.single_rotations,
+			"double_rotations": self.double_rotations,
+			"rebalance_loops": {kind: dict(lengths) for kind, lengths in self.rebalance_loops.items()},
+			"calls": dict(self.calls),
+			"seconds": dict(self.seconds),
+			"latency_us": {operation: dict(buckets) for operation, buckets in self.latencies.items()},
+		}
+
+# the public operations of AVLTree recorded in its stats: name -> positions of the edges and the promotes in the
+# returned tuple, None if the operation returns none
+_INSTRUMENTED = {
+	"search": (1, None),
+	"finger_search": (1, None),
+	"search_sorted_batch": (1, None),
+	"insert": (1, 2),
+	"finger_insert": (1, 2),
+	"delete": (None, None),
+	"delete_key": (None, None),
+	"delete_range": (None, None),
+	"join": (None, None),
+	"union": (None, None),
+	"intersection": (None, None),
+	"difference": (None, None),
+	"split": (None, None),
+	"insert_many": (None, None),
+	"update_range": (None, None),
+}
+
+# wraps a bound method of a tree with stats: the latency of the call is recorded, and so are the edges and promotes
+# found at positions edges_at and promotes_at of the returned tuple. operations called from within another recorded
+# operation count in its latency only. the wrappers are bound to the trees with stats alone, see AVLTree._set_stats,
+# so the operations of the other trees run without any check
+def _instrumented(method, operation, edges_at=None, promotes_at=None):
+	tree = method.__self__
+	@functools.wraps(method)
+	def instrumented(*args, **kwargs):
+		stats = tree.stats
+		if stats._running:
+			result = method(*args, **kwargs)
+		else:
+			stats._running = True
+			start = time.perf_counter()
+			try:
+				result = method(*args, **kwargs)
+			finally:
+				stats._running = False
+			stats.record_latency(operation, time.perf_counter() - start)
+		if edges_at is not None:
+			stats.edges += result[edges_at]
+		if promotes_at is not None:
+			stats.promotes += result[promotes_at]
+		return result
+	return instrumented
+
 
 """
 A class implementing an AVL tree.
 """
-class AVLTree(object):
+class AVLTree(MutableMapping):
 
 	"""
 	Constructor, you are allowed to add more fields.
+
+	@type track_last_access: bool
+	@param track_last_access: if True, finger operations called without a finger start from the node
+	found or inserted by the previous finger operation instead of the max
+	@type collect_stats: bool
+	@param collect_stats: if True, self.stats is an AVLTreeStats that counts edges, promotes, rotations
+	and rebalance loop lengths, and records the latency of every operation
+	@type index_keys: bool
+	@param index_keys: if True, a dict from every key to its node is kept next to the tree, see build_index
+	@type monoid: Monoid
+	@param monoid: if not None, every node keeps the aggregate of its subtree, see aggregate
 	"""
-	def __init__(self):
+	def __init__(self, track_last_access=False, collect_stats=False, index_keys=False, monoid=None):
 		self.root = None
 		self._size = 0  # Number of real nodes in the tree
 		self.max = self.root # pointer to maximum node
+		self.min = self.root # pointer to minimum node
+		self.track_last_access = track_last_access
+		self._last = None # node of the last finger operation, only kept when track_last_access is set
+		self._set_stats(AVLTreeStats() if collect_stats else None)
+		self._index = {} if index_keys else None # key -> node, None if the tree has no index
+		self.monoid = monoid
+		self._lazy_tags = False # True once update_range left tags in the tree, reads then push them down
+
+	"""builds a balanced tree from items already sorted by key, without any rotation
+
+	@type items: iterable
+	@pre: items are (key, value) pairs with strictly increasing keys
+	@param items: the items of the new dictionary
+	@type monoid: Monoid
+	@param monoid: the monoid of the new tree, as in the constructor
+	@rtype: AVLTree
+	@returns: a new AVLTree holding items, built in O(n)
+	"""
+	@classmethod
+	def from_sorted(cls, items, monoid=None):
+		items = items if isinstance(items, list) else list(items)
+		tree = cls(monoid=monoid)
+		if len(items) == 0:
+			return tree
+		tree.root = _build_balanced(items, 0, len(items) - 1, None)
+		tree._size = len(items)
+		tree.max = _find_max(tree.root)
+		tree.min = _find_min(tree.root)
+		if monoid is not None:
+			_recompute_aggregates(tree.root, monoid)
+		return tree
 
 	"""searches for a node in the dictionary corresponding to the key (starting at the root)
         
@@ -53,30 +273,71 @@ class AVLTree(object):
 	and e is the number of edges on the path between the starting node and ending node+1.
 	"""
 	def search(self, key):
+		if self._lazy_tags:
+			_push_path(self.root, key)
 		x , e, _ = _search_from(self.root, key)
 		return x, e
 
 
-	"""searches for a node in the dictionary corresponding to the key, starting at the max
+	"""searches for a node in the dictionary corresponding to the key, starting at a finger (the max by default)
         
 	@type key: int
 	@param key: a key to be searched
+	@type finger: AVLNode
+	@param finger: a node of self to start from, e.g. min_node() or a node returned by an earlier call.
+	if None, the max is used (or the last accessed node when track_last_access is set)
 	@rtype: (AVLNode,int)
 	@returns: a tuple (x,e) where x is the node corresponding to key (or None if not found),
-	and e is the number of edges on the path between the starting node- the maximum of tree and ending node+1.
+	and e is the number of edges on the path between the starting node- the finger and ending node+1.
 	"""
-	def finger_search(self, key):
+	def finger_search(self, key, finger=None):
 		if self.max is None:
 			return None, 0
-		ancestor , edges_up = self._finger_track_up(key)
+		ancestor , edges_up = self._finger_track_up(key, finger)
 		# go down until key is found
 		node , edges_down, _ = _search_from(ancestor, key)
 		edges = edges_down + edges_up
+		if self._lazy_tags and node is not None:
+			_settle(node)
+		if self.track_last_access and node is not None:
+			self._last = node
 		return node, edges
 
 
-	# helper that finds first common ancestor of max and key and  used in finger_search and finger_insert
-	def _finger_track_up(self, key):
+	"""searches for a sorted sequence of keys in one pass, every search starts from the previous result
+
+	@type keys: iterable
+	@param keys: the keys to be searched, in increasing order (other orders give correct but slower results)
+	@rtype: (list,int)
+	@returns: a tuple (x,e) where x is a list with the node of every key (None for keys that are not found),
+	and e is the total number of edges walked, O(k log(n/k + 1)) for k sorted keys
+	"""
+	def search_sorted_batch(self, keys):
+		nodes = []
+		total_edges = 0
+		finger = self.min
+		for key in keys:
+			if finger is None:
+				nodes.append(None)
+				continue
+			ancestor, edges_up = self._finger_track_up(key, finger)
+			node, edges_down, parent = _search_from(ancestor, key)
+			if self._lazy_tags and node is not None:
+				_settle(node)
+			nodes.append(node)
+			total_edges += edges_up + edges_down
+			# the next search climbs from where this one ended
+			finger = node if node is not None else parent
+		return nodes, total_edges
+
+	# helper that finds the node to start the descent from when going from finger to key. used in finger_search and finger_insert
+	def _finger_track_up(self, key, finger=None):
+		if finger is None:
+			finger = self._last if self._last is not None else self.max
+		if finger is not self.max and key < self.max.key:
+			if key <= self.min.key:
+				return self.min, 0
+			return _climb_from(finger, key)
 		curr = self.max_node()
 		edges = 0
 		# go up until key is in subtree of current node
@@ -98,26 +359,46 @@ class AVLTree(object):
 	and h is the number of PROMOTE cases during the AVL rebalancing
 	"""
 	def insert(self, key, val):
+		if self._lazy_tags:
+			_push_path(self.root, key)
 		_ ,edges, parent = _search_from(self.root, key)
-		new_node , promotes = self._insert_to_parent(parent, key, val)
+		new_node , promotes = self._insert_to_parent(parent, AVLNode(key, val, left=EXTERNAL_LEAF, right=EXTERNAL_LEAF))
 		return new_node, edges, promotes
 
-	#helper function to insert a new node to the parent and handle all logic and rebalancing. used in insert and insert_finger
-	def _insert_to_parent(self, parent, key, val):
+	#helper function to insert a new leaf node to the parent and handle all logic and rebalancing. used in insert, insert_finger and join
+	def _insert_to_parent(self, parent, new_node):
+		key = new_node.key
+		monoid = self.monoid
+		if monoid is not None:
+			_update_aggregate(new_node, monoid)
 		if parent is None:
-			self.root = AVLNode(key, val, parent=None, left=EXTERNAL_LEAF, right=EXTERNAL_LEAF)
+			self.root = new_node
 			self._size += 1
 			self.max = self.root
+			self.min = self.root
+			if self._index is not None:
+				self._index[key] = new_node
 			return self.root, 0
-		new_node = AVLNode(key, val, parent=parent, left=EXTERNAL_LEAF, right=EXTERNAL_LEAF)
+		new_node.parent = parent
 		if key > parent.key:
 			parent.right = new_node
 		else:
 			parent.left = new_node
 		self._size += 1
+		if self._index is not None:
+			self._index[key] = new_node
+		# every ancestor gains one node in its subtree, rotations below recompute sizes from children
+		curr = parent
+		while curr is not None:
+			curr._size += 1
+			if monoid is not None:
+				_update_aggregate(curr, monoid)
+			curr = curr.parent
 		# update max if needed
 		if self.max is not None and key > self.max.key:
 			self.max = new_node
+		if self.min is not None and key < self.min.key:
+			self.min = new_node
 
 		# case A: parent is not a leaf - valid AVL tree
 		if parent.height == 1:
@@ -135,7 +416,7 @@ class AVLTree(object):
 				promotes += 1
 				curr = curr.parent
 			else:
-				curr = _rebalance(curr.parent)
+				curr = _rebalance(curr.parent, self.stats, monoid)
 				break # we break since we know in this case we finish
 
 
@@ -145,28 +426,42 @@ class AVLTree(object):
 
 		return new_node, promotes
 
-	"""inserts a new node into the dictionary with corresponding key and value, starting at the max
+	"""inserts a new node into the dictionary with corresponding key and value, starting at a finger (the max by default)
 
 	@type key: int
 	@pre: key currently does not appear in the dictionary
 	@param key: key of item that is to be inserted to self
 	@type val: string
 	@param val: the value of the item
+	@type finger: AVLNode
+	@param finger: a node of self to start from, as in finger_search
 	@rtype: (AVLNode,int,int)
 	@returns: a 3-tuple (x,e,h) where x is the new node,
 	e is the number of edges on the path between the starting node and new node before rebalancing,
 	and h is the number of PROMOTE cases during the AVL rebalancing
 	"""
-	def finger_insert(self, key, val):
+	def finger_insert(self, key, val, finger=None):
 		if self.max is None:
 			self.root = AVLNode(key, val, parent=None, left=EXTERNAL_LEAF, right=EXTERNAL_LEAF)
 			self._size += 1
 			self.max = self.root
+			self.min = self.root
+			if self._index is not None:
+				self._index[key] = self.root
+			if self.monoid is not None:
+				_update_aggregate(self.root, self.monoid)
+			if self.track_last_access:
+				self._last = self.root
 			return self.root, 0, 0
-		ancestor,edges_up =  self._finger_track_up(key)
+		ancestor,edges_up =  self._finger_track_up(key, finger)
 		_, edges_down, parent = _search_from(ancestor, key)
 		edges = edges_down + edges_up
-		new_node, promotes = self._insert_to_parent(parent, key, val)
+		if self._lazy_tags:
+			# the aggregates and the rotations above the new node need the tags of its ancestors pushed
+			_settle(parent)
+		new_node, promotes = self._insert_to_parent(parent, AVLNode(key, val, left=EXTERNAL_LEAF, right=EXTERNAL_LEAF))
+		if self.track_last_access:
+			self._last = new_node
 		return new_node, edges, promotes
 
 	"""deletes node from the dictionary
@@ -175,12 +470,21 @@ class AVLTree(object):
 	@pre: node is a real pointer to a node in self
 	"""
 	def delete(self, node):
+		if self._lazy_tags:
+			_settle(node)
 		# Case 1: Node has two children, we swap values with the predecessor (must be leaf) and delete the predecessor
 		if node.left.is_real_node() and node.right.is_real_node():
+			if self._lazy_tags:
+				# the path from node.left towards node.key ends at the predecessor
+				_push_path(node.left, node.key)
 			pred = _predecessor(node)
 			node.key, pred.key = pred.key, node.key
 			node.value, pred.value = pred.value, node.value
+			if self._index is not None:
+				self._index[node.key] = node
 			node = pred # node to be deleted
+		if self._index is not None:
+			del self._index[node.key]
 
 		# logic for deleting a leaf node. for case 1 and 2- if node was originally leaf
 		if not node.left.is_real_node() and not node.right.is_real_node():
@@ -188,6 +492,8 @@ class AVLTree(object):
 				self.root = None
 				self._size = 0
 				self.max = None
+				self.min = None
+				self._last = None
 				return
 			else:
 				if node.parent.left == node:
@@ -208,11 +514,18 @@ class AVLTree(object):
 				self.root = child
 		# now we start rebalancing from parent to root
 		curr = node.parent
+		steps = 0
 		while curr:
 			_update_height(curr)
+			_update_size(curr)
+			if self.monoid is not None:
+				_update_aggregate(curr, self.monoid)
 			if abs(_balance_factor(curr)) > 1:
-				curr = _rebalance(curr)
+				curr = _rebalance(curr, self.stats, self.monoid)
 			curr = curr.parent
+			steps += 1
+		if self.stats is not None:
+			self.stats.rebalance_loops["delete"][steps] += 1
 
 		# final updates
 		# check if root has changed due to rotations. in any rotation on the root it drops maximum by 1
@@ -222,9 +535,216 @@ class AVLTree(object):
 		# update max if needed
 		if self.max.key == node.key:
 			self.max = _find_max(self.root)
+		if self.min is node:
+			self.min = _find_min(self.root)
+		if self._last is node:
+			self._last = None
 		return
 
 
+	"""searches for a key without counting edges, for callers that do not need the statistics of search
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: AVLNode
+	@returns: the node corresponding to key, None if not found
+	"""
+	def fast_search(self, key):
+		if self._lazy_tags:
+			node = self._index.get(key) if self._index is not None else _search_from(self.root, key)[0]
+			if node is not None:
+				_settle(node)
+			return node
+		if self._index is not None:
+			return self._index.get(key)
+		curr = self.root
+		if curr is None:
+			return None
+		# EXTERNAL_LEAF is the only node without a key
+		while curr.key is not None:
+			if curr.key == key:
+				return curr
+			curr = curr.left if key < curr.key else curr.right
+		return None
+
+	"""inserts a new node like insert, without counting edges and promotes and without updating stats
+
+	@type key: int
+	@pre: key currently does not appear in the dictionary
+	@param key: key of item that is to be inserted to self
+	@type val: string
+	@param val: the value of the item
+	@rtype: AVLNode
+	@returns: the new node
+	"""
+	def fast_insert(self, key, val):
+		parent = self.root
+		if parent is None:
+			self.root = AVLNode(key, val, left=EXTERNAL_LEAF, right=EXTERNAL_LEAF)
+			self._size = 1
+			self.max = self.root
+			self.min = self.root
+			if self._index is not None:
+				self._index[key] = self.root
+			if self.monoid is not None:
+				_update_aggregate(self.root, self.monoid)
+			return self.root
+		if self._lazy_tags:
+			_push_path(parent, key)
+		while True:
+			child = parent.right if key > parent.key else parent.left
+			if child.key is None:
+				break
+			parent = child
+		new_node = AVLNode(key, val, left=EXTERNAL_LEAF, right=EXTERNAL_LEAF, parent=parent)
+		if key > parent.key:
+			parent.right = new_node
+			if key > self.max.key:
+				self.max = new_node
+		else:
+			parent.left = new_node
+			if key < self.min.key:
+				self.min = new_node
+		self._size += 1
+		if self._index is not None:
+			self._index[key] = new_node
+		monoid = self.monoid
+		if monoid is not None:
+			_update_aggregate(new_node, monoid)
+		curr = parent
+		while curr is not None:
+			curr._size += 1
+			if monoid is not None:
+				_update_aggregate(curr, monoid)
+			curr = curr.parent
+
+		# go up while the subtree of curr grew taller than its sibling, at most one rebalance ends it
+		curr = new_node
+		parent = curr.parent
+		while parent is not None and curr.height >= parent.height:
+			bf = parent.left.height - parent.right.height
+			if bf == 1 or bf == -1:
+				parent.height = curr.height + 1
+				curr = parent
+				parent = curr.parent
+			else:
+				_rebalance(parent, None, monoid)
+				break
+		if self.root.parent is not None:
+			self.root = self.root.parent
+		return new_node
+
+	"""deletes node from the dictionary like delete, without updating stats
+
+	@type node: AVLNode
+	@pre: node is a real pointer to a node in self
+	"""
+	def fast_delete(self, node):
+		if self._lazy_tags:
+			_settle(node)
+		left = node.left
+		right = node.right
+		if left.key is not None and right.key is not None:
+			if self._lazy_tags:
+				_push_path(left, node.key)
+			# swap with the predecessor, which has no right child, and delete it instead
+			pred = left
+			while pred.right.key is not None:
+				pred = pred.right
+			node.key, pred.key = pred.key, node.key
+			node.value, pred.value = pred.value, node.value
+			if self._index is not None:
+				self._index[node.key] = node
+			node = pred
+			left = node.left
+			right = EXTERNAL_LEAF
+		if self._index is not None:
+			del self._index[node.key]
+		child = left if left.key is not None else right
+		parent = node.parent
+		if parent is None:
+			if child.key is None: # node was the only node
+				self.root = None
+				self._size = 0
+				self.max = None
+				self.min = None
+				self._last = None
+				return
+			child.parent = None
+			self.root = child
+		else:
+			if child.key is not None:
+				child.parent = parent
+			if parent.left is node:
+				parent.left = child
+			else:
+				parent.right = child
+
+		# every ancestor loses one node, rotations below recompute sizes from children
+		monoid = self.monoid
+		curr = parent
+		while curr is not None:
+			curr._size -= 1
+			curr.height = 1 + max(curr.left.height, curr.right.height)
+			if monoid is not None:
+				_update_aggregate(curr, monoid)
+			bf = curr.left.height - curr.right.height
+			if bf > 1 or bf < -1:
+				curr = _rebalance(curr, None, monoid)
+			curr = curr.parent
+		if self.root.parent is not None:
+			self.root = self.root.parent
+		self._size -= 1
+		if self.max is node:
+			self.max = _find_max(self.root)
+		if self.min is node:
+			self.min = _find_min(self.root)
+		if self._last is node:
+			self._last = None
+
+	"""deletes the node with the given key from the dictionary, if there is one
+
+	@type key: int
+	@param key: the key to be deleted
+	@rtype: bool
+	@returns: True if a node was deleted, False if key was not in the dictionary
+	"""
+	def delete_key(self, key):
+		node = self.fast_search(key)
+		if node is None:
+			return False
+		self.delete(node)
+		return True
+
+	"""deletes all the keys of a closed range from the dictionary, using two splits and one join
+
+	@type lo: int
+	@param lo: lower bound of the range (inclusive)
+	@type hi: int
+	@param hi: upper bound of the range (inclusive)
+	@rtype: int
+	@returns: the number of deleted nodes
+	"""
+	def delete_range(self, lo, hi):
+		if self.root is None or lo > hi:
+			return 0
+		old_size = self._size
+		index = self._index
+		if index is not None:
+			for key, _ in self.iter_items(lo, hi):
+				del index[key]
+			self._index = None # the splits below work on the tree only
+		smaller, _, rest = self._split_by_key(lo)
+		_, _, larger = rest._split_by_key(hi)
+		if larger.root is not None and smaller.root is not None:
+			# the minimum of the right part separates the two parts in join
+			separator = larger.min
+			larger.delete(separator)
+			smaller._join_node(larger, separator)
+		self._take_from(smaller if smaller.root is not None else larger)
+		self._index = index
+		return old_size - self._size
+
 	"""joins self with item and another AVLTree
 
 	@type tree2: AVLTree 
@@ -236,17 +756,38 @@ class AVLTree(object):
 	@pre: all keys in self are smaller than key and all keys in tree2 are larger than key,
 	or the opposite way
 	"""
-
 	def join(self, tree2, key, val):
-
+		x_node = AVLNode(key, val)
+		if self.monoid is not None and tree2.monoid is not self.monoid:
+			if tree2._lazy_tags:
+				_push_range(tree2.root, None, None)
+			_recompute_aggregates(tree2.root, self.monoid)
+		if self._index is not None:
+			self._index = _merged_index(self._index, tree2)
+			self._index[key] = x_node
+		self._join_node(tree2, x_node)
+
+	# helper that joins self with tree2 and x_node, whose key separates them. x_node itself is linked into the
+	# tree, so split and the bulk operations can join with a node they took out without creating a new one and
+	# nodes keep their identity. used in join, split and the set operations
+	def _join_node(self, tree2, x_node):
+		key = x_node.key
+		self._lazy_tags = self._lazy_tags or tree2._lazy_tags
 		if tree2.root is None or not tree2.root.is_real_node():
-			self.insert(key, val)
+			_reset_leaf(x_node)
+			if self._lazy_tags:
+				_push_path(self.root, key)
+			self._insert_to_parent(_search_from(self.root, key)[2], x_node)
 			return
 		if self.root is None or not self.root.is_real_node():
 			self.root = tree2.root
 			self.max = tree2.max
+			self.min = tree2.min
 			self._size = tree2._size
-			self.insert(key, val)
+			_reset_leaf(x_node)
+			if self._lazy_tags:
+				_push_path(self.root, key)
+			self._insert_to_parent(_search_from(self.root, key)[2], x_node)
 			return
 
 		# determine which tree is of greater keys
@@ -257,35 +798,43 @@ class AVLTree(object):
 			return self._join_with_bigger_subtree(
 				bigger_tree=left_tree,
 				smaller_tree=right_tree,
-				key=key,
-				val=val,
+				x_node=x_node,
 				is_left_bigger=True
 			)
 		if right_tree.root.height > left_tree.root.height + 1:
 			return self._join_with_bigger_subtree(
 				bigger_tree=right_tree,
 				smaller_tree=left_tree,
-				key=key,
-				val=val,
+				x_node=x_node,
 				is_left_bigger=False
 			)
 
 		# if trees differ by at most 1 in height
-		new_root = AVLNode(key, val, left=left_tree.root, right=right_tree.root)
+		new_root = x_node
+		new_root.parent = None
+		new_root.left = left_tree.root
+		new_root.right = right_tree.root
 		left_tree.root.parent = new_root
 		right_tree.root.parent = new_root
 		_update_height(new_root)
+		_update_size(new_root)
+		if self.monoid is not None:
+			_update_aggregate(new_root, self.monoid)
 		self.root = new_root
-		self._size += tree2._size + 1
+		self._size = new_root._size
 		self.max = right_tree.max
+		self.min = left_tree.min
 		return
 
-	def _join_with_bigger_subtree(self, bigger_tree, smaller_tree, key, val, is_left_bigger):
+	def _join_with_bigger_subtree(self, bigger_tree, smaller_tree, x_node, is_left_bigger):
 		"""Helper method to join trees when one subtree is significantly bigger"""
 		# go down in bigger until we find a node with height of smaller.root.height
 		curr = bigger_tree.root
 		external_stop_flag = False
 		while curr.height > smaller_tree.root.height:
+			# x_node takes the place of a child of curr or of its parent, so their tags go down first
+			if curr.lazy is not None:
+				_push(curr)
 			if (is_left_bigger and not curr.right.is_real_node()) or (not is_left_bigger and not curr.left.is_real_node()):
 				external_stop_flag = True
 				break
@@ -296,45 +845,110 @@ class AVLTree(object):
 		# connect and cut what's needed
 		if is_left_bigger:
 			if external_stop_flag:
-				x_node = AVLNode(key, val, parent=curr, left=EXTERNAL_LEAF, right=smaller_tree.root)
+				x_node.parent, x_node.left, x_node.right = curr, EXTERNAL_LEAF, smaller_tree.root
 				curr.right = x_node
 			else:
-				x_node = AVLNode(key, val, parent=curr.parent, left=curr, right=smaller_tree.root)
+				x_node.parent, x_node.left, x_node.right = curr.parent, curr, smaller_tree.root
 				curr.parent.right = x_node
 				curr.parent = x_node
 		else:
 			if external_stop_flag:
-				x_node = AVLNode(key, val, parent=curr, left=smaller_tree.root, right=EXTERNAL_LEAF)
+				x_node.parent, x_node.left, x_node.right = curr, smaller_tree.root, EXTERNAL_LEAF
 				curr.left = x_node
 			else:
-				x_node = AVLNode(key, val, parent=curr.parent, left=smaller_tree.root, right=curr)
+				x_node.parent, x_node.left, x_node.right = curr.parent, smaller_tree.root, curr
 				curr.parent.left = x_node
 				curr.parent = x_node
 
 		smaller_tree.root.parent = x_node
 		_update_height(x_node)
+		_update_size(x_node)
+		monoid = self.monoid
+		if monoid is not None:
+			_update_aggregate(x_node, monoid)
 
 		# rebalance from x_node to root
 		curr = x_node
+		steps = 0
 		# rebalancing logic
 		while curr.parent is not None and  curr.height >= curr.parent.height :
 			bf = _balance_factor(curr.parent)
+			steps += 1
 			# notice bf ==0 is impossible here.
 			if bf in [-1, 1]:  # case 1 - only promote
 				_update_height(curr.parent)
+				_update_size(curr.parent)
+				if monoid is not None:
+					_update_aggregate(curr.parent, monoid)
 				curr = curr.parent
 			else: # case 2 - rotate
-				curr = _rebalance(curr.parent)
+				curr = _rebalance(curr.parent, self.stats, monoid)
+		if self.stats is not None:
+			self.stats.rebalance_loops["join"][steps] += 1
+		# heights are settled, but every ancestor of x_node still gained the nodes of the smaller tree
+		while curr.parent is not None:
+			curr = curr.parent
+			_update_size(curr)
+			if monoid is not None:
+				_update_aggregate(curr, monoid)
 
 		# check if root has changed due to rotations. in any rotation on the root it drops maximum by 1
 		if bigger_tree.root.parent is not None:
 			bigger_tree.root = bigger_tree.root.parent
 
 		self.max = smaller_tree.max if is_left_bigger else bigger_tree.max
+		self.min = bigger_tree.min if is_left_bigger else smaller_tree.min
 		self.root = bigger_tree.root
-		self._size = bigger_tree._size + smaller_tree._size + 1
+		self._size = self.root._size
 		return
 
+	"""merges another AVLTree into self, the key ranges of the two trees may overlap
+
+	@type tree2: AVLTree
+	@param tree2: a dictionary to be merged into self, it is not valid anymore afterwards
+	@post: self holds every key of self or tree2. a key in both keeps the value from self
+	"""
+	def union(self, tree2):
+		if tree2._lazy_tags and tree2.monoid is not self.monoid:
+			_push_range(tree2.root, None, None)
+		_adopt_monoid(tree2, self.monoid)
+		index, self._index = self._index, None
+		if index is not None:
+			# nodes keep their identity, and for a key in both trees the node of self is kept
+			for key, node in _index_nodes(tree2.root).items():
+				index.setdefault(key, node)
+		tree2._index = None
+		self._take_from(_finish_bulk(_union(self, tree2)))
+		self._index = index
+
+	"""keeps in self only the keys that are also in another AVLTree
+
+	@type tree2: AVLTree
+	@param tree2: a dictionary to be intersected with self, it is not valid anymore afterwards
+	@post: self holds the keys that are both in self and in tree2, with their values from self
+	"""
+	def intersection(self, tree2):
+		index, self._index = self._index, None
+		tree2._index = None
+		self._take_from(_finish_bulk(_intersection(self, tree2)))
+		if index is not None:
+			self._index = _index_nodes(self.root)
+
+	"""removes from self the keys of another AVLTree
+
+	@type tree2: AVLTree
+	@param tree2: a dictionary whose keys are removed from self, it is not valid anymore afterwards
+	@post: self holds the keys of self that are not in tree2
+	"""
+	def difference(self, tree2):
+		index, self._index = self._index, None
+		if index is not None:
+			for key in _index_nodes(tree2.root):
+				index.pop(key, None)
+		tree2._index = None
+		self._take_from(_finish_bulk(_difference(self, tree2)))
+		self._index = index
+
 	"""splits the dictionary at a given node
 	be aware after this function is called the size property of the dictionary is not valid anymore
 
@@ -344,14 +958,22 @@ class AVLTree(object):
 	@rtype: (AVLTree, AVLTree)
 	@returns: a tuple (left, right), where left is an AVLTree representing the keys in the 
 	dictionary smaller than node.key, and right is an AVLTree representing the keys in the 
-	dictionary larger than node.key.
+	dictionary larger than node.key. both share the stats of self, if it has any.
 	"""
 	def split(self, node):
 		# Initialize the subtrees based on the given node
 		larger_than_node = AVLTree() # Subtree with nodes larger than the current node's key
 		smaller_than_node = AVLTree() # Subtree with nodes smaller than the current node's key
+		# the parts keep counting into the stats of self and keep its aggregates, including during the joins done while splitting
+		smaller_than_node._set_stats(self.stats)
+		larger_than_node._set_stats(self.stats)
+		smaller_than_node.monoid = larger_than_node.monoid = self.monoid
+		smaller_than_node._lazy_tags = larger_than_node._lazy_tags = self._lazy_tags
 		if node is None or not node.is_real_node():
 			return smaller_than_node, larger_than_node
+		if self._lazy_tags:
+			# the nodes on the path to the root are taken apart, the tags below them stay where they are
+			_settle(node)
 		if node.left.is_real_node():
 			smaller_than_node.root = node.left
 			node.left.parent = None
@@ -359,30 +981,192 @@ class AVLTree(object):
 			larger_than_node.root = node.right
 			node.right.parent = None
 
-		# Traverse upwards from the given node to update the subtrees structure
-		curr_parent = node.parent
-		curr_child = node
+		is_right_child = node.parent is not None and node == node.parent.right
+		self._split_upwards(node.parent, is_right_child, smaller_than_node, larger_than_node)
+		if self._index is not None:
+			_split_index(self._index, node, smaller_than_node, larger_than_node)
+		# Return the two resulting subtrees
+		return smaller_than_node, larger_than_node
+
+	# helper that walks from curr_parent to the root, joining every subtree hanging off the path into smaller_than_node
+	# or larger_than_node, and fixes their max and size. is_right_child tells on which side of curr_parent the split point is.
+	# used in split and _split_by_key
+	def _split_upwards(self, curr_parent, is_right_child, smaller_than_node, larger_than_node):
+		# Traverse upwards from the split point to update the subtrees structure
 		while curr_parent :
 			temp_tree = AVLTree()
-			if curr_child == curr_parent.right:# If the current node is in the right subtree of its parent
+			# the join below relinks curr_parent, so the next step is read first
+			next_parent = curr_parent.parent
+			next_is_right_child = next_parent is not None and curr_parent == next_parent.right
+			if is_right_child:# If the current node is in the right subtree of its parent
 				if curr_parent.left.is_real_node():
 					temp_tree.root = curr_parent.left
 					curr_parent.left.parent = None
-				# Join the parent's left subtree with the smaller subtree
-				smaller_than_node.join(temp_tree, curr_parent.key, curr_parent.value)
+				# Join the parent's left subtree with the smaller subtree, curr_parent is the separator
+				smaller_than_node._join_node(temp_tree, curr_parent)
 			else: # If the current node is in the left subtree of its parent
 				if curr_parent.right.is_real_node():
 					temp_tree.root = curr_parent.right
 					curr_parent.right.parent = None
-				# Join the parent's right subtree with the larger subtree
-				larger_than_node.join(temp_tree, curr_parent.key, curr_parent.value)
+				# Join the parent's right subtree with the larger subtree, curr_parent is the separator
+				larger_than_node._join_node(temp_tree, curr_parent)
 			# Move up to the parent node for the next iteration
-			curr_child = curr_parent
-			curr_parent = curr_parent.parent
+			is_right_child = next_is_right_child
+			curr_parent = next_parent
 		smaller_than_node.max = _find_max(smaller_than_node.root)
 		larger_than_node.max = _find_max(larger_than_node.root)
-		# Return the two resulting subtrees
-		return smaller_than_node, larger_than_node
+		smaller_than_node.min = _find_min(smaller_than_node.root)
+		larger_than_node.min = _find_min(larger_than_node.root)
+		smaller_than_node._size = smaller_than_node.root._size if smaller_than_node.root is not None else 0
+		larger_than_node._size = larger_than_node.root._size if larger_than_node.root is not None else 0
+
+	# splits the dictionary around key, which does not have to be in it. returns a 3-tuple (left, node, right) where
+	# node is the node holding key (None if key is not in self). like split, self is not valid anymore afterwards.
+	# used in delete_range and the set operations
+	def _split_by_key(self, key):
+		if self._lazy_tags:
+			_push_path(self.root, key)
+		node, _, parent = _search_from(self.root, key)
+		if node is not None:
+			smaller_than_node, larger_than_node = self.split(node)
+			return smaller_than_node, node, larger_than_node
+		smaller_than_node = AVLTree()
+		larger_than_node = AVLTree()
+		smaller_than_node._set_stats(self.stats)
+		larger_than_node._set_stats(self.stats)
+		smaller_than_node.monoid = larger_than_node.monoid = self.monoid
+		smaller_than_node._lazy_tags = larger_than_node._lazy_tags = self._lazy_tags
+		if parent is not None:
+			self._split_upwards(parent, key > parent.key, smaller_than_node, larger_than_node)
+		return smaller_than_node, None, larger_than_node
+
+	"""inserts a batch of items into the dictionary. a batch of k items that is small next to the n items of
+	the dictionary is inserted key by key in O(k log n), a larger one is merged with the items of the
+	dictionary and the tree is relinked in O(n + k). the nodes of the dictionary keep their identity
+
+	@type items: iterable
+	@param items: (key, value) pairs in any order. a key that is already in the dictionary
+	gets its value replaced, and for a key repeated in items the last value wins
+	@rtype: int
+	@returns: the number of items in the dictionary after the insertion
+	"""
+	def insert_many(self, items):
+		batch = {}
+		for key, val in items:
+			batch[key] = val
+		if len(batch) == 0:
+			return self._size
+		if len(batch) * _MERGE_BATCH_RATIO < self._size:
+			for key, val in batch.items():
+				self[key] = val
+		else:
+			self._merge_sorted_batch(sorted(batch.items()))
+		return self._size
+
+	# merges batch (sorted (key, value) pairs) into self in one pass over both, then links the nodes of self and
+	# new nodes for the other keys into a balanced tree. used in insert_many
+	def _merge_sorted_batch(self, batch):
+		if self._lazy_tags:
+			# the tree is relinked from scratch, so every tag goes down to the values first
+			_push_range(self.root, None, None)
+			self._lazy_tags = False
+		nodes = []
+		curr = _find_min(self.root)
+		for key, val in batch:
+			while curr is not None and curr.key < key:
+				nodes.append(curr)
+				curr = _successor(curr)
+			if curr is not None and curr.key == key:
+				curr.value = val
+				nodes.append(curr)
+				curr = _successor(curr)
+				continue
+			node = AVLNode(key, val)
+			nodes.append(node)
+			if self._index is not None:
+				self._index[key] = node
+		while curr is not None:
+			nodes.append(curr)
+			curr = _successor(curr)
+		self.root = _link_balanced(nodes, 0, len(nodes) - 1, None)
+		self._size = len(nodes)
+		self.max = nodes[-1]
+		self.min = nodes[0]
+		self._last = None
+		if self.monoid is not None:
+			_recompute_aggregates(self.root, self.monoid)
+
+	# sets the stats of self, and binds the recording wrappers of the operations in _INSTRUMENTED if it is not None
+	def _set_stats(self, stats):
+		self.stats = stats
+		if stats is None:
+			return
+		for name, (edges_at, promotes_at) in _INSTRUMENTED.items():
+			method = getattr(type(self), name).__get__(self)
+			setattr(self, name, _instrumented(method, name, edges_at, promotes_at))
+
+	# makes self the tree that other represents, used after building the result of a bulk operation in other trees
+	def _take_from(self, other):
+		self.root = other.root
+		self.max = other.max
+		self.min = other.min
+		self._size = other._size
+		self._last = None
+		self._lazy_tags = other._lazy_tags
+
+	"""returns the rank of node in the dictionary
+
+	@type node: AVLNode
+	@pre: node is a real pointer to a node in self
+	@rtype: int
+	@returns: the 1-based position of node.key in the sorted order of the keys in self
+	"""
+	def rank(self, node):
+		r = node.left._size + 1
+		curr = node
+		while curr.parent is not None:
+			if curr is curr.parent.right:
+				r += curr.parent.left._size + 1
+			curr = curr.parent
+		return r
+
+	"""returns the node of a given rank in the dictionary
+
+	@type i: int
+	@param i: a 1-based rank
+	@rtype: AVLNode
+	@returns: the node whose key is the i-th smallest in self, None if i is out of range
+	"""
+	def select(self, i):
+		if self.root is None or i < 1 or i > self.root._size:
+			return None
+		curr = self.root
+		while curr.is_real_node():
+			left_size = curr.left._size
+			if i == left_size + 1:
+				if self._lazy_tags:
+					_settle(curr)
+				return curr
+			if i <= left_size:
+				curr = curr.left
+			else:
+				i -= left_size + 1
+				curr = curr.right
+		return None
+
+	"""counts the keys of the dictionary in a closed range
+
+	@type lo: int
+	@param lo: lower bound of the range (inclusive)
+	@type hi: int
+	@param hi: upper bound of the range (inclusive)
+	@rtype: int
+	@returns: the number of keys k in self with lo <= k <= hi
+	"""
+	def range_count(self, lo, hi):
+		if lo > hi:
+			return 0
+		return _count_less(self.root, hi, inclusive=True) - _count_less(self.root, lo, inclusive=False)
 
 	"""returns an s array representing dictionary 
 
@@ -390,16 +1174,61 @@ class AVLTree(object):
 	@returns: a sorted list according to key of touples (key, value) representing the data structure
 	"""
 	def avl_to_array(self):
-		result = []
-		def inorder_traversal(node):
-			if not node or not node.is_real_node():
-				return
-			inorder_traversal(node.left)
-			result.append((node.key, node.value))
-			inorder_traversal(node.right)
-
-		inorder_traversal(self.root)
-		return result
+		return list(self.iter_items())
+
+	"""lazily iterates over the items of the dictionary in key order, walking parent pointers
+
+	@type lo: int
+	@param lo: if not None, iteration starts at the first key >= lo
+	@type hi: int
+	@param hi: if not None, iteration stops after the last key <= hi
+	@type reverse: bool
+	@param reverse: iterate from the largest key to the smallest
+	@rtype: generator
+	@returns: a generator of (key, value) tuples. uses O(1) extra memory and costs O(log n + k) for k items,
+	also in a tree with tags of range updates. the dictionary must not be modified while the generator is in use
+	"""
+	def iter_items(self, lo=None, hi=None, reverse=False):
+		if lo is not None and hi is not None and lo > hi:
+			return
+		if self._lazy_tags:
+			yield from self._iter_pushing(lo, hi, reverse)
+			return
+		if reverse:
+			node = _find_max(self.root) if hi is None else _floor(self.root, hi)
+			while node is not None and (lo is None or node.key >= lo):
+				yield node.key, node.value
+				node = _predecessor(node)
+		else:
+			node = _find_min(self.root) if lo is None else _ceiling(self.root, lo)
+			while node is not None and (hi is None or node.key <= hi):
+				yield node.key, node.value
+				node = _successor(node)
+
+	# iter_items for a tree with tags. every node is pushed when the walk comes down to it, so the node yielded
+	# and the nodes below it hold their current values, and the walk up only meets nodes pushed before.
+	# a full iteration pushes every tag
+	def _iter_pushing(self, lo, hi, reverse):
+		if reverse:
+			if hi is None:
+				node = _settled_max(self.root)
+			else:
+				_push_path(self.root, hi)
+				node = _floor(self.root, hi)
+			while node is not None and (lo is None or node.key >= lo):
+				yield node.key, node.value
+				node = _settled_max(node.left) if node.left.key is not None else _predecessor(node)
+		else:
+			if lo is None:
+				node = _settled_min(self.root)
+			else:
+				_push_path(self.root, lo)
+				node = _ceiling(self.root, lo)
+			while node is not None and (hi is None or node.key <= hi):
+				yield node.key, node.value
+				node = _settled_min(node.right) if node.right.key is not None else _successor(node)
+		if lo is None and hi is None:
+			self._lazy_tags = False
 
 	"""returns the node with the maximal key in the dictionary
 
@@ -407,8 +1236,20 @@ class AVLTree(object):
 	@returns: the maximal node, None if the dictionary is empty
 	"""
 	def max_node(self):
+		if self._lazy_tags and self.max is not None:
+			_settle(self.max)
 		return self.max
 
+	"""returns the node with the minimal key in the dictionary
+
+	@rtype: AVLNode
+	@returns: the minimal node, None if the dictionary is empty
+	"""
+	def min_node(self):
+		if self._lazy_tags and self.min is not None:
+			_settle(self.min)
+		return self.min
+
 	"""returns the number of items in dictionary 
 
 	@rtype: int
@@ -426,11 +1267,365 @@ class AVLTree(object):
 	def get_root(self):
 		return self.root
 
+	"""returns the aggregate of the items in a closed key range, combined in key order
+
+	@type lo: int
+	@param lo: lower bound of the range (inclusive), None for no lower bound
+	@type hi: int
+	@param hi: upper bound of the range (inclusive), None for no upper bound
+	@pre: self has a monoid
+	@returns: the aggregate, the identity of the monoid if no key is in the range. costs O(log n)
+	"""
+	def aggregate(self, lo=None, hi=None):
+		if self.monoid is None:
+			raise ValueError("the tree has no monoid")
+		return _aggregate(self.root, lo, hi, self.monoid)
+
+	"""sets the monoid of the tree and computes the aggregates of all nodes in O(n)
+
+	@type monoid: Monoid
+	@param monoid: the new monoid, None to stop keeping aggregates
+	"""
+	def set_monoid(self, monoid):
+		if self._lazy_tags:
+			# the tags were applied to the aggregates of the old monoid
+			_push_range(self.root, None, None)
+			self._lazy_tags = False
+		self.monoid = monoid
+		if monoid is not None:
+			_recompute_aggregates(self.root, monoid)
+
+	"""updates the values of all the keys in a closed range, in O(log n). whole subtrees inside the range get a
+	tag in their root, and the tag is pushed to the children of a node only when an operation visits them
+
+	@type lo: int
+	@param lo: lower bound of the range (inclusive)
+	@type hi: int
+	@param hi: upper bound of the range (inclusive)
+	@param delta: the tag of the update, e.g. the amount added by ADD
+	@type update: LazyUpdate
+	@param update: the update, every value v in the range becomes update.apply(v, delta)
+	@pre: if self has a monoid, update.apply_aggregate is not None
+	@rtype: int
+	@returns: the number of updated items
+	"""
+	def update_range(self, lo, hi, delta, update=ADD):
+		monoid = self.monoid
+		if monoid is not None and update.apply_aggregate is None:
+			raise ValueError("the update cannot be applied to the aggregates of the tree")
+		if self.root is None or lo > hi:
+			return 0
+		self._lazy_tags = True
+		# the nodes whose values are updated one by one, their aggregates are recomputed children before parents
+		path = []
+		node = self.root
+		while node.is_real_node():
+			_push(node)
+			path.append(node)
+			if node.key < lo:
+				node = node.right
+			elif node.key > hi:
+				node = node.left
+			else:
+				break
+		if not node.is_real_node():
+			return 0
+		node.value = update.apply(node.value, delta)
+		count = 1
+		# the keys >= lo in the left subtree: a node in the range takes its right subtree along
+		curr = node.left
+		while curr.is_real_node():
+			_push(curr)
+			path.append(curr)
+			if curr.key >= lo:
+				curr.value = update.apply(curr.value, delta)
+				count += 1 + curr.right._size
+				if curr.right.is_real_node():
+					_apply_tag(curr.right, update, delta)
+				curr = curr.left
+			else:
+				curr = curr.right
+		# the keys <= hi in the right subtree
+		curr = node.right
+		while curr.is_real_node():
+			_push(curr)
+			path.append(curr)
+			if curr.key <= hi:
+				curr.value = update.apply(curr.value, delta)
+				count += 1 + curr.left._size
+				if curr.left.is_real_node():
+					_apply_tag(curr.left, update, delta)
+				curr = curr.right
+			else:
+				curr = curr.left
+		if monoid is not None:
+			for curr in reversed(path):
+				_update_aggregate(curr, monoid)
+		return count
+
+	"""builds a dict from every key to its node, so that exact-match lookups (fast_search, [], in, get, pop)
+	cost O(1) and the tree is walked only for ordered queries. the operations of the tree keep the index
+	in sync: join costs O(k) and split O(k) more, for the k items of the smaller part
+
+	@rtype: None
+	"""
+	def build_index(self):
+		self._index = _index_nodes(self.root)
+
+	"""drops the key index, exact-match lookups walk the tree again"""
+	def drop_index(self):
+		self._index = None
+
+	"""returns the value of key
+
+	@type key: int
+	@raises KeyError: if key is not in the dictionary
+	"""
+	def __getitem__(self, key):
+		node = self.fast_search(key)
+		if node is None:
+			raise KeyError(key)
+		return node.value
+
+	"""sets the value of key, inserting a new node if key is not in the dictionary. in a tree with stats the
+	insertion is recorded as a call of insert
+
+	@type key: int
+	@type val: string
+	"""
+	def __setitem__(self, key, val):
+		node = self.fast_search(key)
+		if node is None:
+			if self.stats is not None:
+				self.insert(key, val)
+			else:
+				self.fast_insert(key, val)
+			return
+		node.value = val
+		if self.monoid is not None:
+			while node is not None:
+				_update_aggregate(node, self.monoid)
+				node = node.parent
+
+	"""deletes the node of key. in a tree with stats the deletion is recorded as a call of delete
+
+	@type key: int
+	@raises KeyError: if key is not in the dictionary
+	"""
+	def __delitem__(self, key):
+		node = self.fast_search(key)
+		if node is None:
+			raise KeyError(key)
+		self._delete_node(node)
+
+	def __contains__(self, key):
+		return self.fast_search(key) is not None
+
+	def __len__(self):
+		return self._size
+
+	"""iterates over the keys in increasing order
+
+	@rtype: generator
+	"""
+	def __iter__(self):
+		return (key for key, _ in self.iter_items())
+
+	"""returns the value of key
+
+	@type key: int
+	@param default: returned if key is not in the dictionary
+	"""
+	def get(self, key, default=None):
+		node = self.fast_search(key)
+		return node.value if node is not None else default
+
+	"""deletes the node of key and returns its value. in a tree with stats the deletion is recorded as a call of delete
+
+	@type key: int
+	@param default: returned if key is not in the dictionary. if it is not given, a missing key raises KeyError
+	"""
+	def pop(self, key, default=_MISSING):
+		node = self.fast_search(key)
+		if node is None:
+			if default is _MISSING:
+				raise KeyError(key)
+			return default
+		val = node.value
+		self._delete_node(node)
+		return val
+
+	# deletes node with delete in a tree with stats, so that the call and its rotations are recorded, and with
+	# fast_delete otherwise. used in __delitem__ and pop
+	def _delete_node(self, node):
+		if self.stats is not None:
+			self.delete(node)
+		else:
+			self.fast_delete(node)
+
+	"""deletes all the items of the dictionary in O(1), the key index stays enabled if there is one"""
+	def clear(self):
+		self.root = None
+		self._size = 0
+		self.max = None
+		self.min = None
+		self._last = None
+		if self._index is not None:
+			self._index = {}
+		self._lazy_tags = False
+
+	"""returns an immutable snapshot of the dictionary in Eytzinger layout, for batch lookups
+
+	@pre: all keys are integers that fit in 64 bits. NumPy must be installed
+	@rtype: FrozenAVLTree
+	@returns: a FrozenAVLTree with the items of self, later changes to self do not affect it
+	"""
+	def freeze(self):
+		# NumPy is only needed here, so it is imported on demand
+		from FrozenAVLTree import FrozenAVLTree
+		return FrozenAVLTree(self.iter_items())
+
+	"""writes the dictionary to a binary file
+
+	the format is a header followed by the nodes in pre-order: one byte of child flags and one byte
+	of height per node, the keys as signed 64 bit integers, and the values as type tags, lengths and
+	payloads. str and bytes values are stored as is, other values are pickled
+
+	@type fileobj: file object
+	@param fileobj: a file opened for binary writing
+	@pre: all keys are integers that fit in 64 bits
+	"""
+	def dump(self, fileobj):
+		if self._lazy_tags:
+			_push_range(self.root, None, None)
+			self._lazy_tags = False
+		flags = bytearray()
+		heights = bytearray()
+		keys = array("q")
+		tags = bytearray()
+		lengths = array("Q")
+		payloads = []
+		stack = [self.root] if self.root is not None else []
+		while stack:
+			node = stack.pop()
+			flags.append((1 if node.left.is_real_node() else 0) | (2 if node.right.is_real_node() else 0))
+			heights.append(node.height)
+			keys.append(node.key)
+			tag, payload = _encode_value(node.value)
+			tags.append(tag)
+			lengths.append(len(payload))
+			payloads.append(payload)
+			if node.right.is_real_node():
+				stack.append(node.right)
+			if node.left.is_real_node():
+				stack.append(node.left)
+		if sys.byteorder == "big":
+			keys.byteswap()
+			lengths.byteswap()
+		fileobj.write(_DUMP_HEADER.pack(_DUMP_MAGIC, _DUMP_VERSION, len(keys)))
+		for block in (flags, heights, keys.tobytes(), tags, lengths.tobytes()):
+			fileobj.write(block)
+		fileobj.write(b"".join(payloads))
+
+	"""reads a dictionary written by dump, linking the nodes in one pass without any insert or rotation
+
+	@type fileobj: file object
+	@param fileobj: a file opened for binary reading
+	@rtype: AVLTree
+	@returns: a new AVLTree with the content of the file
+	"""
+	@classmethod
+	def load(cls, fileobj):
+		magic, version, n = _DUMP_HEADER.unpack(_read_exactly(fileobj, _DUMP_HEADER.size))
+		if magic != _DUMP_MAGIC or version != _DUMP_VERSION:
+			raise ValueError("not an AVLTree dump")
+		flags = _read_exactly(fileobj, n)
+		heights = _read_exactly(fileobj, n)
+		keys = array("q")
+		keys.frombytes(_read_exactly(fileobj, 8 * n))
+		tags = _read_exactly(fileobj, n)
+		lengths = array("Q")
+		lengths.frombytes(_read_exactly(fileobj, 8 * n))
+		if sys.byteorder == "big":
+			keys.byteswap()
+			lengths.byteswap()
+		payloads = memoryview(_read_exactly(fileobj, sum(lengths)))
+
+		tree = cls()
+		nodes = []
+		stack = [] # nodes that still wait for a child, with the flags of the children they wait for
+		offset = 0
+		for i in range(n):
+			value = _decode_value(tags[i], payloads[offset:offset + lengths[i]])
+			offset += lengths[i]
+			node = AVLNode(keys[i], value, left=EXTERNAL_LEAF, right=EXTERNAL_LEAF)
+			node.height = heights[i]
+			nodes.append(node)
+			if stack:
+				waiting = stack[-1]
+				if waiting[1] & 1:
+					waiting[0].left = node
+					waiting[1] &= ~1
+				else:
+					waiting[0].right = node
+					waiting[1] = 0
+				node.parent = waiting[0]
+				if waiting[1] == 0:
+					stack.pop()
+			if flags[i]:
+				stack.append([node, flags[i]])
+		# in reverse pre-order every node comes after all of its descendants
+		for node in reversed(nodes):
+			node._size = 1 + node.left._size + node.right._size
+		if n > 0:
+			tree.root = nodes[0]
+			tree._size = n
+			tree.max = _find_max(tree.root)
+			tree.min = _find_min(tree.root)
+		return tree
+
 
 
 
 # independent helper functions
 
+# insert_many inserts a batch key by key while it is this many times smaller than the dictionary, and merges it
+# otherwise. the two paths cost about the same for batches 2 to 5 times smaller than trees of 200k to 1M keys
+_MERGE_BATCH_RATIO = 4
+
+# file format of dump and load
+_DUMP_MAGIC = b"AVLT"
+_DUMP_VERSION = 1
+_DUMP_HEADER = struct.Struct("<4sBQ")
+_VALUE_NONE, _VALUE_STR, _VALUE_BYTES, _VALUE_PICKLE = range(4)
+
+# returns a (tag, payload) pair representing value in a dump
+def _encode_value(value):
+	if value is None:
+		return _VALUE_NONE, b""
+	if isinstance(value, str):
+		return _VALUE_STR, value.encode("utf-8")
+	if isinstance(value, bytes):
+		return _VALUE_BYTES, value
+	return _VALUE_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+# inverse of _encode_value
+def _decode_value(tag, payload):
+	if tag == _VALUE_NONE:
+		return None
+	if tag == _VALUE_STR:
+		return str(payload, "utf-8")
+	if tag == _VALUE_BYTES:
+		return bytes(payload)
+	return pickle.loads(payload)
+
+# reads exactly size bytes from fileobj, raises ValueError if the file ends first
+def _read_exactly(fileobj, size):
+	data = fileobj.read(size)
+	if len(data) != size:
+		raise ValueError("truncated AVLTree dump")
+	return data
+
 # returns the maximum node in the tree iterating in the right extreme of the tree. used in split and predecessor
 def _find_max(node):
 	if node is None or not node.is_real_node():
@@ -439,6 +1634,16 @@ def _find_max(node):
 	while curr.right.is_real_node():
 		curr = curr.right
 	return curr
+
+# returns the minimum node in the tree iterating in the left extreme of the tree. used in iter_items and successor
+def _find_min(node):
+	if node is None or not node.is_real_node():
+		return None
+	curr = node
+	while curr.left.is_real_node():
+		curr = curr.left
+	return curr
+
 # stand-alone helper functions
 # calculates the balance factor of the node
 def _balance_factor(node):
@@ -452,42 +1657,235 @@ def _update_height(node):
 		return
 	node.height = 1 + max(node.left.height, node.right.height)
 
+# returns a dict from every key in the subtree of node to its node, in O(n). used in build_index and the set operations
+def _index_nodes(node):
+	index = {}
+	curr = _find_min(node)
+	while curr is not None:
+		index[curr.key] = curr
+		curr = _successor(curr)
+	return index
+
+# returns index with the nodes of tree added, updating the larger of the two dicts with the smaller. used in join
+def _merged_index(index, tree):
+	other = tree._index if tree._index is not None else _index_nodes(tree.root)
+	if len(other) > len(index):
+		index, other = other, index
+	index.update(other)
+	return index
+
+# divides the index of a split tree between its two parts: the keys of the smaller part are moved to a new dict
+# and the larger part keeps the old one, so the cost is O(k) for the k items of the smaller part. used in split
+def _split_index(index, node, smaller, larger):
+	del index[node.key]
+	small, large = (smaller, larger) if smaller._size <= larger._size else (larger, smaller)
+	small._index = _index_nodes(small.root)
+	for key in small._index:
+		del index[key]
+	large._index = index
+
+# calculates the aggregate of the node based on its children
+def _update_aggregate(node, monoid):
+	combine = monoid.combine
+	left = node.left.agg if node.left.key is not None else monoid.identity
+	right = node.right.agg if node.right.key is not None else monoid.identity
+	node.agg = combine(combine(left, monoid.measure(node.key, node.value)), right)
+
+# computes the aggregates of every node in the subtree of node, children before parents. used in set_monoid, join
+# and insert_many
+def _recompute_aggregates(node, monoid):
+	if node is None or not node.is_real_node():
+		return
+	stack = [node]
+	order = []
+	while stack:
+		curr = stack.pop()
+		order.append(curr)
+		if curr.left.is_real_node():
+			stack.append(curr.left)
+		if curr.right.is_real_node():
+			stack.append(curr.right)
+	# every node comes after its parent in order
+	for curr in reversed(order):
+		_update_aggregate(curr, monoid)
+
+# gives tree the monoid of the tree it is about to be merged into, recomputing its aggregates if the monoid differs.
+# used in union, the results of intersection and difference hold nodes of self only
+def _adopt_monoid(tree, monoid):
+	if tree.monoid is not monoid:
+		tree.monoid = monoid
+		if monoid is not None:
+			_recompute_aggregates(tree.root, monoid)
+
+# returns the aggregate of the keys in [lo, hi] in the subtree of root. finds the highest node in the range, then
+# walks down its left and right sides taking whole subtrees that are inside the range. used in aggregate
+def _aggregate(root, lo, hi, monoid):
+	combine = monoid.combine
+	measure = monoid.measure
+	identity = monoid.identity
+	node = root
+	while node is not None and node.is_real_node():
+		# the aggregates of the children below are read, so tags of range updates go down first
+		_push(node)
+		if lo is not None and node.key < lo:
+			node = node.right
+		elif hi is not None and node.key > hi:
+			node = node.left
+		else:
+			break
+	if node is None or not node.is_real_node():
+		return identity
+	# the keys >= lo in the left subtree, collected from the largest down
+	left = identity
+	curr = node.left
+	while curr.is_real_node():
+		_push(curr)
+		if lo is None or curr.key >= lo:
+			right_agg = curr.right.agg if curr.right.is_real_node() else identity
+			left = combine(measure(curr.key, curr.value), combine(right_agg, left))
+			curr = curr.left
+		else:
+			curr = curr.right
+	# the keys <= hi in the right subtree, collected from the smallest up
+	right = identity
+	curr = node.right
+	while curr.is_real_node():
+		_push(curr)
+		if hi is None or curr.key <= hi:
+			left_agg = curr.left.agg if curr.left.is_real_node() else identity
+			right = combine(right, combine(left_agg, measure(curr.key, curr.value)))
+			curr = curr.right
+		else:
+			curr = curr.left
+	return combine(combine(left, measure(node.key, node.value)), right)
+
+# applies a range update to node and keeps it as a tag for the children of node. a tag of another update
+# that is already there is pushed first. used in update_range and _push
+def _apply_tag(node, update, tag):
+	node.value = update.apply(node.value, tag)
+	if node.agg is not None and update.apply_aggregate is not None:
+		node.agg = update.apply_aggregate(node.agg, tag, node._size)
+	if node.height == 0:
+		return
+	if node.lazy is not None:
+		if node.lazy[0] is update:
+			node.lazy = (update, update.compose(node.lazy[1], tag))
+			return
+		_push(node)
+	node.lazy = (update, tag)
+
+# applies the tag of node to its children
+def _push(node):
+	if node.lazy is None:
+		return
+	update, tag = node.lazy
+	node.lazy = None
+	if node.left.key is not None:
+		_apply_tag(node.left, update, tag)
+	if node.right.key is not None:
+		_apply_tag(node.right, update, tag)
+
+# pushes the tags on the search path of key in the subtree of node, so that every node on it holds its
+# current value and can be relinked. used before descents that change the tree or return a node
+def _push_path(node, key):
+	while node is not None and node.key is not None:
+		_push(node)
+		if node.key == key:
+			return
+		node = node.left if key < node.key else node.right
+
+# pushes the tags of all the ancestors of node and of node itself, from the root down. used for a node
+# reached without a descent from the root, e.g. through the key index or a finger
+def _settle(node):
+	path = []
+	while node is not None:
+		path.append(node)
+		node = node.parent
+	for curr in reversed(path):
+		_push(curr)
+
+# pushes the tags of every node in the subtree of node whose key is in [lo, hi] and of their ancestors, in
+# O(log n + k) for k keys in the range. None bounds are open. used in dump, set_monoid and insert_many
+def _push_range(node, lo, hi):
+	stack = [node] if node is not None and node.key is not None else []
+	while stack:
+		curr = stack.pop()
+		_push(curr)
+		if (lo is None or curr.key > lo) and curr.left.key is not None:
+			stack.append(curr.left)
+		if (hi is None or curr.key < hi) and curr.right.key is not None:
+			stack.append(curr.right)
+
+# turns a node taken out of a tree back into a single leaf. used in _join_node
+def _reset_leaf(node):
+	node.parent = None
+	node.left = EXTERNAL_LEAF
+	node.right = EXTERNAL_LEAF
+	node.height = 0
+	node._size = 1
+
+# calculates the subtree size of the node based on its children
+def _update_size(node):
+	if not node or not node.is_real_node():
+		return
+	node._size = 1 + node.left._size + node.right._size
+
 
 #cheks what rotation is needed (should handle all cases possible) and calls the appropriate function finally returns the new root of the subtree
-def _rebalance(node):
+# the rotation is counted in stats if it is not None, and aggregates are updated if monoid is not None
+def _rebalance(node, stats=None, monoid=None):
 	bf = _balance_factor(node)
 	if bf > 1: # left heavy
 		if _balance_factor(node.left) >=0: # left left heavy
-			return _rotate_right(node)
+			if stats is not None:
+				stats.single_rotations += 1
+			return _rotate_right(node, monoid)
 		else: # left right heavy
-			_rotate_left(node.left)
-			return _rotate_right(node)
+			if stats is not None:
+				stats.double_rotations += 1
+			_rotate_left(node.left, monoid)
+			return _rotate_right(node, monoid)
 	elif bf < -1:# right heavy
 		if _balance_factor(node.right) <= 0: # right right heavy
-			return _rotate_left(node)
+			if stats is not None:
+				stats.single_rotations += 1
+			return _rotate_left(node, monoid)
 		else: # right left heavy
-			_rotate_right(node.right)
-			return _rotate_left(node)
+			if stats is not None:
+				stats.double_rotations += 1
+			_rotate_right(node.right, monoid)
+			return _rotate_left(node, monoid)
 	return node
 
 # rotates and returns the new root of the subtree, must ensure all is connected properly
-def _rotate_left(z):
+def _rotate_left(z, monoid=None):
 	#     z                              y
 	#    /  \                           / \
 	#   T1   y         Left Rotate     z   X
 	#       / \       ============>   / \
 	#      T2  X                    T1  T2
 	y = z.right
+	# the children of z and y change, so their tags go down first
+	if z.lazy is not None:
+		_push(z)
+	if y.lazy is not None:
+		_push(y)
 	parent = z.parent
 
 	t2 = y.left
 	z.right = t2
 	t2.parent = z
 	_update_height(z)
+	_update_size(z)
+	if monoid is not None:
+		_update_aggregate(z, monoid)
 
 	y.left = z
 	z.parent = y
 	_update_height(y)
+	_update_size(y)
+	if monoid is not None:
+		_update_aggregate(y, monoid)
 
 	y.parent = parent
 
@@ -501,23 +1899,34 @@ def _rotate_left(z):
 	return y
 
 # rotates and returns the new root of the subtree, must ensure all is connected properly
-def _rotate_right(z):
+def _rotate_right(z, monoid=None):
 	#       z                             y
 	#      / \                           / \
 	#     y   T3        Right Rotate    X   z
 	#    / \           ============>       / \
 	#   X   T2                           T2   T3
 	y = z.left
+	# the children of z and y change, so their tags go down first
+	if z.lazy is not None:
+		_push(z)
+	if y.lazy is not None:
+		_push(y)
 	parent = z.parent
 
 	t2 = y.right
 	z.left = t2
 	t2.parent = z
 	_update_height(z)
+	_update_size(z)
+	if monoid is not None:
+		_update_aggregate(z, monoid)
 
 	y.right = z
 	z.parent = y
 	_update_height(y)
+	_update_size(y)
+	if monoid is not None:
+		_update_aggregate(y, monoid)
 
 	y.parent = parent
 
@@ -551,6 +1960,136 @@ def _search_from(node, key):
 		edges += 1
 	return None, edges, parent
 
+# wraps a subtree of a tree that is being taken apart as an AVLTree of its own, with the monoid and lazy tags of that tree.
+# max and min are left unset, _finish_bulk sets them once on the final result. used in the set operations
+def _subtree(node, parent_tree):
+	tree = AVLTree(monoid=parent_tree.monoid)
+	tree._lazy_tags = parent_tree._lazy_tags
+	if node.is_real_node():
+		node.parent = None
+		tree.root = node
+		tree._size = node._size
+	return tree
+
+# sets max and min of a tree built from parts by the set operations and returns it
+def _finish_bulk(tree):
+	tree.max = _find_max(tree.root)
+	tree.min = _find_min(tree.root)
+	return tree
+
+# joins two trees where all keys of left are smaller than all keys of right, without a separating item.
+# the minimum of right is taken out and used as the separator. used in intersection and difference
+def _join_trees(left, right):
+	if left.root is None:
+		return right
+	if right.root is None:
+		return left
+	separator = _find_min(right.root)
+	right.max = _find_max(right.root)
+	right.min = separator
+	right.delete(separator)
+	left._join_node(right, separator)
+	return left
+
+# join-based union: splits tree2 around the root of tree1, merges the halves recursively and joins them back
+def _union(tree1, tree2):
+	if tree1.root is None:
+		return tree2
+	if tree2.root is None:
+		return tree1
+	root = tree1.root
+	_push(root)
+	smaller2, _, larger2 = tree2._split_by_key(root.key)
+	smaller = _union(_subtree(root.left, tree1), smaller2)
+	larger = _union(_subtree(root.right, tree1), larger2)
+	smaller._join_node(larger, root)
+	return smaller
+
+# join-based intersection, the root of tree1 is kept only if its key is found when splitting tree2
+def _intersection(tree1, tree2):
+	if tree1.root is None or tree2.root is None:
+		return AVLTree(monoid=tree1.monoid)
+	root = tree1.root
+	_push(root)
+	smaller2, found, larger2 = tree2._split_by_key(root.key)
+	smaller = _intersection(_subtree(root.left, tree1), smaller2)
+	larger = _intersection(_subtree(root.right, tree1), larger2)
+	if found is None:
+		return _join_trees(smaller, larger)
+	smaller._join_node(larger, root)
+	return smaller
+
+# join-based difference: splits tree1 around the root of tree2, whose key is dropped
+def _difference(tree1, tree2):
+	if tree1.root is None or tree2.root is None:
+		return tree1
+	root = tree2.root
+	_push(root)
+	smaller1, _, larger1 = tree1._split_by_key(root.key)
+	smaller = _difference(smaller1, _subtree(root.left, tree2))
+	larger = _difference(larger1, _subtree(root.right, tree2))
+	return _join_trees(smaller, larger)
+
+# builds a perfectly balanced subtree from items[lo..hi] (sorted (key, value) pairs) and returns its root. used in from_sorted
+def _build_balanced(items, lo, hi, parent):
+	if lo > hi:
+		return EXTERNAL_LEAF
+	mid = (lo + hi) // 2
+	key, val = items[mid]
+	node = AVLNode(key, val, parent=parent)
+	node.left = _build_balanced(items, lo, mid - 1, node)
+	node.right = _build_balanced(items, mid + 1, hi, node)
+	node.height = 1 + max(node.left.height, node.right.height)
+	node._size = hi - lo + 1
+	return node
+
+# links nodes[lo..hi] (sorted by key) into a perfectly balanced subtree and returns its root, like _build_balanced
+# but with nodes that already exist. used in insert_many
+def _link_balanced(nodes, lo, hi, parent):
+	if lo > hi:
+		return EXTERNAL_LEAF
+	mid = (lo + hi) // 2
+	node = nodes[mid]
+	node.parent = parent
+	node.left = _link_balanced(nodes, lo, mid - 1, node)
+	node.right = _link_balanced(nodes, mid + 1, hi, node)
+	node.height = 1 + max(node.left.height, node.right.height)
+	node._size = hi - lo + 1
+	return node
+
+# climbs from finger to the lowest ancestor whose subtree may hold key and returns it with the number of edges climbed.
+# a left-child edge bounds the subtree from above and a right-child edge from below. used in _finger_track_up
+def _climb_from(finger, key):
+	if key == finger.key:
+		return finger, 0
+	going_right = key > finger.key
+	start = curr = finger
+	edges = 0
+	while curr.parent is not None:
+		parent = curr.parent
+		if (curr is parent.left) == going_right:
+			# parent bounds the subtree of curr on the side of key
+			if parent.key == key:
+				return parent, edges + 1
+			if (parent.key > key) == going_right:
+				break
+			start = parent
+		curr = parent
+		edges += 1
+	return start, edges
+
+# returns the number of keys in the subtree of node that are smaller than key (or equal, if inclusive). used in range_count
+def _count_less(node, key, inclusive):
+	count = 0
+	curr = node
+	while curr is not None and curr.is_real_node():
+		if curr.key < key or (inclusive and curr.key == key):
+			count += curr.left._size + 1
+			curr = curr.right
+		else:
+			curr = curr.left
+	return count
+
 # returns the predecessor of the node
 def _predecessor(node):
 	if not node or not node.is_real_node():
@@ -566,4 +2105,71 @@ def _predecessor(node):
 	while parent and parent.left == curr:
 		curr = parent
 		parent = parent.parent
-	return parent
\ No newline at end of file
+	return parent
+
+# returns the successor of the node
+def _successor(node):
+	if not node or not node.is_real_node():
+		return None
+
+	# Case 1: Node has a right subtree
+	if node.right.is_real_node():
+		return _find_min(node.right)
+
+	# Case 2: No right subtree - go up to the first parent for which node is in the left subtree
+	curr = node
+	parent = curr.parent
+	while parent and parent.right == curr:
+		curr = parent
+		parent = parent.parent
+	return parent
+
+# returns the node with the smallest key in the subtree of node, pushing the tags of the nodes on the way down to it.
+# None if the subtree is empty. used in iter_items
+def _settled_min(node):
+	if node is None or node.key is None:
+		return None
+	_push(node)
+	while node.left.key is not None:
+		node = node.left
+		_push(node)
+	return node
+
+# returns the node with the largest key in the subtree of node, pushing the tags of the nodes on the way down to it.
+# None if the subtree is empty. used in iter_items
+def _settled_max(node):
+	if node is None or node.key is None:
+		return None
+	_push(node)
+	while node.right.key is not None:
+		node = node.right
+		_push(node)
+	return node
+
+# returns the node with the smallest key >= key in the subtree of node, None if there is none. used in iter_items
+def _ceiling(node, key):
+	result = None
+	curr = node
+	while curr is not None and curr.is_real_node():
+		if curr.key == key:
+			return curr
+		if curr.key > key:
+			result = curr
+			curr = curr.left
+		else:
+			curr = curr.right
+	return result
+
+# returns the node with the largest key <= key in the subtree of node, None if there is none. used in iter_items
+def _floor(node, key):
+	result = None
+	curr = node
+	while curr is not None and curr.is_real_node():
+		if curr.key == key:
+			return curr
+		if curr.key < key:
+			result = curr
+			curr = curr.right
+		else:
+			curr = curr.left
+	return result
@@ -0,0 +1,629 @@
+"""An AVL tree stored as parallel arrays, nodes are integer handles into an AVLArena"""
+
+from array import array
+
+# handle of the external leaf shared by all trees of an arena, also used as "no node" for parent links
+NIL = 0
+
+
+class AVLArena(object):
+	"""Storage for the nodes of one or more ArrayAVLTree objects.
+
+	keys and values are kept in lists, the structure (children, parent, height and subtree size)
+	in typed arrays, so a tree of n nodes is a handful of flat buffers instead of n Python objects.
+	Handle 0 is the external leaf: height -1, size 0. Freed handles are reused by new_node.
+	"""
+	def __init__(self):
+		self.keys = [None]
+		self.values = [None]
+		self.left = array("q", [NIL])
+		self.right = array("q", [NIL])
+		self.parent = array("q", [NIL])
+		self.height = array("q", [-1])
+		self.size = array("q", [0])
+		self.free = []
+
+	"""allocates a node and returns its handle
+
+	@rtype: int
+	@returns: the handle of the new node, its height and size are computed from left and right
+	"""
+	def new_node(self, key, value, left=NIL, right=NIL, parent=NIL):
+		height = 1 + max(self.height[left], self.height[right])
+		size = 1 + self.size[left] + self.size[right]
+		if self.free:
+			i = self.free.pop()
+			self.keys[i] = key
+			self.values[i] = value
+			self.left[i] = left
+			self.right[i] = right
+			self.parent[i] = parent
+			self.height[i] = height
+			self.size[i] = size
+			return i
+		self.keys.append(key)
+		self.values.append(value)
+		self.left.append(left)
+		self.right.append(right)
+		self.parent.append(parent)
+		self.height.append(height)
+		self.size.append(size)
+		return len(self.keys) - 1
+
+	"""releases a node, its handle may be returned by a later new_node
+
+	@type i: int
+	@pre: i is a real node that is no longer linked from any tree
+	"""
+	def free_node(self, i):
+		self.keys[i] = None
+		self.values[i] = None
+		self.free.append(i)
+
+	"""returns an independent copy of the arena, the handles stay the same
+
+	@rtype: AVLArena
+	"""
+	def copy(self):
+		other = AVLArena.__new__(AVLArena)
+		other.keys = self.keys[:]
+		other.values = self.values[:]
+		other.left = self.left[:]
+		other.right = self.right[:]
+		other.parent = self.parent[:]
+		other.height = self.height[:]
+		other.size = self.size[:]
+		other.free = self.free[:]
+		return other
+
+
+"""
+A class implementing an AVL tree on top of an AVLArena.
+It exposes the same operations as AVLTree, with integer handles in place of AVLNode objects.
+"""
+class ArrayAVLTree(object):
+
+	"""
+	Constructor.
+
+	@type arena: AVLArena
+	@param arena: the storage to allocate nodes in, a new one if None. trees that are joined together
+	should share an arena, split returns trees in the arena of self.
+	"""
+	def __init__(self, arena=None):
+		self.arena = arena if arena is not None else AVLArena()
+		self.root = NIL
+		self._size = 0
+		self.max = NIL # handle of maximum node
+
+	"""returns the key of a node
+
+	@type node: int
+	@rtype: int
+	"""
+	def key(self, node):
+		return self.arena.keys[node]
+
+	"""returns the value of a node
+
+	@type node: int
+	@rtype: any
+	"""
+	def value(self, node):
+		return self.arena.values[node]
+
+	"""searches for a node in the dictionary corresponding to the key (starting at the root)
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (int,int)
+	@returns: a tuple (x,e) where x is the handle of the node corresponding to key (or None if not found),
+	and e is the number of edges on the path between the starting node and ending node+1.
+	"""
+	def search(self, key):
+		x, e, _ = _search_from(self.arena, self.root, key)
+		return (x if x != NIL else None), e
+
+	"""searches for a node in the dictionary corresponding to the key, starting at the max
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (int,int)
+	@returns: a tuple (x,e) where x is the handle of the node corresponding to key (or None if not found),
+	and e is the number of edges on the path between the starting node- the maximum of tree and ending node+1.
+	"""
+	def finger_search(self, key):
+		if self.max == NIL:
+			return None, 0
+		ancestor, edges_up = self._finger_track_up(key)
+		node, edges_down, _ = _search_from(self.arena, ancestor, key)
+		return (node if node != NIL else None), edges_down + edges_up
+
+	# helper that finds first common ancestor of max and key. used in finger_search and finger_insert
+	def _finger_track_up(self, key):
+		keys = self.arena.keys
+		parent = self.arena.parent
+		curr = self.max
+		edges = 0
+		while parent[curr] != NIL and keys[parent[curr]] >= key:
+			curr = parent[curr]
+			edges += 1
+		return curr, edges
+
+	"""inserts a new node into the dictionary with corresponding key and value (starting at the root)
+
+	@type key: int
+	@pre: key currently does not appear in the dictionary
+	@param key: key of item that is to be inserted to self
+	@type val: string
+	@param val: the value of the item
+	@rtype: (int,int,int)
+	@returns: a 3-tuple (x,e,h) where x is the handle of the new node,
+	e is the number of edges on the path between the starting node and new node before rebalancing,
+	and h is the number of PROMOTE cases during the AVL rebalancing
+	"""
+	def insert(self, key, val):
+		_, edges, parent = _search_from(self.arena, self.root, key)
+		new_node, promotes = self._insert_to_parent(parent, key, val)
+		return new_node, edges, promotes
+
+	"""inserts a new node into the dictionary with corresponding key and value, starting at the max
+
+	@type key: int
+	@pre: key currently does not appear in the dictionary
+	@param key: key of item that is to be inserted to self
+	@type val: string
+	@param val: the value of the item
+	@rtype: (int,int,int)
+	@returns: a 3-tuple (x,e,h) as in insert
+	"""
+	def finger_insert(self, key, val):
+		if self.max == NIL:
+			new_node, promotes = self._insert_to_parent(NIL, key, val)
+			return new_node, 0, promotes
+		ancestor, edges_up = self._finger_track_up(key)
+		_, edges_down, parent = _search_from(self.arena, ancestor, key)
+		new_node, promotes = self._insert_to_parent(parent, key, val)
+		return new_node, edges_down + edges_up, promotes
+
+	# helper function to insert a new node under parent and rebalance. used in insert and finger_insert
+	def _insert_to_parent(self, parent, key, val):
+		a = self.arena
+		if parent == NIL:
+			self.root = a.new_node(key, val)
+			self._size += 1
+			self.max = self.root
+			return self.root, 0
+		new_node = a.new_node(key, val, parent=parent)
+		if key > a.keys[parent]:
+			a.right[parent] = new_node
+		else:
+			a.left[parent] = new_node
+		self._size += 1
+		if self.max != NIL and key > a.keys[self.max]:
+			self.max = new_node
+		# every ancestor gains one node in its subtree, rotations below recompute sizes from children
+		size = a.size
+		curr = parent
+		while curr != NIL:
+			size[curr] += 1
+			curr = a.parent[curr]
+
+		# case A: parent is not a leaf - valid AVL tree
+		if a.height[parent] == 1:
+			return new_node, 0
+		# case B: parent is a leaf
+		promotes = 0
+		height = a.height
+		curr = new_node
+		while a.parent[curr] != NIL and height[curr] >= height[a.parent[curr]]:
+			p = a.parent[curr]
+			bf = height[a.left[p]] - height[a.right[p]]
+			if bf == 1 or bf == -1: # case 1 - only promote
+				_update_node(a, p)
+				promotes += 1
+				curr = p
+			else:
+				_rebalance(a, p)
+				break # we break since we know in this case we finish
+
+		if a.parent[self.root] != NIL:
+			self.root = a.parent[self.root]
+		return new_node, promotes
+
+	"""deletes node from the dictionary
+
+	@type node: int
+	@pre: node is the handle of a real node in self. like AVLTree.delete, a node with two children
+	takes the key and value of its predecessor, whose handle is then freed
+	"""
+	def delete(self, node):
+		a = self.arena
+		left = a.left
+		right = a.right
+		parent = a.parent
+		# Case 1: Node has two children, we swap values with the predecessor and delete the predecessor
+		if left[node] != NIL and right[node] != NIL:
+			pred = _find_max(a, left[node])
+			a.keys[node], a.keys[pred] = a.keys[pred], a.keys[node]
+			a.values[node], a.values[pred] = a.values[pred], a.values[node]
+			node = pred
+
+		p = parent[node]
+		if left[node] == NIL and right[node] == NIL:
+			if p == NIL: # node is root and also leaf
+				a.free_node(node)
+				self.root = NIL
+				self._size = 0
+				self.max = NIL
+				return
+			if left[p] == node:
+				left[p] = NIL
+			else:
+				right[p] = NIL
+		else: # node has exactly one child
+			child = left[node] if left[node] != NIL else right[node]
+			parent[child] = p
+			if p != NIL:
+				if left[p] == node:
+					left[p] = child
+				else:
+					right[p] = child
+			else: # we deleted the root
+				self.root = child
+
+		# now we start rebalancing from parent to root
+		height = a.height
+		curr = p
+		while curr != NIL:
+			_update_node(a, curr)
+			bf = height[left[curr]] - height[right[curr]]
+			if bf > 1 or bf < -1:
+				curr = _rebalance(a, curr)
+			curr = parent[curr]
+
+		while parent[self.root] != NIL:
+			self.root = parent[self.root]
+		self._size -= 1
+		if self.max == node:
+			self.max = _find_max(a, self.root)
+		a.free_node(node)
+
+	"""joins self with item and another ArrayAVLTree
+
+	@type tree2: ArrayAVLTree
+	@param tree2: a dictionary to be joined with self. if it lives in another arena its nodes are
+	copied into the arena of self first, in O(size of tree2)
+	@type key: int
+	@param key: the key separting self and tree2
+	@type val: string
+	@param val: the value corresponding to key
+	@pre: all keys in self are smaller than key and all keys in tree2 are larger than key,
+	or the opposite way
+	"""
+	def join(self, tree2, key, val):
+		if tree2.arena is not self.arena:
+			tree2 = tree2._copy_into(self.arena)
+		if tree2.root == NIL:
+			self.insert(key, val)
+			return
+		if self.root == NIL:
+			self.root = tree2.root
+			self.max = tree2.max
+			self._size = tree2._size
+			self.insert(key, val)
+			return
+
+		a = self.arena
+		right_tree = self if a.keys[self.root] > key else tree2
+		left_tree = self if a.keys[self.root] < key else tree2
+		left_height = a.height[left_tree.root]
+		right_height = a.height[right_tree.root]
+
+		if left_height > right_height + 1:
+			return self._join_with_bigger_subtree(left_tree, right_tree, key, val, True)
+		if right_height > left_height + 1:
+			return self._join_with_bigger_subtree(right_tree, left_tree, key, val, False)
+
+		# if trees differ by at most 1 in height
+		new_root = a.new_node(key, val, left=left_tree.root, right=right_tree.root)
+		a.parent[left_tree.root] = new_root
+		a.parent[right_tree.root] = new_root
+		self.root = new_root
+		self._size = a.size[new_root]
+		self.max = right_tree.max
+
+	# helper method to join trees when one is higher than the other by more than 1
+	def _join_with_bigger_subtree(self, bigger_tree, smaller_tree, key, val, is_left_bigger):
+		a = self.arena
+		height = a.height
+		parent = a.parent
+		smaller_height = height[smaller_tree.root]
+		# go down in bigger until we find a node with height of smaller.root.height
+		curr = bigger_tree.root
+		external_stop_flag = False
+		while height[curr] > smaller_height:
+			nxt = a.right[curr] if is_left_bigger else a.left[curr]
+			if nxt == NIL:
+				external_stop_flag = True
+				break
+			curr = nxt
+
+		# connect and cut what's needed
+		if is_left_bigger:
+			if external_stop_flag:
+				x_node = a.new_node(key, val, parent=curr, left=NIL, right=smaller_tree.root)
+				a.right[curr] = x_node
+			else:
+				x_node = a.new_node(key, val, parent=parent[curr], left=curr, right=smaller_tree.root)
+				a.right[parent[curr]] = x_node
+				parent[curr] = x_node
+		else:
+			if external_stop_flag:
+				x_node = a.new_node(key, val, parent=curr, left=smaller_tree.root, right=NIL)
+				a.left[curr] = x_node
+			else:
+				x_node = a.new_node(key, val, parent=parent[curr], left=smaller_tree.root, right=curr)
+				a.left[parent[curr]] = x_node
+				parent[curr] = x_node
+		parent[smaller_tree.root] = x_node
+
+		# rebalance from x_node to root
+		curr = x_node
+		while parent[curr] != NIL and height[curr] >= height[parent[curr]]:
+			p = parent[curr]
+			bf = height[a.left[p]] - height[a.right[p]]
+			if bf == 1 or bf == -1: # case 1 - only promote
+				_update_node(a, p)
+				curr = p
+			else: # case 2 - rotate
+				curr = _rebalance(a, p)
+		# heights are settled, but every ancestor of x_node still gained the nodes of the smaller tree
+		while parent[curr] != NIL:
+			curr = parent[curr]
+			_update_node(a, curr)
+
+		self.max = smaller_tree.max if is_left_bigger else bigger_tree.max
+		self.root = curr
+		self._size = a.size[curr]
+
+	"""splits the dictionary at a given node
+
+	@type node: int
+	@pre: node is the handle of a node in self
+	@param node: the node in the dictionary to be used for the split, its handle is freed
+	@rtype: (ArrayAVLTree, ArrayAVLTree)
+	@returns: a tuple (left, right), where left is an ArrayAVLTree representing the keys in the
+	dictionary smaller than the key of node, and right is an ArrayAVLTree representing the keys in the
+	dictionary larger than it. both share the arena of self.
+	"""
+	def split(self, node):
+		a = self.arena
+		smaller_than_node = ArrayAVLTree(a)
+		larger_than_node = ArrayAVLTree(a)
+		if node is None or node == NIL:
+			return smaller_than_node, larger_than_node
+		if a.left[node] != NIL:
+			smaller_than_node.root = a.left[node]
+			a.parent[a.left[node]] = NIL
+		if a.right[node] != NIL:
+			larger_than_node.root = a.right[node]
+			a.parent[a.right[node]] = NIL
+
+		curr_parent = a.parent[node]
+		is_right_child = curr_parent != NIL and a.right[curr_parent] == node
+		a.free_node(node)
+		# Traverse upwards, joining the subtree hanging off the other side of every ancestor
+		while curr_parent != NIL:
+			next_parent = a.parent[curr_parent]
+			next_is_right_child = next_parent != NIL and a.right[next_parent] == curr_parent
+			temp_tree = ArrayAVLTree(a)
+			if is_right_child:
+				if a.left[curr_parent] != NIL:
+					temp_tree.root = a.left[curr_parent]
+					a.parent[temp_tree.root] = NIL
+				smaller_than_node.join(temp_tree, a.keys[curr_parent], a.values[curr_parent])
+			else:
+				if a.right[curr_parent] != NIL:
+					temp_tree.root = a.right[curr_parent]
+					a.parent[temp_tree.root] = NIL
+				larger_than_node.join(temp_tree, a.keys[curr_parent], a.values[curr_parent])
+			# the ancestor was re-created by join, so its old handle is released
+			a.free_node(curr_parent)
+			curr_parent = next_parent
+			is_right_child = next_is_right_child
+
+		for tree in (smaller_than_node, larger_than_node):
+			tree.max = _find_max(a, tree.root)
+			tree._size = a.size[tree.root]
+		return smaller_than_node, larger_than_node
+
+	"""returns an s array representing dictionary
+
+	@rtype: list
+	@returns: a sorted list according to key of touples (key, value) representing the data structure
+	"""
+	def avl_to_array(self):
+		a = self.arena
+		result = []
+		node = _find_min(a, self.root)
+		while node != NIL:
+			result.append((a.keys[node], a.values[node]))
+			node = _successor(a, node)
+		return result
+
+	"""returns an independent copy of the dictionary, copying the flat arrays of its arena
+
+	@rtype: ArrayAVLTree
+	"""
+	def copy(self):
+		other = ArrayAVLTree(self.arena.copy())
+		other.root = self.root
+		other._size = self._size
+		other.max = self.max
+		return other
+
+	# returns a tree with the same content as self, allocated in arena. used in join
+	def _copy_into(self, arena):
+		other = ArrayAVLTree(arena)
+		other.root = _copy_subtree(self.arena, self.root, arena)
+		other._size = self._size
+		other.max = _find_max(arena, other.root)
+		return other
+
+	"""returns the node with the maximal key in the dictionary
+
+	@rtype: int
+	@returns: the handle of the maximal node, None if the dictionary is empty
+	"""
+	def max_node(self):
+		return self.max if self.max != NIL else None
+
+	"""returns the number of items in dictionary
+
+	@rtype: int
+	@returns: the number of items in dictionary
+	"""
+	def size(self):
+		return self._size
+
+	"""returns the root of the tree representing the dictionary
+
+	@rtype: int
+	@returns: the handle of the root, None if the dictionary is empty
+	"""
+	def get_root(self):
+		return self.root if self.root != NIL else None
+
+
+# independent helper functions, all take the arena holding the nodes as first argument
+
+# recomputes height and subtree size of node from its children
+def _update_node(a, node):
+	if node == NIL:
+		return
+	left = a.left[node]
+	right = a.right[node]
+	a.height[node] = 1 + max(a.height[left], a.height[right])
+	a.size[node] = 1 + a.size[left] + a.size[right]
+
+# returns a 3-tuple (node,edges,parent) as AVLTree._search_from does, with NIL in place of None
+def _search_from(a, node, key):
+	if node == NIL:
+		return NIL, 0, NIL
+	keys = a.keys
+	curr = node
+	edges = 0
+	parent = node
+	while curr != NIL:
+		curr_key = keys[curr]
+		if curr_key == key:
+			return curr, edges + 1, a.parent[curr]
+		parent = curr
+		curr = a.right[curr] if curr_key < key else a.left[curr]
+		edges += 1
+	return NIL, edges, parent
+
+# returns the maximum node in the subtree of node, NIL if it is empty
+def _find_max(a, node):
+	if node == NIL:
+		return NIL
+	while a.right[node] != NIL:
+		node = a.right[node]
+	return node
+
+# returns the minimum node in the subtree of node, NIL if it is empty
+def _find_min(a, node):
+	if node == NIL:
+		return NIL
+	while a.left[node] != NIL:
+		node = a.left[node]
+	return node
+
+# returns the successor of node, NIL if node is the maximum
+def _successor(a, node):
+	if a.right[node] != NIL:
+		return _find_min(a, a.right[node])
+	parent = a.parent[node]
+	while parent != NIL and a.right[parent] == node:
+		node = parent
+		parent = a.parent[parent]
+	return parent
+
+# cheks what rotation is needed and calls it, returns the new root of the subtree
+def _rebalance(a, node):
+	height = a.height
+	bf = height[a.left[node]] - height[a.right[node]]
+	if bf > 1: # left heavy
+		child = a.left[node]
+		if height[a.left[child]] - height[a.right[child]] < 0: # left right heavy
+			_rotate_left(a, child)
+		return _rotate_right(a, node)
+	elif bf < -1: # right heavy
+		child = a.right[node]
+		if height[a.left[child]] - height[a.right[child]] > 0: # right left heavy
+			_rotate_right(a, child)
+		return _rotate_left(a, node)
+	return node
+
+# rotates left around z and returns the new root of the subtree
+def _rotate_left(a, z):
+	y = a.right[z]
+	parent = a.parent[z]
+	t2 = a.left[y]
+	a.right[z] = t2
+	if t2 != NIL:
+		a.parent[t2] = z
+	_update_node(a, z)
+	a.left[y] = z
+	a.parent[z] = y
+	_update_node(a, y)
+	a.parent[y] = parent
+	if parent != NIL:
+		if a.left[parent] == z:
+			a.left[parent] = y
+		else:
+			a.right[parent] = y
+	return y
+
+# rotates right around z and returns the new root of the subtree
+def _rotate_right(a, z):
+	y = a.left[z]
+	parent = a.parent[z]
+	t2 = a.right[y]
+	a.left[z] = t2
+	if t2 != NIL:
+		a.parent[t2] = z
+	_update_node(a, z)
+	a.right[y] = z
+	a.parent[z] = y
+	_update_node(a, y)
+	a.parent[y] = parent
+	if parent != NIL:
+		if a.left[parent] == z:
+			a.left[parent] = y
+		else:
+			a.right[parent] = y
+	return y
+
+# copies the subtree of node from arena src into arena dst and returns the handle of its root there
+def _copy_subtree(src, node, dst):
+	if node == NIL:
+		return NIL
+	copy = dst.new_node(src.keys[node], src.values[node])
+	stack = [(node, copy)]
+	while stack:
+		old, new = stack.pop()
+		dst.height[new] = src.height[old]
+		dst.size[new] = src.size[old]
+		for side in (src.left, src.right):
+			child = side[old]
+			if child == NIL:
+				continue
+			new_child = dst.new_node(src.keys[child], src.values[child], parent=new)
+			if side is src.left:
+				dst.left[new] = new_child
+			else:
+				dst.right[new] = new_child
+			stack.append((child, new_child))
+	return copy
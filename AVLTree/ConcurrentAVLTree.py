@@ -0,0 +1,294 @@
+"""A thread-safe wrapper around AVLTree"""
+
+import threading
+from contextlib import contextmanager
+
+from AVLTree import ADD, AVLTree, _search_from
+
+
+class ReadWriteLock(object):
+	"""A readers-writer lock: any number of readers, or a single writer.
+	A waiting writer blocks new readers, so a steady stream of lookups cannot starve writes.
+	"""
+	def __init__(self):
+		self._cond = threading.Condition(threading.Lock())
+		self._readers = 0
+		self._writer = False
+		self._waiting_writers = 0
+
+	def acquire_read(self):
+		with self._cond:
+			while self._writer or self._waiting_writers > 0:
+				self._cond.wait()
+			self._readers += 1
+
+	def release_read(self):
+		with self._cond:
+			self._readers -= 1
+			if self._readers == 0:
+				self._cond.notify_all()
+
+	def acquire_write(self):
+		with self._cond:
+			self._waiting_writers += 1
+			while self._writer or self._readers > 0:
+				self._cond.wait()
+			self._waiting_writers -= 1
+			self._writer = True
+
+	def release_write(self):
+		with self._cond:
+			self._writer = False
+			self._cond.notify_all()
+
+	@contextmanager
+	def read_locked(self):
+		self.acquire_read()
+		try:
+			yield
+		finally:
+			self.release_read()
+
+	@contextmanager
+	def write_locked(self):
+		self.acquire_write()
+		try:
+			yield
+		finally:
+			self.release_write()
+
+
+"""
+A class wrapping an AVLTree for use from several threads.
+Reads run concurrently under the read side of a ReadWriteLock, writes run one at a time.
+The version counter is odd while a write is in progress and is bumped again when it ends,
+so point lookups first run without any lock and fall back to the read lock only if a
+writer was active or finished meanwhile. The lookups without a lock never change the tree,
+so they do not push the tags of range updates and give up if the tree holds any.
+"""
+class ConcurrentAVLTree(object):
+
+	"""
+	Constructor.
+
+	@type tree: AVLTree
+	@param tree: the tree to wrap, a new one if None. it must not be used directly afterwards. it must not
+	track the last access (that makes finger reads modify the tree) or collect stats (concurrent reads would
+	update the counters without a lock)
+	@type lazy_updates: bool
+	@param lazy_updates: allows update_range. reads push its tags down and so modify the tree, which makes
+	every read take the write lock. set on its own if tree holds tags of range updates, now or after a batch
+	"""
+	def __init__(self, tree=None, lazy_updates=False):
+		tree = tree if tree is not None else AVLTree()
+		if tree.track_last_access:
+			raise ValueError("a ConcurrentAVLTree cannot wrap a tree that tracks the last access")
+		if tree.stats is not None:
+			raise ValueError("a ConcurrentAVLTree cannot wrap a tree that collects stats")
+		self._tree = tree
+		self._lazy_updates = lazy_updates or tree._lazy_tags
+		self._lock = ReadWriteLock()
+		self._version = 0
+
+	"""returns the version counter, it changes whenever a write starts or ends
+
+	@rtype: int
+	@returns: an even number if no write is in progress
+	"""
+	def version(self):
+		return self._version
+
+	# runs peek(tree), a read that never pushes tags, without a lock. if a write overlapped it or the tree holds
+	# tags of range updates, runs read(tree) under the lock of _read_locked instead
+	def _read(self, read, peek):
+		if not self._lazy_updates:
+			version = self._version
+			if version % 2 == 0 and not self._tree._lazy_tags:
+				try:
+					result = peek(self._tree)
+				except (AttributeError, TypeError):
+					# a concurrent rotation may leave a half-updated link for a moment
+					result = None
+					version = -1
+				# tags left by a range update that overlapped the read are not in the values it saw
+				if self._version == version and not self._tree._lazy_tags:
+					return result
+		with self._read_locked():
+			return read(self._tree)
+
+	"""searches for a node corresponding to the key, as AVLTree.search
+
+	@rtype: (AVLNode,int)
+	"""
+	def search(self, key):
+		return self._read(lambda tree: tree.search(key), lambda tree: _search_from(tree.root, key)[:2])
+
+	"""searches for a node corresponding to the key starting at the max, as AVLTree.finger_search
+
+	@rtype: (AVLNode,int)
+	"""
+	def finger_search(self, key):
+		return self._read(lambda tree: tree.finger_search(key), lambda tree: _peek_finger_search(tree, key))
+
+	"""returns the value of key, read while no write is in progress
+
+	@type key: int
+	@param default: returned if key is not in the dictionary
+	"""
+	def get(self, key, default=None):
+		def read(tree):
+			node = tree.fast_search(key)
+			return node.value if node is not None else default
+		def peek(tree):
+			node = tree._index.get(key) if tree._index is not None else _search_from(tree.root, key)[0]
+			return node.value if node is not None else default
+		return self._read(read, peek)
+
+	"""returns the number of items in dictionary
+
+	@rtype: int
+	"""
+	def size(self):
+		return self._tree.size()
+
+	"""returns a sorted list of the (key, value) items, read under the read lock
+
+	@rtype: list
+	"""
+	def avl_to_array(self):
+		with self._read_locked():
+			return self._tree.avl_to_array()
+
+	"""iterates over the items in key order, as AVLTree.iter_items
+
+	@type page_size: int
+	@param page_size: the number of items read under one acquisition of the read lock. writers can
+	run between pages, so the items of one page are consistent but the pages are not a single snapshot
+	@rtype: generator
+	"""
+	def iter_items(self, lo=None, hi=None, reverse=False, page_size=1024):
+		last_key = None
+		while True:
+			page = []
+			with self._read_locked():
+				if reverse:
+					items = self._tree.iter_items(lo=lo, hi=last_key if last_key is not None else hi, reverse=True)
+				else:
+					items = self._tree.iter_items(lo=last_key if last_key is not None else lo, hi=hi)
+				for key, val in items:
+					if key == last_key:
+						continue
+					page.append((key, val))
+					if len(page) == page_size:
+						break
+			for item in page:
+				yield item
+			if len(page) < page_size:
+				return
+			last_key = page[-1][0]
+
+	# the lock taken by reads that do not run optimistically: the read lock, or the write lock of a batch if the
+	# tree holds tags, which the read pushes. the tags are checked under the read lock, where no writer can add any
+	@contextmanager
+	def _read_locked(self):
+		if not self._lazy_updates:
+			with self._lock.read_locked():
+				if not self._tree._lazy_tags:
+					yield
+					return
+		with self.batch():
+			yield
+
+	"""gives exclusive access to the wrapped tree for a group of writes under one lock acquisition
+
+	@rtype: context manager
+	@returns: a context manager whose value is the wrapped AVLTree, it must not be kept after the block.
+	a range update in the block switches the wrapper to lazy_updates, as in the constructor
+	"""
+	@contextmanager
+	def batch(self):
+		with self._lock.write_locked():
+			self._version += 1
+			try:
+				yield self._tree
+			finally:
+				if self._tree._lazy_tags:
+					self._lazy_updates = True
+				self._version += 1
+
+	"""inserts a new item, as AVLTree.insert
+
+	@rtype: (AVLNode,int,int)
+	"""
+	def insert(self, key, val):
+		with self.batch() as tree:
+			return tree.insert(key, val)
+
+	"""inserts a new item starting at the max, as AVLTree.finger_insert
+
+	@rtype: (AVLNode,int,int)
+	"""
+	def finger_insert(self, key, val):
+		with self.batch() as tree:
+			return tree.finger_insert(key, val)
+
+	"""inserts a batch of items, as AVLTree.insert_many
+
+	@rtype: int
+	"""
+	def insert_many(self, items):
+		items = list(items)
+		with self.batch() as tree:
+			return tree.insert_many(items)
+
+	"""deletes the node of key, as AVLTree.delete_key
+
+	@rtype: bool
+	"""
+	def delete_key(self, key):
+		with self.batch() as tree:
+			return tree.delete_key(key)
+
+	"""deletes a closed range of keys, as AVLTree.delete_range
+
+	@rtype: int
+	"""
+	def delete_range(self, lo, hi):
+		with self.batch() as tree:
+			return tree.delete_range(lo, hi)
+
+	"""updates the values of a closed range of keys, as AVLTree.update_range
+
+	@pre: the tree was created with lazy_updates=True
+	@rtype: int
+	"""
+	def update_range(self, lo, hi, delta, update=ADD):
+		if not self._lazy_updates:
+			raise ValueError("update_range needs a ConcurrentAVLTree created with lazy_updates=True")
+		with self.batch() as tree:
+			return tree.update_range(lo, hi, delta, update)
+
+	"""joins the wrapped tree with item and another AVLTree, as AVLTree.join
+
+	@type tree2: AVLTree
+	@param tree2: a plain AVLTree, it is not valid anymore afterwards. it may hold tags of range updates
+	only if the tree was created with lazy_updates=True
+	"""
+	def join(self, tree2, key, val):
+		if tree2._lazy_tags and not self._lazy_updates:
+			raise ValueError("tree2 has pending range updates, create the ConcurrentAVLTree with lazy_updates=True")
+		with self.batch() as tree:
+			tree.join(tree2, key, val)
+
+
+# finger_search from the max without pushing tags, for a tree that holds none. used in the lookups without a lock
+def _peek_finger_search(tree, key):
+	curr = tree.max
+	if curr is None:
+		return None, 0
+	edges = 0
+	while curr.parent is not None and curr.parent.key >= key:
+		curr = curr.parent
+		edges += 1
+	node, edges_down, _ = _search_from(curr, key)
+	return node, edges + edges_down
@@ -0,0 +1,381 @@
+"""A durable key-value store: an AVLTree in memory, a write-ahead log and checkpoints on disk.
+
+Every insert, delete, join and split is appended to the log before it changes the tree. Log records
+are buffered and written with a single fsync per group (group commit), so a commit costs one disk
+flush however many writes it covers. A checkpoint writes the items of a snapshot of the tree in
+chunks, while the store keeps taking writes, and then drops the log that came before the snapshot.
+Opening the store loads the newest checkpoint and replays the log written after it.
+
+Files in the store directory:
+	wal-<lsn>.log         log records from log sequence number lsn on
+	checkpoint-<lsn>.ckpt the items of the tree after the first lsn records
+A record is framed by its length and CRC-32, so a record torn by a crash is detected and cut off.
+"""
+
+import os
+import pickle
+import struct
+import zlib
+
+from AVLTree import AVLTree
+
+_RECORD = struct.Struct("<II") # length and CRC-32 of the pickled payload that follows
+_CHECKPOINT_MAGIC = b"AVLC"
+_CHECKPOINT_VERSION = 1
+_CHECKPOINT_HEADER = struct.Struct("<4sBQ") # magic, version, lsn
+_LSN_DIGITS = 20 # zero padded, so file names sort like their lsn
+
+
+"""
+A class implementing a dictionary that survives a process restart.
+Not thread-safe, writes must come from one thread at a time.
+"""
+class DurableAVLTree(object):
+
+	"""
+	Constructor, opens the store in path and recovers its content.
+
+	@type path: str
+	@param path: a directory, created if it does not exist
+	@type group_size: int
+	@param group_size: the number of buffered log records that triggers a commit
+	@type sync: bool
+	@param sync: if True, every commit ends with os.fsync. without it a commit survives a crash of
+	the process but not of the machine
+	"""
+	def __init__(self, path, group_size=64, sync=True):
+		self.path = path
+		self.group_size = group_size
+		self.sync = sync
+		self._pending = [] # framed records written by the next commit
+		self._checkpoint = None # the running checkpoint, see start_checkpoint
+		os.makedirs(path, exist_ok=True)
+		self._tree, self._lsn = self._recover()
+		self._wal = self._open_segment(self._lsn)
+
+	"""inserts an item, or replaces the value of a key that is already in the store
+
+	@type key: int
+	@param val: the value, it must be picklable
+	"""
+	def insert(self, key, val):
+		self._log(("insert", key, val))
+		self._tree[key] = val
+
+	"""deletes a key
+
+	@type key: int
+	@rtype: bool
+	@returns: True if the key was deleted, False if it was not in the store (nothing is logged then)
+	"""
+	def delete(self, key):
+		node = self._tree.fast_search(key)
+		if node is None:
+			return False
+		self._log(("delete", key))
+		self._tree.fast_delete(node)
+		return True
+
+	"""joins the store with an item and an AVLTree, as AVLTree.join
+
+	@type tree2: AVLTree
+	@param tree2: a dictionary whose keys are all larger than key, or all smaller than it. it is not
+	valid anymore afterwards. its items are written to the log, so the cost is O(k) for its k items
+	@type key: int
+	@param val: the value of key
+	"""
+	def join(self, tree2, key, val):
+		self._log(("join", key, val, tree2.avl_to_array()))
+		self._tree.join(tree2, key, val)
+
+	"""moves the keys >= key out of the store, as AVLTree.split
+
+	@type key: int
+	@param key: the key to split at, it does not have to be in the store
+	@rtype: AVLTree
+	@returns: a plain AVLTree with the items of keys >= key, the store keeps the smaller keys
+	"""
+	def split(self, key):
+		self._log(("split", key))
+		self._tree, larger = _split_at(self._tree, key)
+		return larger
+
+	"""returns the value of key
+
+	@type key: int
+	@param default: returned if key is not in the store
+	"""
+	def get(self, key, default=None):
+		return self._tree.get(key, default)
+
+	def __contains__(self, key):
+		return key in self._tree
+
+	def __len__(self):
+		return self._tree.size()
+
+	"""lazily iterates over the items in key order, as AVLTree.iter_items
+
+	@rtype: generator
+	"""
+	def iter_items(self, lo=None, hi=None, reverse=False):
+		return self._tree.iter_items(lo, hi, reverse)
+
+	"""returns a sorted list of the (key, value) items
+
+	@rtype: list
+	"""
+	def avl_to_array(self):
+		return self._tree.avl_to_array()
+
+	"""returns the number of items in the store
+
+	@rtype: int
+	"""
+	def size(self):
+		return self._tree.size()
+
+	"""returns the number of log records written since the store was created, including the ones
+	covered by checkpoints
+
+	@rtype: int
+	"""
+	def lsn(self):
+		return self._lsn
+
+	"""writes the buffered log records with one write and one fsync. every write made before
+	commit returns is recovered after a crash
+
+	@rtype: int
+	@returns: the number of records written
+	"""
+	def commit(self):
+		count = len(self._pending)
+		if count == 0:
+			return 0
+		self._wal.write(b"".join(self._pending))
+		self._wal.flush()
+		if self.sync:
+			os.fsync(self._wal.fileno())
+		self._pending = []
+		return count
+
+	"""starts a checkpoint of the current content. the items are copied from the tree in one O(n)
+	pass in memory, the file is written by checkpoint_step, and writes to the store can go on between
+	the steps. the log is switched to a new segment, the older segments are deleted when the checkpoint
+	is complete
+
+	@raises ValueError: if a checkpoint is already running
+	"""
+	def start_checkpoint(self):
+		if self._checkpoint is not None:
+			raise ValueError("a checkpoint is already running")
+		self.commit()
+		self._wal.close()
+		self._wal = self._open_segment(self._lsn)
+		self._checkpoint = _Checkpoint(self.path, self._lsn, self._tree.avl_to_array())
+
+	"""writes the next chunk of the running checkpoint
+
+	@type chunk_size: int
+	@param chunk_size: the largest number of items written by this step
+	@rtype: bool
+	@returns: True if the checkpoint is complete (or none was running), False if more steps are needed
+	"""
+	def checkpoint_step(self, chunk_size=4096):
+		checkpoint = self._checkpoint
+		if checkpoint is None:
+			return True
+		if not checkpoint.write_chunk(chunk_size):
+			return False
+		checkpoint.finish(self.sync)
+		self._checkpoint = None
+		_remove_older_files(self.path, checkpoint.lsn)
+		return True
+
+	"""writes a complete checkpoint, the log before it is deleted"""
+	def checkpoint(self):
+		if self._checkpoint is None:
+			self.start_checkpoint()
+		while not self.checkpoint_step():
+			pass
+
+	"""commits the buffered records and closes the log. a running checkpoint is completed first"""
+	def close(self):
+		if self._checkpoint is not None:
+			self.checkpoint()
+		self.commit()
+		self._wal.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	# frames a record and buffers it, committing when the group is full
+	def _log(self, record):
+		self._pending.append(_frame(record))
+		self._lsn += 1
+		if len(self._pending) >= self.group_size:
+			self.commit()
+
+	# opens the log segment that starts at lsn for appending
+	def _open_segment(self, lsn):
+		wal = open(os.path.join(self.path, _file_name("wal", lsn, ".log")), "ab")
+		_sync_directory(self.path, self.sync)
+		return wal
+
+	# loads the newest checkpoint and replays the log after it. returns the tree and the lsn it is at
+	def _recover(self):
+		for name in os.listdir(self.path):
+			if name.endswith(".ckpt.tmp"):
+				os.remove(os.path.join(self.path, name)) # a checkpoint cut off by a crash
+		checkpoints = _list_files(self.path, "checkpoint", ".ckpt")
+		if checkpoints:
+			lsn, name = checkpoints[-1]
+			with open(os.path.join(self.path, name), "rb") as checkpoint:
+				tree = AVLTree.from_sorted(_read_checkpoint(checkpoint, lsn))
+		else:
+			lsn, tree = 0, AVLTree()
+		for start, name in _list_files(self.path, "wal", ".log"):
+			segment_path = os.path.join(self.path, name)
+			if start < lsn:
+				continue # covered by the checkpoint, its deletion was cut off by a crash
+			if start > lsn:
+				# records were lost before this segment, so it cannot be replayed
+				os.remove(segment_path)
+				continue
+			with open(segment_path, "r+b") as segment:
+				for record in _read_records(segment):
+					tree = _replay(tree, record)
+					lsn += 1
+				# cut off a record torn by a crash, new records are appended after the last valid one
+				segment.truncate()
+		return tree, lsn
+
+
+# the state of a checkpoint that is being written, used in DurableAVLTree
+class _Checkpoint(object):
+
+	def __init__(self, path, lsn, items):
+		self.lsn = lsn
+		self.items = items
+		self.written = 0
+		self.final_path = os.path.join(path, _file_name("checkpoint", lsn, ".ckpt"))
+		# the file gets its final name only when it is complete, so recovery never sees a partial checkpoint
+		self.file = open(self.final_path + ".tmp", "wb")
+		self.file.write(_CHECKPOINT_HEADER.pack(_CHECKPOINT_MAGIC, _CHECKPOINT_VERSION, lsn))
+
+	# writes up to chunk_size items as one record, returns True when all items are written
+	def write_chunk(self, chunk_size):
+		chunk = self.items[self.written:self.written + chunk_size]
+		if chunk:
+			self.file.write(_frame(chunk))
+			self.written += len(chunk)
+		return self.written == len(self.items)
+
+	# ends the file with the number of items, makes it durable and gives it its final name
+	def finish(self, sync):
+		self.file.write(_frame(("end", len(self.items))))
+		self.file.flush()
+		if sync:
+			os.fsync(self.file.fileno())
+		self.file.close()
+		os.replace(self.final_path + ".tmp", self.final_path)
+		_sync_directory(os.path.dirname(self.final_path), sync)
+		self.items = None
+
+
+# applies a log record to tree and returns the tree, a split replaces it with its smaller part. used in _recover
+def _replay(tree, record):
+	operation = record[0]
+	if operation == "insert":
+		tree[record[1]] = record[2]
+	elif operation == "delete":
+		tree.delete_key(record[1])
+	elif operation == "join":
+		tree.join(AVLTree.from_sorted(record[3]), record[1], record[2])
+	elif operation == "split":
+		tree = _split_at(tree, record[1])[0]
+	else:
+		raise ValueError("unknown log record: %r" % (operation,))
+	return tree
+
+# splits tree into the keys < key and the keys >= key, key does not have to be in tree
+def _split_at(tree, key):
+	node = tree.fast_search(key)
+	if node is None:
+		# AVLTree.split needs a node, a temporary one marks the split point and is dropped by the split
+		return tree.split(tree.fast_insert(key, None))
+	val = node.value
+	smaller, larger = tree.split(node)
+	larger.insert(key, val)
+	return smaller, larger
+
+# returns a record with its length and CRC-32 in front
+def _frame(record):
+	payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+	return _RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+
+# yields the records of a file from its current position, and stops at the end of the file or at the first
+# record that is cut short or fails its CRC, leaving the file position right after the last valid record
+def _read_records(fileobj):
+	while True:
+		start = fileobj.tell()
+		header = fileobj.read(_RECORD.size)
+		if len(header) == _RECORD.size:
+			length, crc = _RECORD.unpack(header)
+			payload = fileobj.read(length)
+			if len(payload) == length and zlib.crc32(payload) == crc:
+				yield pickle.loads(payload)
+				continue
+		fileobj.seek(start)
+		return
+
+# returns the sorted items of a checkpoint file
+def _read_checkpoint(fileobj, lsn):
+	header = fileobj.read(_CHECKPOINT_HEADER.size)
+	if len(header) != _CHECKPOINT_HEADER.size:
+		raise ValueError("truncated checkpoint")
+	magic, version, file_lsn = _CHECKPOINT_HEADER.unpack(header)
+	if magic != _CHECKPOINT_MAGIC or version != _CHECKPOINT_VERSION or file_lsn != lsn:
+		raise ValueError("not a checkpoint of this store")
+	items = []
+	for record in _read_records(fileobj):
+		if isinstance(record, tuple) and record[0] == "end":
+			if record[1] != len(items):
+				break
+			return items
+		items.extend(record)
+	raise ValueError("incomplete checkpoint")
+
+def _file_name(prefix, lsn, suffix):
+	return "%s-%0*d%s" % (prefix, _LSN_DIGITS, lsn, suffix)
+
+# returns (lsn, name) of the files of the store with a prefix and suffix, sorted by lsn
+def _list_files(path, prefix, suffix):
+	files = []
+	for name in os.listdir(path):
+		if name.startswith(prefix + "-") and name.endswith(suffix):
+			number = name[len(prefix) + 1:-len(suffix)]
+			if number.isdigit():
+				files.append((int(number), name))
+	return sorted(files)
+
+# deletes the checkpoints and log segments that a complete checkpoint at lsn makes obsolete
+def _remove_older_files(path, lsn):
+	for prefix, suffix in (("wal", ".log"), ("checkpoint", ".ckpt")):
+		for start, name in _list_files(path, prefix, suffix):
+			if start < lsn:
+				os.remove(os.path.join(path, name))
+
+# makes the creation and renaming of files in path durable, where the platform can open directories
+def _sync_directory(path, sync):
+	if not sync or not hasattr(os, "O_DIRECTORY"):
+		return
+	fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+	try:
+		os.fsync(fd)
+	finally:
+		os.close(fd)
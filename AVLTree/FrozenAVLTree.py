@@ -0,0 +1,139 @@
+"""An immutable snapshot of an AVLTree in Eytzinger (BFS) order, for fast batch lookups with NumPy.
+
+Slot 1 of the key array holds the root of a perfectly balanced tree over the sorted keys and
+slot i has its children at 2i and 2i+1, so a descent reads memory from the top of the array
+down and the first levels stay in cache. search_many runs the descent for a whole batch of
+keys at once: every step is one vectorized comparison, with no branch per key.
+"""
+
+import numpy as np
+
+
+"""
+A class implementing an immutable tree in Eytzinger layout, usually made with AVLTree.freeze.
+"""
+class FrozenAVLTree(object):
+
+	"""
+	Constructor.
+
+	@type items: iterable
+	@pre: items are (key, value) pairs with strictly increasing integer keys
+	"""
+	def __init__(self, items):
+		keys = []
+		self._values = []
+		for key, val in items:
+			keys.append(key)
+			self._values.append(val)
+		n = len(keys)
+		self._size = n
+		self._depth = n.bit_length() # number of levels of the tree
+		# a descent can step one level past the last slot, the slots past n are padding
+		capacity = 2 << self._depth
+		self._eytzinger = np.full(capacity, np.iinfo(np.int64).max, dtype=np.int64)
+		self._positions = np.full(capacity, -1, dtype=np.int64) # slot -> position in key order
+		self._keys = np.asarray(keys, dtype=np.int64)
+		_fill_eytzinger(self._keys, self._eytzinger, self._positions, n)
+
+	"""returns the number of items in the tree
+
+	@rtype: int
+	"""
+	def size(self):
+		return self._size
+
+	"""returns the key at a position
+
+	@type i: int
+	@param i: a position, 0 for the minimal key
+	@rtype: int
+	"""
+	def key(self, i):
+		return int(self._keys[i])
+
+	"""returns the value at a position
+
+	@type i: int
+	@param i: a position, 0 for the minimal key
+	"""
+	def value(self, i):
+		return self._values[i]
+
+	"""finds many keys at once
+
+	@type keys: sequence of int
+	@param keys: the keys to be searched, in any order
+	@rtype: numpy.ndarray
+	@returns: for every key its position in key order, or -1 if it is not in the tree
+	"""
+	def search_many(self, keys):
+		queries = np.asarray(keys, dtype=np.int64)
+		if self._size == 0:
+			return np.full(queries.shape, -1, dtype=np.int64)
+		n = self._size
+		slots = np.ones(queries.shape, dtype=np.int64)
+		eytzinger = self._eytzinger
+		for _ in range(self._depth):
+			# a descent that already left the tree keeps its slot
+			slots = np.where(slots <= n, 2 * slots + (eytzinger[slots] < queries), slots)
+		# the answer is the last slot where the descent turned left: drop the trailing right turns and that left turn
+		slots = slots >> (_trailing_ones(slots) + 1)
+		found = (slots >= 1) & (slots <= n)
+		found[found] = eytzinger[slots[found]] == queries[found]
+		return np.where(found, self._positions[np.where(found, slots, 0)], -1)
+
+	"""returns a membership mask for many keys at once
+
+	@type keys: sequence of int
+	@rtype: numpy.ndarray
+	@returns: a boolean array, True where the key is in the tree
+	"""
+	def contains_many(self, keys):
+		return self.search_many(keys) >= 0
+
+	"""returns the values of many keys at once
+
+	@type keys: sequence of int
+	@param default: the value for keys that are not in the tree
+	@rtype: list
+	"""
+	def get_many(self, keys, default=None):
+		values = self._values
+		return [values[i] if i >= 0 else default for i in self.search_many(keys).tolist()]
+
+	"""searches for a single key
+
+	@type key: int
+	@rtype: int
+	@returns: the position of key in key order, None if it is not in the tree
+	"""
+	def search(self, key):
+		i = int(self.search_many([key])[0])
+		return i if i >= 0 else None
+
+
+# helper functions
+
+# writes the sorted keys into eytzinger order with an in-order walk of the implicit tree
+def _fill_eytzinger(sorted_keys, eytzinger, positions, n):
+	position = 0
+	stack = []
+	slot = 1
+	while stack or slot <= n:
+		if slot <= n:
+			stack.append(slot)
+			slot = 2 * slot
+		else:
+			slot = stack.pop()
+			eytzinger[slot] = sorted_keys[position]
+			positions[slot] = position
+			position += 1
+			slot = 2 * slot + 1
+
+# returns the number of trailing 1 bits of every value of a non-negative integer array
+def _trailing_ones(values):
+	inverted = ~values
+	# isolate the lowest 0 bit of values and take its index
+	lowest_zero = inverted & -inverted
+	return np.log2(lowest_zero.astype(np.float64)).astype(np.int64)
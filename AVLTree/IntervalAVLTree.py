@@ -0,0 +1,146 @@
+"""An interval tree built on AVLTree.
+
+Intervals are closed, keyed by (start, end) and kept in start order. Every node keeps the largest
+end in its subtree as the aggregate of the tree's monoid, so rotations, deletes, joins and splits
+keep it up to date. A query skips every subtree whose largest end is before the query range, and
+everything right of a node that starts after the range.
+"""
+
+import math
+
+from AVLTree import AVLTree, Monoid
+
+# the aggregate of a subtree is the largest end of its intervals
+_MAX_END = Monoid(max, -math.inf, lambda key, value: key[1])
+
+
+"""
+A class implementing a dictionary of closed intervals with overlap queries.
+"""
+class IntervalAVLTree(object):
+
+	"""
+	Constructor, the tree is empty.
+	"""
+	def __init__(self):
+		self._tree = AVLTree(monoid=_MAX_END)
+
+	"""inserts an interval, or replaces the value of an interval that is already in the tree
+
+	@type start: int
+	@type end: int
+	@pre: start <= end
+	@param val: the value of the interval
+	"""
+	def insert(self, start, end, val):
+		if start > end:
+			raise ValueError("interval start is after its end")
+		self._tree[(start, end)] = val
+
+	"""deletes an interval
+
+	@type start: int
+	@type end: int
+	@rtype: bool
+	@returns: True if the interval was deleted, False if it was not in the tree
+	"""
+	def delete(self, start, end):
+		return self._tree.delete_key((start, end))
+
+	"""returns the value of an interval
+
+	@type start: int
+	@type end: int
+	@param default: returned if the interval is not in the tree
+	"""
+	def get(self, start, end, default=None):
+		return self._tree.get((start, end), default)
+
+	"""returns the intervals that share at least one point with [lo, hi]
+
+	@type lo: int
+	@param lo: the start of the query range, or the query point if hi is None
+	@type hi: int
+	@param hi: the end of the query range (inclusive)
+	@rtype: list
+	@returns: a list of (start, end, value) tuples in start order. only subtrees holding a result
+	and one path beside them are visited, O(log n + k log n) for k results at worst
+	"""
+	def overlapping(self, lo, hi=None):
+		if hi is None:
+			hi = lo
+		result = []
+		if self._tree.root is not None and lo <= hi:
+			_collect(self._tree.root, lo, hi, result)
+		return result
+
+	"""checks if any interval shares at least one point with [lo, hi], in O(log n)
+
+	@type lo: int
+	@param lo: the start of the query range, or the query point if hi is None
+	@type hi: int
+	@param hi: the end of the query range (inclusive)
+	@rtype: bool
+	"""
+	def has_overlap(self, lo, hi=None):
+		if hi is None:
+			hi = lo
+		node = self._tree.root
+		if node is None or lo > hi:
+			return False
+		while node.is_real_node():
+			start, end = node.key
+			if start <= hi and end >= lo:
+				return True
+			# if the left subtree reaches lo but has no overlap, its interval that reaches lo starts after hi,
+			# and so does every interval right of it
+			if node.left.is_real_node() and node.left.agg >= lo:
+				node = node.left
+			else:
+				node = node.right
+		return False
+
+	"""iterates over the intervals in start order
+
+	@rtype: generator
+	@returns: a generator of (start, end, value) tuples
+	"""
+	def iter_items(self):
+		for (start, end), val in self._tree.iter_items():
+			yield start, end, val
+
+	"""returns a sorted list of the intervals
+
+	@rtype: list
+	@returns: a list of (start, end, value) tuples in start order
+	"""
+	def avl_to_array(self):
+		return list(self.iter_items())
+
+	"""returns the number of intervals in the tree
+
+	@rtype: int
+	"""
+	def size(self):
+		return self._tree.size()
+
+	"""returns the largest end of all intervals
+
+	@returns: the largest end, -inf if the tree is empty
+	"""
+	def max_end(self):
+		return self._tree.aggregate()
+
+
+# appends the intervals of the subtree of node that overlap [lo, hi] to result, in start order
+def _collect(node, lo, hi, result):
+	if not node.is_real_node() or node.agg < lo:
+		return
+	_collect(node.left, lo, hi, result)
+	start, end = node.key
+	if start > hi:
+		# node and all of its right subtree start after the range
+		return
+	if end >= lo:
+		result.append((start, end, node.value))
+	_collect(node.right, lo, hi, result)
@@ -0,0 +1,195 @@
+"""A read-only AVL tree file that is used through mmap, without building AVLNode objects.
+
+The file holds the items in key order: the keys as 64 bit integers, a table of value offsets
+and the encoded values. The sorted key array is the in-order layout of a perfectly balanced
+tree, whose root is the middle key, so a search is a descent over the mapped keys. Several
+processes that open the same file share its pages through the page cache.
+"""
+
+import bisect
+import mmap
+import struct
+import sys
+from array import array
+
+from AVLTree import _encode_value, _decode_value
+
+_MAGIC = b"AVLM"
+_VERSION = 1
+_BYTEORDER = 0 if sys.byteorder == "little" else 1
+# magic, version, byte order, 2 bytes of padding, number of items. 16 bytes, so the arrays after it stay aligned
+_HEADER = struct.Struct("=4sBB2xQ")
+
+
+"""
+A class giving read-only access to a tree file written by MappedAVLTree.write.
+"""
+class MappedAVLTree(object):
+
+	"""writes the items of a tree to a file in the mapped layout
+
+	@type tree: AVLTree
+	@param tree: any tree with iter_items, e.g. AVLTree or PersistentAVLTree
+	@type path: str
+	@pre: all keys are integers that fit in 64 bits
+	"""
+	@staticmethod
+	def write(tree, path):
+		keys = array("q")
+		offsets = array("Q", [0])
+		tags = bytearray()
+		payloads = []
+		for key, val in tree.iter_items():
+			tag, payload = _encode_value(val)
+			keys.append(key)
+			tags.append(tag)
+			payloads.append(payload)
+			offsets.append(offsets[-1] + len(payload))
+		with open(path, "wb") as fileobj:
+			fileobj.write(_HEADER.pack(_MAGIC, _VERSION, _BYTEORDER, len(keys)))
+			fileobj.write(keys.tobytes())
+			fileobj.write(offsets.tobytes())
+			fileobj.write(tags)
+			fileobj.write(b"".join(payloads))
+
+	"""
+	Constructor, maps the file at path read-only.
+
+	@type path: str
+	@param path: a file written by MappedAVLTree.write on a machine with the same byte order
+	"""
+	def __init__(self, path):
+		with open(path, "rb") as fileobj:
+			self._mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+		buffer = memoryview(self._mmap)
+		try:
+			n = _check_layout(buffer)
+		except ValueError:
+			buffer.release()
+			self._mmap.close()
+			raise
+		self._size = n
+		start = _HEADER.size
+		self._keys = buffer[start:start + 8 * n].cast("q")
+		start += 8 * n
+		self._offsets = buffer[start:start + 8 * (n + 1)].cast("Q")
+		start += 8 * (n + 1)
+		self._tags = buffer[start:start + n]
+		self._payloads = buffer[start + n:]
+		self._buffer = buffer
+
+	"""unmaps the file, the tree cannot be used afterwards"""
+	def close(self):
+		for view in (self._keys, self._offsets, self._tags, self._payloads, self._buffer):
+			view.release()
+		self._mmap.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	"""returns the key at a position
+
+	@type i: int
+	@param i: a position, 0 for the minimal key
+	@rtype: int
+	"""
+	def key(self, i):
+		return self._keys[i]
+
+	"""returns the value at a position, decoded from the mapped buffer
+
+	@type i: int
+	@param i: a position, 0 for the minimal key
+	"""
+	def value(self, i):
+		return _decode_value(self._tags[i], self._payloads[self._offsets[i]:self._offsets[i + 1]])
+
+	"""searches for a key by descending the implicit balanced tree over the mapped keys
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (int,int)
+	@returns: a tuple (x,e) where x is the position of key (or None if not found),
+	and e is the number of edges on the path between the root and ending node+1.
+	"""
+	def search(self, key):
+		keys = self._keys
+		lo = 0
+		hi = self._size - 1
+		edges = 0
+		while lo <= hi:
+			mid = (lo + hi) // 2
+			edges += 1
+			curr = keys[mid]
+			if curr == key:
+				return mid, edges
+			if curr < key:
+				lo = mid + 1
+			else:
+				hi = mid - 1
+		return None, edges
+
+	"""returns the value of key
+
+	@type key: int
+	@param default: returned if key is not in the tree
+	"""
+	def get(self, key, default=None):
+		i, _ = self.search(key)
+		return self.value(i) if i is not None else default
+
+	"""iterates over the items in key order, reading them from the mapped buffer
+
+	@type lo: int
+	@param lo: if not None, iteration starts at the first key >= lo
+	@type hi: int
+	@param hi: if not None, iteration stops after the last key <= hi
+	@type reverse: bool
+	@param reverse: iterate from the largest key to the smallest
+	@rtype: generator
+	@returns: a generator of (key, value) tuples, O(log n + k) for k items
+	"""
+	def iter_items(self, lo=None, hi=None, reverse=False):
+		start = bisect.bisect_left(self._keys, lo) if lo is not None else 0
+		stop = bisect.bisect_right(self._keys, hi) if hi is not None else self._size
+		positions = range(stop - 1, start - 1, -1) if reverse else range(start, stop)
+		for i in positions:
+			yield self._keys[i], self.value(i)
+
+	"""returns an s array representing dictionary
+
+	@rtype: list
+	@returns: a sorted list according to key of touples (key, value)
+	"""
+	def avl_to_array(self):
+		return list(self.iter_items())
+
+	"""returns the number of items in the tree
+
+	@rtype: int
+	"""
+	def size(self):
+		return self._size
+
+
+# checks the header of a mapped file and that the file is long enough for the arrays and values it announces,
+# and returns the number of items. used in the constructor, before any view of the arrays is made
+def _check_layout(buffer):
+	if len(buffer) < _HEADER.size:
+		raise ValueError("not a mapped AVLTree file")
+	magic, version, byteorder, n = _HEADER.unpack_from(buffer, 0)
+	if magic != _MAGIC or version != _VERSION:
+		raise ValueError("not a mapped AVLTree file")
+	if byteorder != _BYTEORDER:
+		raise ValueError("mapped AVLTree file was written with another byte order")
+	# the keys and the offsets, n + 1 of them, the last one is the total length of the values
+	tags_start = _HEADER.size + 16 * n + 8
+	if len(buffer) < tags_start + n:
+		raise ValueError("mapped AVLTree file is truncated")
+	payloads_size = struct.unpack_from("=Q", buffer, tags_start - 8)[0]
+	if len(buffer) < tags_start + n + payloads_size:
+		raise ValueError("mapped AVLTree file is truncated")
+	return n
@@ -0,0 +1,137 @@
+"""Bulk operations on AVLTree that run over a process pool.
+
+The key space is cut into p ranges, every range is processed in a worker process on plain
+sorted (key, value) lists, and the results of the ranges are concatenated and built into one
+tree with AVLTree.from_sorted.
+
+Only the work inside the ranges runs in parallel. The main process still reads the items out of
+the trees, pickles them to the workers and back and builds the result, all in O(n), so union and
+build are rarely faster than their serial versions: a linear merge or a sort is about as cheap
+per item as sending the item to a worker. The pool pays off when the work per item is large next
+to that, as with a costly predicate in parallel_filter, and there are free cores for it. With
+one worker nothing is sent anywhere, and the functions run the serial algorithm.
+"""
+
+import bisect
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from AVLTree import AVLTree
+
+
+"""merges two trees using a process pool
+
+@type tree1: AVLTree
+@type tree2: AVLTree
+@param workers: the number of worker processes, os.cpu_count() if None. with 1 worker no pool is started
+@rtype: AVLTree
+@returns: a new tree with the monoid of tree1, holding every key of tree1 or tree2. a key in both keeps
+the value from tree1. tree1 and tree2 are not modified
+"""
+def parallel_union(tree1, tree2, workers=None):
+	workers = _workers(workers)
+	bigger = tree1 if tree1.size() >= tree2.size() else tree2
+	pivots = [bigger.select(i * bigger.size() // workers + 1).key for i in range(1, workers)] if bigger.size() >= workers else []
+	tasks = [(_range_items(tree1, lo, hi), _range_items(tree2, lo, hi)) for lo, hi in _ranges(pivots)]
+	return _stitch(_run(_union_items, tasks, workers), tree1.monoid)
+
+
+"""builds a tree from unsorted items using a process pool
+
+@type items: iterable
+@param items: (key, value) pairs in any order, for a repeated key the last value wins
+@param workers: the number of worker processes, os.cpu_count() if None. with 1 worker no pool is started
+@type monoid: Monoid
+@param monoid: the monoid of the new tree, as in the AVLTree constructor
+@rtype: AVLTree
+"""
+def parallel_build(items, workers=None, monoid=None):
+	workers = _workers(workers)
+	if workers == 1:
+		return AVLTree.from_sorted(_build_items(items), monoid=monoid)
+	items = items if isinstance(items, list) else list(items)
+	# pivots are taken from a sorted random sample, so the ranges get about the same number of items
+	sample = sorted(set(key for key, _ in random.sample(items, min(len(items), 64 * workers))))
+	pivots = [sample[i * len(sample) // workers] for i in range(1, workers)] if len(sample) >= workers else []
+	buckets = [[] for _ in range(len(pivots) + 1)]
+	for item in items:
+		buckets[bisect.bisect_right(pivots, item[0])].append(item)
+	return _stitch(_run(_build_items, [(bucket,) for bucket in buckets], workers), monoid)
+
+
+"""keeps the items of a tree for which predicate is true, using a process pool
+
+@type tree: AVLTree
+@param predicate: a function (key, value) -> bool. it must be picklable, e.g. a module level function
+@param workers: the number of worker processes, os.cpu_count() if None. with 1 worker no pool is started
+@rtype: AVLTree
+@returns: a new tree with the kept items and the monoid of tree, tree is not modified
+"""
+def parallel_filter(tree, predicate, workers=None):
+	workers = _workers(workers)
+	pivots = [tree.select(i * tree.size() // workers + 1).key for i in range(1, workers)] if tree.size() >= workers else []
+	tasks = [(_range_items(tree, lo, hi), predicate) for lo, hi in _ranges(pivots)]
+	return _stitch(_run(_filter_items, tasks, workers), tree.monoid)
+
+
+# worker functions, they get and return plain sorted lists of (key, value) pairs
+
+def _union_items(items1, items2):
+	result = []
+	i = j = 0
+	while i < len(items1) and j < len(items2):
+		key1, key2 = items1[i][0], items2[j][0]
+		if key1 < key2:
+			result.append(items1[i])
+			i += 1
+		elif key2 < key1:
+			result.append(items2[j])
+			j += 1
+		else:
+			result.append(items1[i])
+			i += 1
+			j += 1
+	result.extend(items1[i:])
+	result.extend(items2[j:])
+	return result
+
+def _build_items(items):
+	return sorted(dict(items).items())
+
+def _filter_items(items, predicate):
+	return [(key, val) for key, val in items if predicate(key, val)]
+
+
+# helper functions
+
+def _workers(workers):
+	return max(1, workers if workers is not None else (os.cpu_count() or 1))
+
+# returns the half-open key ranges [lo, hi) between consecutive pivots, None stands for no bound
+def _ranges(pivots):
+	bounds = [None] + list(pivots) + [None]
+	return list(zip(bounds[:-1], bounds[1:]))
+
+# returns the items of tree with lo <= key < hi as a list
+def _range_items(tree, lo, hi):
+	if hi is None:
+		return list(tree.iter_items(lo=lo))
+	result = []
+	for key, val in tree.iter_items(lo=lo):
+		if hi is not None and key >= hi:
+			break
+		result.append((key, val))
+	return result
+
+# runs func on every task, in a process pool unless there is a single worker or a single task
+def _run(func, tasks, workers):
+	if workers == 1 or len(tasks) == 1:
+		return [func(*task) for task in tasks]
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		return list(executor.map(func, *zip(*tasks)))
+
+# builds one tree from the sorted parts, the parts cover increasing key ranges
+def _stitch(parts, monoid):
+	return AVLTree.from_sorted(list(itertools.chain.from_iterable(parts)), monoid=monoid)
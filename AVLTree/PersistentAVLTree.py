@@ -0,0 +1,305 @@
+"""A persistent (path-copying) AVL tree.
+
+Nodes are never modified after they are created, so every version of the tree stays valid:
+insert, delete, join and split copy only the nodes on the changed path and return a new
+PersistentAVLTree that shares all other nodes with the old one. Nodes have no parent pointer,
+since a node shared by several versions can have a different parent in each of them.
+"""
+
+
+class PersistentNode(object):
+	"""An immutable node. left and right are None for an empty subtree.
+
+	@type key: int
+	@type value: string
+	"""
+	__slots__ = ("key", "value", "left", "right", "height", "size")
+
+	def __init__(self, key, value, left, right):
+		self.key = key
+		self.value = value
+		self.left = left
+		self.right = right
+		self.height = 1 + max(_height(left), _height(right))
+		self.size = 1 + _size(left) + _size(right)
+
+
+"""
+A class implementing a persistent AVL tree, every modification returns a new version.
+"""
+class PersistentAVLTree(object):
+
+	"""
+	Constructor.
+
+	@type root: PersistentNode
+	@param root: the root of an existing version, None for an empty tree
+	"""
+	def __init__(self, root=None):
+		self.root = root
+
+	"""builds a balanced tree from items already sorted by key
+
+	@type items: iterable
+	@pre: items are (key, value) pairs with strictly increasing keys
+	@rtype: PersistentAVLTree
+	"""
+	@classmethod
+	def from_sorted(cls, items):
+		items = items if isinstance(items, list) else list(items)
+		return cls(_build_balanced(items, 0, len(items) - 1))
+
+	"""builds a persistent copy of an AVLTree in O(n)
+
+	@type tree: AVLTree
+	@rtype: PersistentAVLTree
+	"""
+	@classmethod
+	def from_tree(cls, tree):
+		return cls.from_sorted(tree.iter_items())
+
+	"""returns the current version, which can be read safely while newer versions are created
+
+	@rtype: PersistentAVLTree
+	@returns: self. versions are immutable, so a snapshot costs O(1)
+	"""
+	def snapshot(self):
+		return self
+
+	"""searches for a node in the dictionary corresponding to the key
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (PersistentNode,int)
+	@returns: a tuple (x,e) where x is the node corresponding to key (or None if not found),
+	and e is the number of edges on the path between the root and ending node+1.
+	"""
+	def search(self, key):
+		curr = self.root
+		edges = 0
+		while curr is not None:
+			edges += 1
+			if curr.key == key:
+				return curr, edges
+			curr = curr.right if curr.key < key else curr.left
+		return None, edges
+
+	"""returns a new version with key inserted, or with its value replaced if key is already in the dictionary
+
+	@type key: int
+	@type val: string
+	@rtype: PersistentAVLTree
+	"""
+	def insert(self, key, val):
+		return PersistentAVLTree(_insert(self.root, key, val))
+
+	"""returns a new version without key
+
+	@type key: int
+	@param key: the key to be deleted, nothing changes if it is not in the dictionary
+	@rtype: PersistentAVLTree
+	"""
+	def delete(self, key):
+		return PersistentAVLTree(_delete(self.root, key))
+
+	"""returns a new version holding self, the item and another PersistentAVLTree
+
+	@type tree2: PersistentAVLTree
+	@type key: int
+	@param key: the key separting self and tree2
+	@type val: string
+	@pre: all keys in self are smaller than key and all keys in tree2 are larger than key,
+	or the opposite way
+	@rtype: PersistentAVLTree
+	"""
+	def join(self, tree2, key, val):
+		if self.root is not None and self.root.key > key or tree2.root is not None and tree2.root.key < key:
+			return PersistentAVLTree(_join(tree2.root, key, val, self.root))
+		return PersistentAVLTree(_join(self.root, key, val, tree2.root))
+
+	"""splits the dictionary at a given key, self is not changed
+
+	@type key: int
+	@param key: the key to split at, it does not have to be in the dictionary
+	@rtype: (PersistentAVLTree, PersistentAVLTree)
+	@returns: a tuple (left, right) holding the keys smaller and larger than key
+	"""
+	def split(self, key):
+		left, _, right = _split(self.root, key)
+		return PersistentAVLTree(left), PersistentAVLTree(right)
+
+	"""iterates over the items of the dictionary in key order
+
+	@type lo: int
+	@param lo: if not None, iteration starts at the first key >= lo
+	@type hi: int
+	@param hi: if not None, iteration stops after the last key <= hi
+	@type reverse: bool
+	@param reverse: iterate from the largest key to the smallest
+	@rtype: generator
+	@returns: a generator of (key, value) tuples, it uses a stack of O(log n) nodes
+	"""
+	def iter_items(self, lo=None, hi=None, reverse=False):
+		stack = []
+		curr = self.root
+		while True:
+			# push the path to the first node in range, skipping subtrees that are out of range
+			while curr is not None:
+				if not reverse and lo is not None and curr.key < lo:
+					curr = curr.right
+				elif reverse and hi is not None and curr.key > hi:
+					curr = curr.left
+				else:
+					stack.append(curr)
+					curr = curr.right if reverse else curr.left
+			if not stack:
+				return
+			node = stack.pop()
+			if (not reverse and hi is not None and node.key > hi) or (reverse and lo is not None and node.key < lo):
+				return
+			yield node.key, node.value
+			curr = node.left if reverse else node.right
+
+	"""returns an s array representing dictionary
+
+	@rtype: list
+	@returns: a sorted list according to key of touples (key, value) representing the data structure
+	"""
+	def avl_to_array(self):
+		return list(self.iter_items())
+
+	"""returns the node with the maximal key in the dictionary
+
+	@rtype: PersistentNode
+	@returns: the maximal node, None if the dictionary is empty
+	"""
+	def max_node(self):
+		curr = self.root
+		while curr is not None and curr.right is not None:
+			curr = curr.right
+		return curr
+
+	"""returns the node with the minimal key in the dictionary
+
+	@rtype: PersistentNode
+	@returns: the minimal node, None if the dictionary is empty
+	"""
+	def min_node(self):
+		curr = self.root
+		while curr is not None and curr.left is not None:
+			curr = curr.left
+		return curr
+
+	"""returns the number of items in dictionary
+
+	@rtype: int
+	"""
+	def size(self):
+		return _size(self.root)
+
+	"""returns the root of the tree representing the dictionary
+
+	@rtype: PersistentNode
+	@returns: the root, None if the dictionary is empty
+	"""
+	def get_root(self):
+		return self.root
+
+
+# independent helper functions, none of them modifies an existing node
+
+def _height(node):
+	return node.height if node is not None else -1
+
+def _size(node):
+	return node.size if node is not None else 0
+
+# returns a new node for key with the given subtrees, rotating once or twice if their heights differ by 2
+def _balance(key, val, left, right):
+	left_height = _height(left)
+	right_height = _height(right)
+	if left_height > right_height + 1: # left heavy
+		if _height(left.left) >= _height(left.right): # left left heavy
+			return PersistentNode(left.key, left.value, left.left, PersistentNode(key, val, left.right, right))
+		pivot = left.right # left right heavy
+		return PersistentNode(pivot.key, pivot.value,
+			PersistentNode(left.key, left.value, left.left, pivot.left),
+			PersistentNode(key, val, pivot.right, right))
+	if right_height > left_height + 1: # right heavy
+		if _height(right.right) >= _height(right.left): # right right heavy
+			return PersistentNode(right.key, right.value, PersistentNode(key, val, left, right.left), right.right)
+		pivot = right.left # right left heavy
+		return PersistentNode(pivot.key, pivot.value,
+			PersistentNode(key, val, left, pivot.left),
+			PersistentNode(right.key, right.value, pivot.right, right.right))
+	return PersistentNode(key, val, left, right)
+
+def _insert(node, key, val):
+	if node is None:
+		return PersistentNode(key, val, None, None)
+	if key == node.key:
+		return PersistentNode(key, val, node.left, node.right)
+	if key < node.key:
+		return _balance(node.key, node.value, _insert(node.left, key, val), node.right)
+	return _balance(node.key, node.value, node.left, _insert(node.right, key, val))
+
+def _delete(node, key):
+	if node is None:
+		return None
+	if key < node.key:
+		return _balance(node.key, node.value, _delete(node.left, key), node.right)
+	if key > node.key:
+		return _balance(node.key, node.value, node.left, _delete(node.right, key))
+	if node.left is None:
+		return node.right
+	if node.right is None:
+		return node.left
+	# the successor takes the place of node, a new node is created instead of swapping keys
+	successor = node.right
+	while successor.left is not None:
+		successor = successor.left
+	return _balance(successor.key, successor.value, node.left, _delete_min(node.right))
+
+def _delete_min(node):
+	if node.left is None:
+		return node.right
+	return _balance(node.key, node.value, _delete_min(node.left), node.right)
+
+# joins two subtrees and an item, all keys of left are smaller than key and all keys of right are larger
+def _join(left, key, val, right):
+	if _height(left) > _height(right) + 1:
+		return _join_right(left, key, val, right)
+	if _height(right) > _height(left) + 1:
+		return _join_left(left, key, val, right)
+	return PersistentNode(key, val, left, right)
+
+# goes down the right spine of the higher left subtree until the height of right is reached
+def _join_right(left, key, val, right):
+	if _height(left.right) <= _height(right) + 1:
+		return _balance(left.key, left.value, left.left, PersistentNode(key, val, left.right, right))
+	return _balance(left.key, left.value, left.left, _join_right(left.right, key, val, right))
+
+# goes down the left spine of the higher right subtree until the height of left is reached
+def _join_left(left, key, val, right):
+	if _height(right.left) <= _height(left) + 1:
+		return _balance(right.key, right.value, PersistentNode(key, val, left, right.left), right.right)
+	return _balance(right.key, right.value, _join_left(left, key, val, right.left), right.right)
+
+# returns (left, node, right): the subtrees of keys smaller and larger than key, and the node of key or None
+def _split(node, key):
+	if node is None:
+		return None, None, None
+	if key == node.key:
+		return node.left, node, node.right
+	if key < node.key:
+		left, found, right = _split(node.left, key)
+		return left, found, _join(right, node.key, node.value, node.right)
+	left, found, right = _split(node.right, key)
+	return _join(node.left, node.key, node.value, left), found, right
+
+def _build_balanced(items, lo, hi):
+	if lo > hi:
+		return None
+	mid = (lo + hi) // 2
+	key, val = items[mid]
+	return PersistentNode(key, val, _build_balanced(items, lo, mid - 1), _build_balanced(items, mid + 1, hi))
@@ -0,0 +1,274 @@
+"""A dictionary range-partitioned over several AVLTree shards.
+
+Shard i holds the keys k with pivots[i-1] <= k < pivots[i]. Every shard is a ConcurrentAVLTree, so
+operations on different key ranges take different locks, and a readers-writer lock over the pivots
+lets any number of operations route at once. A shard that grows too large, or that gets a large share
+of the operations, is cut in two with AVLTree.split at its median, and two neighbors that are small and
+rarely used are merged back with AVLTree.join. Both cost O(log n) and move no items.
+"""
+
+import bisect
+import threading
+
+from ConcurrentAVLTree import ConcurrentAVLTree, ReadWriteLock
+
+
+"""
+A class implementing a range-sharded dictionary that rebalances its shards as it is used.
+"""
+class ShardedAVLTree(object):
+
+	"""
+	Constructor, the dictionary starts as a single empty shard.
+
+	@type max_shard_size: int
+	@param max_shard_size: a shard with more items is split at once
+	@type min_shard_size: int
+	@param min_shard_size: a hot shard is split only if it has at least twice as many items, and two
+	neighbors with fewer items together are always merged
+	@type rebalance_every: int
+	@param rebalance_every: the number of operations between two calls of rebalance
+	@type hot_factor: int
+	@param hot_factor: a shard is hot if it got hot_factor times the average number of operations per
+	shard, and two neighbors are cold if together they got less than the average divided by hot_factor
+	"""
+	def __init__(self, max_shard_size=1 << 16, min_shard_size=1 << 10, rebalance_every=1 << 12, hot_factor=4):
+		self.max_shard_size = max_shard_size
+		self.min_shard_size = min_shard_size
+		self.rebalance_every = rebalance_every
+		self.hot_factor = hot_factor
+		self._pivots = [] # the smallest key of every shard but the first
+		self._shards = [ConcurrentAVLTree()]
+		self._hits = [0] # operations routed to every shard since the last rebalance, halved by it
+		self._lock = ReadWriteLock() # guards _pivots, _shards and _hits
+		self._counter_lock = threading.Lock() # guards the counts in _hits and _operations, which readers of _lock update
+		self._operations = 0
+
+	"""inserts an item, or replaces the value of a key that is already in the dictionary
+
+	@type key: int
+	@param val: the value of the item
+	"""
+	def insert(self, key, val):
+		with self._lock.read_locked():
+			i = self._route(key)
+			with self._shards[i].batch() as tree:
+				tree[key] = val
+				oversized = tree.size() > self.max_shard_size
+		if oversized:
+			self._split_oversized(key, key)
+		self._count_operation()
+
+	"""inserts a batch of items, every shard gets its part of the batch with one insert_many
+
+	@type items: iterable
+	@param items: (key, value) pairs in any order, for a repeated key the last value wins
+	"""
+	def insert_many(self, items):
+		items = list(items)
+		if not items:
+			return
+		oversized = False
+		with self._lock.read_locked():
+			buckets = {}
+			for item in items:
+				buckets.setdefault(bisect.bisect_right(self._pivots, item[0]), []).append(item)
+			for i, bucket in buckets.items():
+				self._count_hit(i)
+				if self._shards[i].insert_many(bucket) > self.max_shard_size:
+					oversized = True
+		if oversized:
+			keys = [key for key, _ in items]
+			self._split_oversized(min(keys), max(keys))
+		self._count_operation()
+
+	"""deletes a key
+
+	@type key: int
+	@rtype: bool
+	@returns: True if the key was deleted, False if it was not in the dictionary
+	"""
+	def delete(self, key):
+		with self._lock.read_locked():
+			deleted = self._shards[self._route(key)].delete_key(key)
+		self._count_operation()
+		return deleted
+
+	"""deletes all the keys of a closed range, from every shard that overlaps it
+
+	@type lo: int
+	@param lo: lower bound of the range (inclusive)
+	@type hi: int
+	@param hi: upper bound of the range (inclusive)
+	@rtype: int
+	@returns: the number of deleted items
+	"""
+	def delete_range(self, lo, hi):
+		if lo > hi:
+			return 0
+		deleted = 0
+		with self._lock.read_locked():
+			first = bisect.bisect_right(self._pivots, lo)
+			last = bisect.bisect_right(self._pivots, hi)
+			for i in range(first, last + 1):
+				self._count_hit(i)
+				deleted += self._shards[i].delete_range(lo, hi)
+		self._count_operation()
+		return deleted
+
+	"""returns the value of key
+
+	@type key: int
+	@param default: returned if key is not in the dictionary
+	"""
+	def get(self, key, default=None):
+		with self._lock.read_locked():
+			val = self._shards[self._route(key)].get(key, default)
+		self._count_operation()
+		return val
+
+	def __contains__(self, key):
+		missing = object()
+		return self.get(key, missing) is not missing
+
+	def __len__(self):
+		return self.size()
+
+	"""returns the number of items in the dictionary
+
+	@rtype: int
+	"""
+	def size(self):
+		with self._lock.read_locked():
+			return sum(shard.size() for shard in self._shards)
+
+	"""iterates over the items in key order, one shard at a time
+
+	@type lo: int
+	@param lo: if not None, iteration starts at the first key >= lo
+	@type hi: int
+	@param hi: if not None, iteration stops after the last key <= hi
+	@rtype: generator
+	@returns: a generator of (key, value) tuples. the items of a shard are read while its bounds cannot change,
+	and shards can be split or merged between two of them, so the result is not a single snapshot
+	"""
+	def iter_items(self, lo=None, hi=None):
+		if lo is not None and hi is not None and lo > hi:
+			return
+		while True:
+			with self._lock.read_locked():
+				i = self._route(lo) if lo is not None else 0
+				page = list(self._shards[i].iter_items(lo=lo, hi=hi))
+				# the next shard starts at the pivot of this one, whatever changes in between
+				next_lo = self._pivots[i] if i < len(self._pivots) else None
+			for item in page:
+				yield item
+			if next_lo is None or (hi is not None and next_lo > hi):
+				return
+			lo = next_lo
+
+	"""returns a sorted list of the (key, value) items
+
+	@rtype: list
+	"""
+	def avl_to_array(self):
+		return list(self.iter_items())
+
+	"""returns the key range and size of every shard
+
+	@rtype: list
+	@returns: a list of (lo, hi, size) tuples in key order, where the shard holds the keys lo <= k < hi.
+	None stands for no bound
+	"""
+	def shards(self):
+		with self._lock.read_locked():
+			bounds = [None] + self._pivots + [None]
+			return [(bounds[i], bounds[i + 1], shard.size()) for i, shard in enumerate(self._shards)]
+
+	"""splits the hot shards and merges the cold neighbors, see the constructor. it is called on its own
+	every rebalance_every operations
+	"""
+	def rebalance(self):
+		with self._lock.write_locked():
+			average = sum(self._hits) / len(self._shards)
+			i = 0
+			while i < len(self._shards):
+				size = self._shards[i].size()
+				if size > self.max_shard_size or (self._hits[i] > self.hot_factor * average and size >= 2 * self.min_shard_size):
+					self._split_shard(i)
+					i += 2
+				else:
+					i += 1
+			i = 0
+			while i + 1 < len(self._shards):
+				size = self._shards[i].size() + self._shards[i + 1].size()
+				cold = self._hits[i] + self._hits[i + 1] < average / self.hot_factor
+				if size < self.min_shard_size or (cold and size <= self.max_shard_size // 2):
+					self._merge_shards(i)
+				else:
+					i += 1
+			# older operations count less and less
+			self._hits = [hits // 2 for hits in self._hits]
+
+	# returns the index of the shard of key and counts the operation in it. the caller holds _lock
+	def _route(self, key):
+		i = bisect.bisect_right(self._pivots, key)
+		self._count_hit(i)
+		return i
+
+	# counts an operation routed to shard i. the caller holds _lock, but only for reading
+	def _count_hit(self, i):
+		with self._counter_lock:
+			self._hits[i] += 1
+
+	def _count_operation(self):
+		with self._counter_lock:
+			self._operations += 1
+			due = self._operations % self.rebalance_every == 0
+		if due:
+			self.rebalance()
+
+	# splits the shards that hold keys in [lo, hi] until none of them is too large. the pivots can change
+	# while no lock is held, so the sizes are checked again under the write lock
+	def _split_oversized(self, lo, hi):
+		with self._lock.write_locked():
+			i = bisect.bisect_right(self._pivots, lo)
+			while i < len(self._shards) and (i == 0 or self._pivots[i - 1] <= hi):
+				if self._shards[i].size() > self.max_shard_size and self._split_shard(i):
+					continue
+				i += 1
+
+	# cuts shard i in two at its median key and returns True, or False if it has less than two items.
+	# the caller holds _lock for writing
+	def _split_shard(self, i):
+		with self._shards[i].batch() as tree:
+			if tree.size() < 2:
+				return False
+			node = tree.select(tree.size() // 2 + 1)
+			key, val = node.key, node.value
+			smaller, larger = tree.split(node)
+			# split leaves out the median, it becomes the smallest key of the right shard
+			larger.insert(key, val)
+		self._shards[i:i + 1] = [ConcurrentAVLTree(smaller), ConcurrentAVLTree(larger)]
+		self._pivots.insert(i, key)
+		hits = self._hits[i]
+		self._hits[i:i + 1] = [hits // 2, hits - hits // 2]
+		return True
+
+	# merges shard i + 1 into shard i with a join. the caller holds _lock for writing
+	def _merge_shards(self, i):
+		with self._shards[i].batch() as left, self._shards[i + 1].batch() as right:
+			if right.size() == 0:
+				merged = left
+			elif left.size() == 0:
+				merged = right
+			else:
+				# the minimum of the right shard separates the two in join
+				separator = right.min_node()
+				key, val = separator.key, separator.value
+				right.delete(separator)
+				left.join(right, key, val)
+				merged = left
+		self._shards[i:i + 2] = [ConcurrentAVLTree(merged)]
+		del self._pivots[i]
+		self._hits[i:i + 2] = [self._hits[i] + self._hits[i + 1]]
@@ -0,0 +1,188 @@
+from AVLTree import AVLTree
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+DISTRIBUTIONS = ["Sorted", "Reversed", "Random", "Neighbor Swaps", "Zipfian"]
+OPERATIONS = ["insert", "finger_insert", "search", "finger_search", "delete", "join", "split", "avl_to_array"]
+SPLIT_JOIN_ROUNDS = 50  # number of split/join pairs timed per tree
+ZIPF_EXPONENT = 1.1
+
+
+# returns (insert_keys, query_keys) for a distribution: the order in which keys are inserted,
+# and the stream of keys looked up by the search benchmarks
+def generate_keys(distribution, n, rng):
+    if distribution == "Sorted":
+        keys = list(range(n))
+    elif distribution == "Reversed":
+        keys = list(range(n, 0, -1))
+    elif distribution == "Random":
+        keys = rng.sample(range(n * 10), n)
+    elif distribution == "Neighbor Swaps":
+        keys = list(range(n))
+        for i in range(n - 1):
+            if rng.random() < 0.5:
+                keys[i], keys[i + 1] = keys[i + 1], keys[i]
+    elif distribution == "Zipfian":
+        # random insert order, but lookups hit a few hot keys most of the time
+        keys = rng.sample(range(n * 10), n)
+        weights = [1 / (rank ** ZIPF_EXPONENT) for rank in range(1, n + 1)]
+        return keys, rng.choices(keys, weights=weights, k=n)
+    else:
+        raise ValueError(f"unknown distribution: {distribution}")
+    return keys, keys
+
+
+# times every operation on one tree and returns a list of result records
+def run_case(n, distribution, rng):
+    insert_keys, query_keys = generate_keys(distribution, n, rng)
+    timings = {}
+
+    def timed(operation, count, func):
+        start = time.perf_counter()
+        extra = func()
+        seconds = time.perf_counter() - start
+        timings[operation] = {"count": count, "seconds": seconds, **(extra or {})}
+
+    trees = {}
+
+    def insert_all(method):
+        tree = AVLTree()
+        insert = getattr(tree, method)
+        edges = promotes = 0
+        for key in insert_keys:
+            _, e, h = insert(key, str(key))
+            edges += e
+            promotes += h
+        trees[method] = tree
+        return {"edges": edges, "promotes": promotes}
+
+    timed("insert", n, lambda: insert_all("insert"))
+    timed("finger_insert", n, lambda: insert_all("finger_insert"))
+    tree = trees["insert"]
+
+    def search_all(search):
+        edges = 0
+        for key in query_keys:
+            edges += search(key)[1]
+        return {"edges": edges}
+
+    timed("search", len(query_keys), lambda: search_all(tree.search))
+    timed("finger_search", len(query_keys), lambda: search_all(tree.finger_search))
+    timed("avl_to_array", 1, lambda: tree.avl_to_array() and None)
+
+    # split at random keys and join the halves back, so the tree keeps its size between rounds
+    pivots = rng.sample(insert_keys, min(SPLIT_JOIN_ROUNDS, n))
+    split_seconds = join_seconds = 0.0
+    for key in pivots:
+        node = tree.search(key)[0]
+        start = time.perf_counter()
+        left, right = tree.split(node)
+        split_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        left.join(right, key, str(key))
+        join_seconds += time.perf_counter() - start
+        tree = left
+    timings["split"] = {"count": len(pivots), "seconds": split_seconds}
+    timings["join"] = {"count": len(pivots), "seconds": join_seconds}
+
+    def delete_all():
+        for key in insert_keys:
+            tree.delete(tree.search(key)[0])
+
+    timed("delete", n, delete_all)
+
+    results = []
+    for operation in OPERATIONS:
+        record = {"size": n, "distribution": distribution, "operation": operation}
+        record.update(timings[operation])
+        record["ops_per_sec"] = record["count"] / record["seconds"] if record["seconds"] > 0 else None
+        results.append(record)
+    return results
+
+
+# builds a tree of n keys under tracemalloc and returns its memory record. run apart from the
+# timings, since tracing allocations slows every operation down
+def measure_memory(n, distribution, rng):
+    insert_keys, _ = generate_keys(distribution, n, rng)
+    tracemalloc.start()
+    tree = AVLTree()
+    for key in insert_keys:
+        tree.insert(key, str(key))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return {"size": n, "distribution": distribution, "current_bytes": current, "peak_bytes": peak}
+
+
+def run_benchmark(max_exponent=10, distributions=DISTRIBUTIONS, seed=0):
+    rng = random.Random(seed)
+    sizes = [111 * (2 ** i) for i in range(1, max_exponent + 1)]  # Sizes: 111 * 2^i, as in experiment1
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "seed": seed,
+            "sizes": sizes,
+            "distributions": list(distributions),
+        },
+        "results": [],
+        "memory": [],
+    }
+    wall_start = time.perf_counter()
+    for n in sizes:
+        for distribution in distributions:
+            report["results"] += run_case(n, distribution, rng)
+            report["memory"].append(measure_memory(n, distribution, rng))
+            print(f"done: size {n}, {distribution}", file=sys.stderr)
+    report["meta"]["wall_seconds"] = time.perf_counter() - wall_start
+    return report
+
+
+# prints every operation whose ops/sec dropped by more than threshold between two reports,
+# returns the number of such regressions
+def compare_reports(old, new, threshold=0.2):
+    old_results = {(r["size"], r["distribution"], r["operation"]): r for r in old["results"]}
+    regressions = 0
+    for record in new["results"]:
+        previous = old_results.get((record["size"], record["distribution"], record["operation"]))
+        if previous is None or not previous["ops_per_sec"] or not record["ops_per_sec"]:
+            continue
+        ratio = record["ops_per_sec"] / previous["ops_per_sec"]
+        if ratio < 1 - threshold:
+            regressions += 1
+            print(f"REGRESSION {record['operation']:>14} size {record['size']:>7} {record['distribution']:<15}"
+                  f" {previous['ops_per_sec']:.0f} -> {record['ops_per_sec']:.0f} ops/sec ({ratio:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every AVLTree operation and write the results as JSON.")
+    parser.add_argument("--output", default="benchmark_results.json", help="path of the JSON report")
+    parser.add_argument("--max-exponent", type=int, default=10, help="largest i in the sizes 111 * 2^i")
+    parser.add_argument("--distributions", nargs="+", default=DISTRIBUTIONS, choices=DISTRIBUTIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", help="a previous JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.max_exponent, args.distributions, args.seed)
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"wrote {len(report['results'])} results to {args.output} in {report['meta']['wall_seconds']:.1f}s")
+
+    if args.compare:
+        with open(args.compare) as previous:
+            regressions = compare_reports(json.load(previous), report, args.threshold)
+        print(f"{regressions} regressions")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from AVLTree import AVLTree, AVLNode, EXTERNAL_LEAF
+import tracemalloc
+
+# a node class with a per-instance __dict__ and the same fields as AVLNode, as AVLNode was before __slots__
+class DictNode(object):
+    def __init__(self, key, value, left=None, right=None, parent=None):
+        self.key = key
+        self.value = value
+        self.left = left
+        self.right = right
+        self.parent = parent
+        self.height = 0 if key is not None else -1
+        self._size = 1 if key is not None else 0
+        self.agg = None
+        self.lazy = None
+
+# returns the number of bytes allocated while building n nodes of node_class
+def measure_nodes(node_class, n):
+    tracemalloc.start()
+    nodes = [node_class(key, None, left=EXTERNAL_LEAF, right=EXTERNAL_LEAF) for key in range(n)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nodes
+    return current
+
+# returns the number of bytes allocated by a tree of n sorted keys built with finger_insert, and its peak
+def measure_tree(n):
+    tracemalloc.start()
+    tree = AVLTree()
+    for key in range(n):
+        tree.finger_insert(key, None)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return current, peak
+
+def run_experiment():
+    sizes = [111 * (2 ** i) for i in range(1, 11)]  # Sizes: 111 * 2^i, for i in 1 to 10, as in experiment1
+    print(f"{'Size':>8} {'dict B/node':>12} {'slots B/node':>13} {'saved':>7} {'tree MiB':>9} {'tree peak MiB':>14}")
+    for n in sizes:
+        before = measure_nodes(DictNode, n)
+        after = measure_nodes(AVLNode, n)
+        tree_current, tree_peak = measure_tree(n)
+        print(f"{n:>8} {before / n:>12.1f} {after / n:>13.1f} {1 - after / before:>7.1%}"
+            f" {tree_current / 2 ** 20:>9.2f} {tree_peak / 2 ** 20:>14.2f}")
+
+if __name__ == "__main__":
+    run_experiment()
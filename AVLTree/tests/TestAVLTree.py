@@ -1,5 +1,8 @@
+import io
+import random
 import unittest
-from AVLTree import AVLTree, AVLNode
+import operator
+from AVLTree import AVLTree, AVLNode, LazyUpdate, Monoid, SUM, COUNT
 
 class TestAVLTree(unittest.TestCase):
 
@@ -92,5 +95,479 @@ class TestAVLTree(unittest.TestCase):
         self.tree.insert(10, "C")
         self.assertEqual(self.tree.get_root().key, 20)
 
+    def test_rank_and_select(self):
+        keys = [50, 30, 70, 20, 40, 60, 80, 10, 25, 35]
+        for k in keys:
+            self.tree.insert(k, str(k))
+        for i, k in enumerate(sorted(keys)):
+            node = self.tree.search(k)[0]
+            self.assertEqual(self.tree.rank(node), i + 1)
+            self.assertEqual(self.tree.select(i + 1).key, k)
+        self.assertIsNone(self.tree.select(0))
+        self.assertIsNone(self.tree.select(len(keys) + 1))
+
+    def test_range_count(self):
+        for k in range(0, 100, 5):
+            self.tree.insert(k, str(k))
+        self.assertEqual(self.tree.range_count(10, 30), 5)
+        self.assertEqual(self.tree.range_count(11, 29), 3)
+        self.assertEqual(self.tree.range_count(-10, 200), 20)
+        self.assertEqual(self.tree.range_count(30, 10), 0)
+        self.assertEqual(AVLTree().range_count(0, 10), 0)
+
+    def test_split_sizes(self):
+        for k in range(1, 21):
+            self.tree.insert(k, str(k))
+        node = self.tree.search(8)[0]
+        left_tree, right_tree = self.tree.split(node)
+        self.assertEqual(left_tree.size(), 7)
+        self.assertEqual(right_tree.size(), 12)
+        self.assertEqual(right_tree.rank(right_tree.search(9)[0]), 1)
+
+    def test_from_sorted(self):
+        items = [(k, str(k)) for k in range(1, 101)]
+        tree = AVLTree.from_sorted(iter(items))
+        self.assertEqual(tree.size(), 100)
+        self.assertEqual(tree.avl_to_array(), items)
+        self.assertEqual(tree.max_node().key, 100)
+        self.assertIsNone(tree.get_root().parent)
+        self.assertLessEqual(tree.get_root().height, 7)
+        self.assertEqual(tree.select(42).key, 42)
+        tree.insert(101, "101")
+        tree.delete(tree.search(50)[0])
+        self.assertEqual(tree.size(), 100)
+        self.assertIsNone(AVLTree.from_sorted([]).get_root())
+
+    def test_insert_many(self):
+        for k in range(0, 50, 2):
+            self.tree.insert(k, "old")
+        size = self.tree.insert_many([(k, "new") for k in range(40, 70)] + [(45, "last")])
+        expected = dict((k, "old") for k in range(0, 50, 2))
+        expected.update((k, "new") for k in range(40, 70))
+        expected[45] = "last"
+        self.assertEqual(size, len(expected))
+        self.assertEqual(self.tree.size(), len(expected))
+        self.assertEqual(self.tree.avl_to_array(), sorted(expected.items()))
+        self.assertEqual(self.tree.max_node().key, 69)
+        self.assertIsNone(self.tree.get_root().parent)
+
+    def test_insert_many_small_batch(self):
+        for k in range(100):
+            self.tree.insert(k, "old")
+        node = self.tree.search(50)[0]
+        # a batch much smaller than the tree goes in key by key, a large one is merged
+        self.tree.insert_many([(50, "new"), (150, "new")])
+        self.tree.insert_many([(k, "merged") for k in range(90, 190)])
+        self.assertIs(self.tree.search(50)[0], node)
+        self.assertEqual(node.value, "new")
+        self.assertEqual(self.tree.size(), 190)
+        self.assertEqual(self.tree.avl_to_array()[-1], (189, "merged"))
+        self.assertEqual(self.tree.get_root().height, 7)
+
+    def test_insert_many_empty_tree(self):
+        self.tree.insert_many([(3, "C"), (1, "A"), (2, "B")])
+        self.assertEqual(self.tree.avl_to_array(), [(1, "A"), (2, "B"), (3, "C")])
+        self.assertEqual(self.tree.get_root().key, 2)
+
+    def test_iter_items(self):
+        for k in range(0, 100, 10):
+            self.tree.insert(k, str(k))
+        self.assertEqual([k for k, _ in self.tree.iter_items()], list(range(0, 100, 10)))
+        self.assertEqual([k for k, _ in self.tree.iter_items(reverse=True)], list(range(90, -10, -10)))
+        self.assertEqual(list(self.tree.iter_items(lo=15, hi=40)), [(20, "20"), (30, "30"), (40, "40")])
+        self.assertEqual([k for k, _ in self.tree.iter_items(lo=20, hi=45, reverse=True)], [40, 30, 20])
+        self.assertEqual(list(self.tree.iter_items(lo=95)), [])
+        self.assertEqual(list(self.tree.iter_items(lo=50, hi=40)), [])
+        self.assertEqual(list(AVLTree().iter_items()), [])
+
+    def test_min_node(self):
+        self.assertIsNone(self.tree.min_node())
+        for k in [50, 30, 70, 20, 40]:
+            self.tree.insert(k, str(k))
+        self.assertEqual(self.tree.min_node().key, 20)
+        self.tree.delete(self.tree.min_node())
+        self.assertEqual(self.tree.min_node().key, 30)
+        left_tree, right_tree = self.tree.split(self.tree.search(50)[0])
+        self.assertEqual(left_tree.min_node().key, 30)
+        self.assertEqual(right_tree.min_node().key, 70)
+        other = AVLTree()
+        other.insert(1, "1")
+        left_tree.join(other, 10, "10")
+        self.assertEqual(left_tree.min_node().key, 1)
+
+    def test_finger_from_given_node(self):
+        for k in range(0, 1000, 2):
+            self.tree.insert(k, str(k))
+        finger = self.tree.search(500)[0]
+        node, edges = self.tree.finger_search(504, finger)
+        self.assertEqual(node.key, 504)
+        self.assertLess(edges, self.tree.finger_search(504)[1])
+        node, insert_edges, _ = self.tree.finger_insert(503, "503", finger)
+        self.assertEqual(node.key, 503)
+        self.assertEqual(self.tree.search(503)[0], node)
+        self.assertEqual(self.tree.finger_search(0, self.tree.min_node()), (self.tree.min_node(), 1))
+        self.assertIsNone(self.tree.finger_search(-1, finger)[0])
+
+    def test_finger_last_access(self):
+        tree = AVLTree(track_last_access=True)
+        for k in range(0, 1000, 2):
+            tree.insert(k, str(k))
+        tree.finger_search(100)
+        _, edges, _ = tree.finger_insert(101, "101")
+        self.assertLessEqual(edges, 3)
+        self.assertEqual(tree.finger_search(102)[0].key, 102)
+        tree.delete(tree.search(102)[0])
+        self.assertEqual(tree.finger_search(104)[0].key, 104)
+
+    def test_delete_key(self):
+        for k in [10, 20, 5]:
+            self.tree.insert(k, str(k))
+        self.assertTrue(self.tree.delete_key(10))
+        self.assertFalse(self.tree.delete_key(10))
+        self.assertEqual(self.tree.avl_to_array(), [(5, "5"), (20, "20")])
+
+    def test_delete_range(self):
+        for k in range(100):
+            self.tree.insert(k, str(k))
+        self.assertEqual(self.tree.delete_range(20, 59), 40)
+        self.assertEqual(self.tree.size(), 60)
+        self.assertEqual([k for k, _ in self.tree.avl_to_array()], list(range(20)) + list(range(60, 100)))
+        self.assertEqual(self.tree.delete_range(55.5, 60.5), 1)
+        self.assertEqual(self.tree.delete_range(90, 200), 10)
+        self.assertEqual(self.tree.max_node().key, 89)
+        self.assertEqual(self.tree.delete_range(-5, 3), 4)
+        self.assertEqual(self.tree.min_node().key, 4)
+        self.assertEqual(self.tree.delete_range(30, 40), 0)
+        self.assertEqual(self.tree.delete_range(0, 100), 45)
+        self.assertIsNone(self.tree.get_root())
+        self.assertEqual(self.tree.size(), 0)
+
+    def _tree_of(self, keys, tag):
+        tree = AVLTree()
+        for k in keys:
+            tree.insert(k, tag)
+        return tree
+
+    def test_union(self):
+        tree = self._tree_of(range(0, 30, 2), "a")
+        tree.union(self._tree_of(range(0, 30, 3), "b"))
+        expected = sorted(set(range(0, 30, 2)) | set(range(0, 30, 3)))
+        self.assertEqual([k for k, _ in tree.avl_to_array()], expected)
+        self.assertEqual(tree.search(6)[0].value, "a")
+        self.assertEqual(tree.search(3)[0].value, "b")
+        self.assertEqual(tree.size(), len(expected))
+        self.assertEqual(tree.max_node().key, 28)
+        self.assertEqual(tree.min_node().key, 0)
+
+    def test_intersection(self):
+        tree = self._tree_of(range(0, 30, 2), "a")
+        tree.intersection(self._tree_of(range(0, 30, 3), "b"))
+        self.assertEqual(tree.avl_to_array(), [(k, "a") for k in range(0, 30, 6)])
+        self.assertEqual(tree.size(), 5)
+        tree.intersection(AVLTree())
+        self.assertIsNone(tree.get_root())
+        self.assertIsNone(tree.max_node())
+
+    def test_difference(self):
+        tree = self._tree_of(range(0, 30, 2), "a")
+        tree.difference(self._tree_of(range(0, 30, 3), "b"))
+        expected = sorted(set(range(0, 30, 2)) - set(range(0, 30, 3)))
+        self.assertEqual([k for k, _ in tree.avl_to_array()], expected)
+        self.assertEqual(tree.size(), len(expected))
+        self.assertEqual(tree.max_node().key, 28)
+        self.assertEqual(tree.min_node().key, 2)
+
+    def test_dump_and_load(self):
+        for k in [50, 30, 70, 20, 40, 60, 80, 10]:
+            self.tree.insert(k, str(k))
+        self.tree.insert(-5, None)
+        self.tree.insert(90, b"raw")
+        self.tree.insert(100, (1, "tuple"))
+        buffer = io.BytesIO()
+        self.tree.dump(buffer)
+        buffer.seek(0)
+        loaded = AVLTree.load(buffer)
+        self.assertEqual(loaded.avl_to_array(), self.tree.avl_to_array())
+        self.assertEqual(loaded.size(), self.tree.size())
+        self.assertEqual(loaded.get_root().key, self.tree.get_root().key)
+        self.assertEqual(loaded.get_root().height, self.tree.get_root().height)
+        self.assertEqual(loaded.max_node().key, 100)
+        self.assertEqual(loaded.min_node().key, -5)
+        self.assertEqual(loaded.rank(loaded.search(60)[0]), self.tree.rank(self.tree.search(60)[0]))
+        loaded.insert(65, "65")
+        loaded.delete(loaded.search(30)[0])
+        self.assertEqual(loaded.size(), self.tree.size())
+
+    def test_load_empty_and_truncated(self):
+        buffer = io.BytesIO()
+        AVLTree().dump(buffer)
+        buffer.seek(0)
+        self.assertIsNone(AVLTree.load(buffer).get_root())
+        with self.assertRaises(ValueError):
+            AVLTree.load(io.BytesIO(buffer.getvalue()[:5]))
+
+    def test_search_sorted_batch(self):
+        for k in range(0, 1000, 2):
+            self.tree.insert(k, str(k))
+        queries = list(range(-3, 1004, 3))
+        nodes, edges = self.tree.search_sorted_batch(queries)
+        self.assertEqual([node.key if node else None for node in nodes],
+                         [q if q % 2 == 0 and 0 <= q < 1000 else None for q in queries])
+        self.assertLess(edges, sum(self.tree.search(q)[1] for q in queries))
+        self.assertEqual(self.tree.search_sorted_batch([5, 2, 8])[0][1].key, 2)
+        self.assertEqual(AVLTree().search_sorted_batch([1, 2]), ([None, None], 0))
+
+    def test_stats(self):
+        self.assertIsNone(self.tree.stats)
+        tree = AVLTree(collect_stats=True)
+        edges = promotes = 0
+        for k in [3, 2, 1, 4, 5, 6, 7, 16, 15, 14]:
+            _, e, h = tree.insert(k, str(k))
+            edges += e
+            promotes += h
+        stats = tree.stats
+        self.assertEqual(stats.edges, edges)
+        self.assertEqual(stats.promotes, promotes)
+        self.assertEqual(stats.single_rotations, 4)
+        self.assertEqual(stats.double_rotations, 2)
+        self.assertEqual(stats.calls["insert"], 10)
+        self.assertEqual(sum(stats.latencies["insert"].values()), 10)
+        # delete_key searches and deletes, but only the outer call is timed
+        tree.delete_key(7)
+        self.assertEqual(stats.calls["delete_key"], 1)
+        self.assertNotIn("delete", stats.calls)
+        self.assertEqual(sum(stats.rebalance_loops["delete"].values()), 1)
+        left, right = tree.split(tree.search(5)[0])
+        self.assertIs(left.stats, stats)
+        self.assertIs(right.stats, stats)
+        left.join(right, 5, "5")
+        self.assertEqual(stats.calls["split"], 1)
+        self.assertEqual(stats.calls["join"], 1)
+        small = AVLTree()
+        small.insert(100, "100")
+        left.join(small, 50, "50")
+        self.assertEqual(sum(stats.rebalance_loops["join"].values()), 1)
+        self.assertEqual(stats.as_dict()["calls"]["search"], 1)
+        stats.reset()
+        self.assertEqual(stats.as_dict()["edges"], 0)
+
+    def test_stats_of_mapping_operations(self):
+        tree = AVLTree(collect_stats=True)
+        for k in range(1, 8):
+            tree[k] = str(k)
+        tree[3] = "three"
+        stats = tree.stats
+        # an ascending run of 7 keys takes 4 single rotations, replacing a value inserts nothing
+        self.assertEqual(stats.calls["insert"], 7)
+        self.assertEqual(stats.single_rotations, 4)
+        del tree[7]
+        self.assertEqual(tree.pop(6), "6")
+        self.assertEqual(stats.calls["delete"], 2)
+        self.assertEqual(sum(stats.rebalance_loops["delete"].values()), 2)
+        # a small batch goes in key by key, its rotations count as those of separate inserts
+        batched, single = AVLTree(collect_stats=True), AVLTree(collect_stats=True)
+        for k in range(40):
+            batched.insert(k, k)
+            single.insert(k, k)
+        batched.insert_many((k, k) for k in range(100, 105))
+        for k in range(100, 105):
+            single.insert(k, k)
+        self.assertEqual(batched.stats.calls["insert_many"], 1)
+        self.assertEqual(batched.stats.calls["insert"], 40)
+        self.assertGreater(single.stats.single_rotations, 0)
+        self.assertEqual(batched.stats.single_rotations, single.stats.single_rotations)
+        self.assertEqual(batched.stats.double_rotations, single.stats.double_rotations)
+
+    def test_fast_operations(self):
+        rng = random.Random(7)
+        keys = rng.sample(range(10000), 600)
+        for k in keys:
+            self.assertEqual(self.tree.fast_insert(k, str(k)).key, k)
+        for k in rng.sample(keys, 400):
+            node = self.tree.fast_search(k)
+            self.assertEqual(node.value, str(k))
+            self.tree.fast_delete(node)
+            self.assertIsNone(self.tree.fast_search(k))
+        expected = sorted(set(keys) - {k for k in keys if self.tree.fast_search(k) is None})
+        self.assertEqual([k for k, _ in self.tree.avl_to_array()], expected)
+        self.assertEqual(self.tree.size(), len(expected))
+        self.assertEqual(self.tree.get_root()._size, len(expected))
+        self.assertEqual(self.tree.max_node().key, expected[-1])
+        self.assertEqual(self.tree.min_node().key, expected[0])
+        self.assert_avl(self.tree.get_root())
+        # the fast and the counting operations work on the same tree
+        self.tree.insert(-1, "-1")
+        self.tree.fast_delete(self.tree.search(expected[0])[0])
+        self.assertEqual(self.tree.min_node().key, -1)
+        for k in [-1] + expected[1:]:
+            self.tree.fast_delete(self.tree.fast_search(k))
+        self.assertIsNone(self.tree.get_root())
+        self.assertIsNone(self.tree.fast_search(5))
+
+    def test_mapping_protocol(self):
+        for k in [20, 10, 30, 5]:
+            self.tree[k] = str(k)
+        self.tree[10] = "ten"
+        self.assertEqual(len(self.tree), 4)
+        self.assertEqual(self.tree[10], "ten")
+        self.assertIn(5, self.tree)
+        self.assertNotIn(6, self.tree)
+        self.assertEqual(list(self.tree), [5, 10, 20, 30])
+        self.assertEqual(list(self.tree.items()), [(5, "5"), (10, "ten"), (20, "20"), (30, "30")])
+        self.assertEqual(self.tree.get(6, "none"), "none")
+        self.assertEqual(self.tree.pop(20), "20")
+        self.assertEqual(self.tree.pop(20, None), None)
+        with self.assertRaises(KeyError):
+            self.tree.pop(20)
+        with self.assertRaises(KeyError):
+            self.tree[20]
+        del self.tree[5]
+        with self.assertRaises(KeyError):
+            del self.tree[5]
+        self.assertEqual(dict(self.tree), {10: "ten", 30: "30"})
+        self.tree.update({1: "1", 2: "2"})
+        self.assertEqual(self.tree.min_node().key, 1)
+        self.tree.clear()
+        self.assertEqual(len(self.tree), 0)
+        self.assertIsNone(self.tree.get_root())
+
+    def test_key_index(self):
+        tree = AVLTree(index_keys=True)
+        for k in range(100):
+            tree.insert(k, str(k))
+        node = tree.search(70)[0]
+        self.assertIs(tree.fast_search(70), node)
+        # nodes keep their identity through split and join, so the indexes stay valid
+        left, right = tree.split(tree.search(40)[0])
+        self.assertIs(right.fast_search(70), node)
+        self.assertIsNone(right.fast_search(40))
+        self.assertIsNone(left.fast_search(70))
+        self.assertEqual(left[39], "39")
+        left.join(right, 40, "forty")
+        self.assertIs(left.fast_search(70), node)
+        self.assertEqual(left[40], "forty")
+        # delete swaps with the predecessor, which keeps the index right
+        left.delete(left.get_root())
+        self.assertEqual(sorted(left._index), [k for k, _ in left.avl_to_array()])
+        for k, _ in left.avl_to_array():
+            self.assertIs(left._index[k], left.search(k)[0])
+        self.assertEqual(left.delete_range(10, 19), 10)
+        self.assertNotIn(15, left)
+        left.insert_many([(15, "new"), (70, "seventy")])
+        self.assertEqual(left[70], "seventy")
+        self.assertIs(left.fast_search(15), left.search(15)[0])
+        plain = AVLTree.from_sorted([(k, str(k)) for k in range(5)])
+        plain.build_index()
+        self.assertIs(plain.fast_search(3), plain.search(3)[0])
+        plain.drop_index()
+        self.assertEqual(plain[3], "3")
+
+    def test_aggregate(self):
+        tree = AVLTree(monoid=SUM)
+        for k in random.Random(3).sample(range(200), 200):
+            tree.insert(k, k)
+        self.assertEqual(tree.aggregate(), sum(range(200)))
+        self.assertEqual(tree.aggregate(10, 20), sum(range(10, 21)))
+        self.assertEqual(tree.aggregate(hi=-1), 0)
+        tree.delete(tree.search(15)[0])
+        tree[16] = 1000
+        self.assertEqual(tree.aggregate(10, 20), sum(range(10, 21)) - 15 - 16 + 1000)
+        left, right = tree.split(tree.search(100)[0])
+        self.assertEqual(left.aggregate(), sum(range(100)) - 15 - 16 + 1000)
+        self.assertEqual(right.aggregate(150), sum(range(150, 200)))
+        other = AVLTree.from_sorted([(k, k) for k in range(300, 310)])
+        right.join(other, 250, 250)
+        self.assertEqual(right.aggregate(200), 250 + sum(range(300, 310)))
+        # a non-commutative monoid sees the keys in order
+        keys = Monoid(lambda a, b: a + b, (), lambda key, value: (key,))
+        tree = AVLTree.from_sorted([(k, None) for k in range(50)], monoid=keys)
+        tree.delete_range(10, 39)
+        self.assertEqual(tree.aggregate(5, 45), (5, 6, 7, 8, 9, 40, 41, 42, 43, 44, 45))
+        tree.set_monoid(COUNT)
+        self.assertEqual(tree.aggregate(5, 45), 11)
+        with self.assertRaises(ValueError):
+            AVLTree().aggregate()
+
+    def test_update_range(self):
+        add_to_sum = LazyUpdate(operator.add, operator.add, lambda agg, delta, size: agg + delta * size)
+        rng = random.Random(5)
+        tree = AVLTree(monoid=SUM)
+        expected = {}
+        for k in rng.sample(range(300), 300):
+            tree.insert(k, k)
+            expected[k] = k
+        for _ in range(200):
+            lo = rng.randrange(-10, 300)
+            hi = lo + rng.randrange(100)
+            delta = rng.randrange(-5, 6)
+            in_range = [k for k in expected if lo <= k <= hi]
+            self.assertEqual(tree.update_range(lo, hi, delta, add_to_sum), len(in_range))
+            for k in in_range:
+                expected[k] += delta
+            op = rng.random()
+            k = rng.choice(list(expected))
+            if op < 0.3:
+                self.assertEqual(tree.search(k)[0].value, expected[k])
+            elif op < 0.5:
+                tree.delete(tree.search(k)[0])
+                del expected[k]
+            elif op < 0.7:
+                k = rng.randrange(300, 400)
+                if k not in expected:
+                    tree.insert(k, 0)
+                    expected[k] = 0
+            else:
+                val = expected.pop(k)
+                left, right = tree.split(tree.search(k)[0])
+                left.join(right, k, val)
+                tree = left
+                expected[k] = val
+            self.assertEqual(tree.aggregate(lo, hi), sum(v for k, v in expected.items() if lo <= k <= hi))
+        self.assert_avl(tree.root)
+        self.assertEqual(tree.avl_to_array(), sorted(expected.items()))
+        # without a monoid the default update adds to the values
+        tree = AVLTree.from_sorted([(k, 0) for k in range(10)])
+        tree.update_range(2, 7, 1)
+        tree.update_range(5, 20, 10)
+        self.assertEqual([v for _, v in tree.avl_to_array()], [0, 0, 1, 1, 1, 11, 11, 11, 10, 10])
+        with self.assertRaises(ValueError):
+            AVLTree(monoid=SUM).update_range(0, 1, 1)
+
+    def test_iter_items_with_range_updates(self):
+        rng = random.Random(6)
+        tree = AVLTree.from_sorted([(k, 0) for k in range(500)])
+        tree.update_range(0, 499, 1)
+        # reading the first item pushes the tags on its way only, the right half of the tree keeps its tag
+        self.assertEqual(next(tree.iter_items()), (0, 1))
+        self.assertIsNotNone(tree.get_root().right.left.lazy)
+        expected = dict((k, 1) for k in range(500))
+        for _ in range(100):
+            lo = rng.randrange(500)
+            hi = lo + rng.randrange(200)
+            tree.update_range(lo, hi, 2)
+            for k in range(lo, min(hi, 499) + 1):
+                expected[k] += 2
+            lo = rng.randrange(500)
+            hi = lo + rng.randrange(100)
+            items = sorted((k, v) for k, v in expected.items() if lo <= k <= hi)
+            self.assertEqual(list(tree.iter_items(lo=lo, hi=hi)), items)
+            self.assertEqual(list(tree.iter_items(lo=lo, hi=hi, reverse=True)), items[::-1])
+            self.assertEqual(list(tree.iter_items(hi=lo)), sorted((k, v) for k, v in expected.items() if k <= lo))
+            self.assertEqual(list(tree.iter_items(lo=hi, reverse=True)), sorted(((k, v) for k, v in expected.items() if k >= hi), reverse=True))
+        self.assertEqual(list(tree.iter_items(reverse=True)), sorted(expected.items(), reverse=True))
+        self.assertFalse(tree._lazy_tags)
+
+    def assert_avl(self, node):
+        if not node.is_real_node():
+            return
+        self.assert_avl(node.left)
+        self.assert_avl(node.right)
+        self.assertLessEqual(abs(node.left.height - node.right.height), 1)
+        self.assertEqual(node.height, 1 + max(node.left.height, node.right.height))
+        self.assertEqual(node._size, 1 + node.left._size + node.right._size)
+        for child in (node.left, node.right):
+            if child.is_real_node():
+                self.assertIs(child.parent, node)
+
 if __name__ == '__main__':
     unittest.main()
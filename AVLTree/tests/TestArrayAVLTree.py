@@ -0,0 +1,109 @@
+import random
+import unittest
+from AVLTree import AVLTree
+from ArrayAVLTree import ArrayAVLTree, AVLArena, NIL
+
+
+class TestArrayAVLTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = ArrayAVLTree()
+
+    def validate(self, tree):
+        a = tree.arena
+
+        def check(node):
+            if node == NIL:
+                return -1, 0
+            for child in (a.left[node], a.right[node]):
+                if child != NIL:
+                    self.assertEqual(a.parent[child], node)
+            left_height, left_size = check(a.left[node])
+            right_height, right_size = check(a.right[node])
+            self.assertLess(abs(left_height - right_height), 2)
+            self.assertEqual(a.height[node], 1 + max(left_height, right_height))
+            self.assertEqual(a.size[node], 1 + left_size + right_size)
+            return a.height[node], a.size[node]
+
+        if tree.get_root() is not None:
+            self.assertEqual(a.parent[tree.root], NIL)
+            self.assertEqual(check(tree.root)[1], tree.size())
+        keys = [k for k, _ in tree.avl_to_array()]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(keys), tree.size())
+        if keys:
+            self.assertEqual(tree.key(tree.max_node()), keys[-1])
+
+    def test_empty_tree(self):
+        self.assertIsNone(self.tree.get_root())
+        self.assertIsNone(self.tree.max_node())
+        self.assertEqual(self.tree.search(5), (None, 0))
+        self.assertEqual(self.tree.finger_search(5), (None, 0))
+
+    def test_matches_avltree(self):
+        reference = AVLTree()
+        for key in random.sample(range(10000), 500):
+            node, edges, promotes = self.tree.insert(key, str(key))
+            self.assertEqual((edges, promotes), reference.insert(key, str(key))[1:])
+            self.assertEqual(self.tree.key(node), key)
+        for key in random.sample(range(10000), 200):
+            self.assertEqual(self.tree.finger_search(key)[1], reference.finger_search(key)[1])
+            self.assertEqual(self.tree.search(key)[1], reference.search(key)[1])
+        self.assertEqual(self.tree.avl_to_array(), reference.avl_to_array())
+        self.validate(self.tree)
+
+    def test_finger_insert(self):
+        for key in range(200):
+            self.tree.finger_insert(key, str(key))
+        self.assertEqual(self.tree.size(), 200)
+        self.assertEqual(self.tree.value(self.tree.search(150)[0]), "150")
+        self.validate(self.tree)
+
+    def test_delete_reuses_handles(self):
+        for key in range(100):
+            self.tree.insert(key, str(key))
+        capacity = len(self.tree.arena.keys)
+        for key in range(0, 100, 2):
+            self.tree.delete(self.tree.search(key)[0])
+            self.validate(self.tree)
+        for key in range(0, 100, 2):
+            self.tree.insert(key, str(key))
+        self.assertEqual(len(self.tree.arena.keys), capacity)
+        self.assertEqual(self.tree.avl_to_array(), [(k, str(k)) for k in range(100)])
+        self.validate(self.tree)
+
+    def test_split_and_join(self):
+        for key in range(1, 101):
+            self.tree.insert(key, str(key))
+        left, right = self.tree.split(self.tree.search(30)[0])
+        self.validate(left)
+        self.validate(right)
+        self.assertEqual(left.size(), 29)
+        self.assertEqual(right.size(), 70)
+        left.join(right, 30, "30")
+        self.validate(left)
+        self.assertEqual(left.avl_to_array(), [(k, str(k)) for k in range(1, 101)])
+
+    def test_join_across_arenas(self):
+        other = ArrayAVLTree(AVLArena())
+        for key in range(10):
+            self.tree.insert(key, str(key))
+        for key in range(20, 25):
+            other.insert(key, str(key))
+        self.tree.join(other, 15, "15")
+        self.validate(self.tree)
+        self.assertEqual(self.tree.size(), 16)
+        self.assertEqual(self.tree.key(self.tree.max_node()), 24)
+
+    def test_copy_is_independent(self):
+        for key in range(50):
+            self.tree.insert(key, str(key))
+        snapshot = self.tree.copy()
+        self.tree.delete(self.tree.search(10)[0])
+        self.assertEqual(snapshot.size(), 50)
+        self.assertIsNotNone(snapshot.search(10)[0])
+        self.validate(snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
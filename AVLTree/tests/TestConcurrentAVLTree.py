@@ -0,0 +1,168 @@
+import random
+import threading
+import unittest
+from AVLTree import AVLTree
+from ConcurrentAVLTree import ConcurrentAVLTree, ReadWriteLock
+
+
+class TestConcurrentAVLTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = ConcurrentAVLTree()
+
+    def test_basic_operations(self):
+        self.tree.insert(10, "A")
+        self.tree.finger_insert(20, "B")
+        self.tree.insert_many([(5, "C"), (15, "D")])
+        self.assertEqual(self.tree.get(15), "D")
+        self.assertEqual(self.tree.get(99, "missing"), "missing")
+        self.assertEqual(self.tree.search(20)[0].key, 20)
+        self.assertEqual(self.tree.finger_search(5)[0].key, 5)
+        self.assertTrue(self.tree.delete_key(10))
+        self.assertEqual(self.tree.delete_range(14, 16), 1)
+        self.assertEqual(self.tree.avl_to_array(), [(5, "C"), (20, "B")])
+        self.assertEqual(self.tree.size(), 2)
+
+    def test_batch_bumps_version(self):
+        version = self.tree.version()
+        with self.tree.batch() as tree:
+            self.assertEqual(self.tree.version() % 2, 1)
+            for k in range(100):
+                tree.insert(k, str(k))
+        self.assertEqual(self.tree.version(), version + 2)
+        self.assertEqual(self.tree.size(), 100)
+
+    def test_paged_iteration(self):
+        self.tree.insert_many((k, str(k)) for k in range(50))
+        self.assertEqual([k for k, _ in self.tree.iter_items(page_size=7)], list(range(50)))
+        self.assertEqual([k for k, _ in self.tree.iter_items(lo=10, hi=30, page_size=4)], list(range(10, 31)))
+        self.assertEqual([k for k, _ in self.tree.iter_items(lo=10, hi=30, reverse=True, page_size=4)],
+                         list(range(30, 9, -1)))
+
+    def test_update_range(self):
+        with self.assertRaises(ValueError):
+            self.tree.update_range(0, 10, 1)
+        tree = ConcurrentAVLTree(lazy_updates=True)
+        tree.insert_many((k, 0) for k in range(20))
+        self.assertEqual(tree.update_range(5, 9, 3), 5)
+        self.assertEqual(tree.get(7), 3)
+        self.assertEqual([v for _, v in tree.iter_items(lo=3, hi=10, page_size=3)], [0, 0, 3, 3, 3, 3, 3, 0])
+
+    def test_range_update_in_batch(self):
+        self.tree.insert_many((k, 0) for k in range(100))
+        with self.tree.batch() as tree:
+            tree.update_range(10, 60, 1)
+        # the tags left by the batch make the wrapper lazy, so reads push them under the write lock
+        self.assertEqual(self.tree.update_range(50, 89, 2), 40)
+        self.assertEqual(self.tree.get(55), 3)
+        self.assertEqual([v for _, v in self.tree.iter_items(page_size=16)], [0] * 10 + [1] * 40 + [3] * 11 + [2] * 29 + [0] * 10)
+
+    def tags(self, node):
+        # the lazy tags of a subtree in preorder, read without pushing them
+        if node.key is None:
+            return []
+        return [node.lazy] + self.tags(node.left) + self.tags(node.right)
+
+    def test_optimistic_reader_does_not_push_tags(self):
+        self.tree.insert_many((k, 0) for k in range(100))
+        entered, resume = threading.Event(), threading.Event()
+
+        class SlowKey(int):
+            # the first comparison stops the lookup until the writer below has left tags in the tree
+            def _wait(self):
+                if not entered.is_set():
+                    entered.set()
+                    resume.wait()
+
+            def __eq__(self, other):
+                self._wait()
+                return int.__eq__(self, other)
+
+            def __lt__(self, other):
+                self._wait()
+                return int.__lt__(self, other)
+
+            def __le__(self, other):
+                self._wait()
+                return int.__le__(self, other)
+
+            def __gt__(self, other):
+                self._wait()
+                return int.__gt__(self, other)
+
+            def __ge__(self, other):
+                self._wait()
+                return int.__ge__(self, other)
+
+            __hash__ = int.__hash__
+
+        found = []
+        reader = threading.Thread(target=lambda: found.append(self.tree.finger_search(SlowKey(10))[0]))
+        reader.start()
+        entered.wait()
+        with self.tree.batch() as tree:
+            tree.update_range(0, 99, 1)
+            tags = self.tags(tree.get_root())
+            self.assertTrue(any(tag is not None for tag in tags))
+            resume.set()
+            reader.join(0.2)
+            self.assertEqual(self.tags(tree.get_root()), tags)
+        reader.join()
+        self.assertEqual(found[0].value, 1)
+        self.assertEqual([v for _, v in self.tree.iter_items()], [1] * 100)
+
+    def test_rejects_unsafe_trees(self):
+        with self.assertRaises(ValueError):
+            ConcurrentAVLTree(AVLTree(track_last_access=True))
+        with self.assertRaises(ValueError):
+            ConcurrentAVLTree(AVLTree(collect_stats=True))
+
+    def test_readers_and_writers(self):
+        stable = list(range(0, 20000, 2))
+        self.tree.insert_many((k, k) for k in stable)
+        errors = []
+
+        def reader():
+            try:
+                for _ in range(3000):
+                    key = random.choice(stable)
+                    if self.tree.get(key) != key:
+                        errors.append(key)
+            except Exception as e:
+                errors.append(e)
+
+        def writer():
+            try:
+                for _ in range(300):
+                    key = random.randrange(10000) * 2 + 1
+                    with self.tree.batch() as tree:
+                        if not tree.delete_key(key):
+                            tree.insert(key, key)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(4)] + [threading.Thread(target=writer) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        keys = [k for k, _ in self.tree.iter_items()]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(keys), self.tree.size())
+
+    def test_lock_excludes_writer(self):
+        lock = ReadWriteLock()
+        events = []
+        lock.acquire_read()
+        writer = threading.Thread(target=lambda: (lock.acquire_write(), events.append("write"), lock.release_write()))
+        writer.start()
+        writer.join(0.05)
+        events.append("read")
+        lock.release_read()
+        writer.join()
+        self.assertEqual(events, ["read", "write"])
+
+
+if __name__ == '__main__':
+    unittest.main()
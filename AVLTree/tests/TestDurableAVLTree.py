@@ -0,0 +1,126 @@
+import os
+import random
+import tempfile
+import unittest
+from AVLTree import AVLTree
+from DurableAVLTree import DurableAVLTree
+
+
+class TestDurableAVLTree(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def crash(self, store):
+        # drops the store without committing the buffered records
+        store._pending = []
+        store._wal.close()
+
+    def test_recovery_replays_the_log(self):
+        store = DurableAVLTree(self.path, group_size=8)
+        expected = {}
+        rng = random.Random(2)
+        for _ in range(500):
+            key = rng.randrange(200)
+            if key in expected and rng.random() < 0.4:
+                self.assertTrue(store.delete(key))
+                del expected[key]
+            else:
+                store.insert(key, str(key))
+                expected[key] = str(key)
+        self.assertFalse(store.delete(-1))
+        store.close()
+        store = DurableAVLTree(self.path)
+        self.assertEqual(store.avl_to_array(), sorted(expected.items()))
+        store.close()
+
+    def test_group_commit(self):
+        store = DurableAVLTree(self.path, group_size=4)
+        for key in range(10):
+            store.insert(key, key)
+        # the first two groups were committed, the last two records were still buffered
+        self.crash(store)
+        store = DurableAVLTree(self.path)
+        self.assertEqual([k for k, _ in store.avl_to_array()], list(range(8)))
+        self.assertEqual(store.lsn(), 8)
+        store.insert(8, 8)
+        self.assertEqual(store.commit(), 1)
+        self.crash(store)
+        self.assertEqual(len(DurableAVLTree(self.path)), 9)
+
+    def test_torn_record_is_cut_off(self):
+        store = DurableAVLTree(self.path)
+        for key in range(5):
+            store.insert(key, key)
+        store.close()
+        wal = os.path.join(self.path, sorted(os.listdir(self.path))[-1])
+        size = os.path.getsize(wal)
+        with open(wal, "r+b") as segment:
+            segment.truncate(size - 3)
+        store = DurableAVLTree(self.path)
+        self.assertEqual([k for k, _ in store.avl_to_array()], [0, 1, 2, 3])
+        store.insert(10, 10)
+        store.close()
+        self.assertEqual([k for k, _ in DurableAVLTree(self.path).avl_to_array()], [0, 1, 2, 3, 10])
+
+    def test_join_and_split(self):
+        store = DurableAVLTree(self.path)
+        for key in range(20):
+            store.insert(key, key)
+        store.join(AVLTree.from_sorted([(k, k) for k in range(30, 40)]), 25, "x")
+        larger = store.split(10)
+        self.assertEqual([k for k, _ in larger.avl_to_array()], list(range(10, 20)) + [25] + list(range(30, 40)))
+        larger = store.split(7.5)
+        self.assertEqual([k for k, _ in larger.avl_to_array()], [8, 9])
+        store.close()
+        store = DurableAVLTree(self.path)
+        self.assertEqual(store.avl_to_array(), [(k, k) for k in range(8)])
+
+    def test_incremental_checkpoint(self):
+        store = DurableAVLTree(self.path)
+        for key in range(1000):
+            store.insert(key, key)
+        store.start_checkpoint()
+        steps = 0
+        while not store.checkpoint_step(chunk_size=100):
+            # writes go on while the checkpoint is written, they are in the new log segment
+            store.insert(1000 + steps, steps)
+            store.delete(steps)
+            steps += 1
+        self.assertEqual(steps, 9)
+        names = sorted(os.listdir(self.path))
+        self.assertEqual(len(names), 2)
+        self.assertTrue(names[0].startswith("checkpoint-") and names[1].startswith("wal-"))
+        expected = store.avl_to_array()
+        store.commit()
+        self.crash(store)
+        store = DurableAVLTree(self.path)
+        self.assertEqual(store.avl_to_array(), expected)
+        store.checkpoint()
+        store.close()
+        self.assertEqual(DurableAVLTree(self.path).avl_to_array(), expected)
+
+    def test_checkpoint_cut_off_by_a_crash(self):
+        store = DurableAVLTree(self.path)
+        for key in range(50):
+            store.insert(key, key)
+        store.start_checkpoint()
+        store.checkpoint_step(chunk_size=10)
+        store.insert(50, 50)
+        store.commit()
+        store._checkpoint.file.close()
+        self.crash(store)
+        store = DurableAVLTree(self.path)
+        self.assertEqual(len(store), 51)
+        self.assertFalse(any(name.endswith(".tmp") for name in os.listdir(self.path)))
+        with self.assertRaises(ValueError):
+            store.start_checkpoint()
+            store.start_checkpoint()
+
+
+if __name__ == '__main__':
+    unittest.main()
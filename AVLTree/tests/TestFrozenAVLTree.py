@@ -0,0 +1,43 @@
+import random
+import unittest
+from AVLTree import AVLTree
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestFrozenAVLTree(unittest.TestCase):
+
+    def test_search_many(self):
+        for n in [0, 1, 2, 3, 7, 8, 100, 1000]:
+            keys = sorted(random.sample(range(-5000, 5000), n))
+            frozen = AVLTree.from_sorted((k, str(k)) for k in keys).freeze()
+            self.assertEqual(frozen.size(), n)
+            queries = list(range(-5010, 5010))
+            positions = frozen.search_many(queries).tolist()
+            expected = dict((k, i) for i, k in enumerate(keys))
+            self.assertEqual(positions, [expected.get(q, -1) for q in queries])
+
+    def test_values_and_membership(self):
+        tree = AVLTree()
+        for k in [50, 30, 70, 20, 40]:
+            tree.insert(k, "v%d" % k)
+        frozen = tree.freeze()
+        tree.insert(60, "v60")
+        self.assertEqual(frozen.contains_many([20, 60, 70]).tolist(), [True, False, True])
+        self.assertEqual(frozen.get_many([40, 41], default="none"), ["v40", "none"])
+        position = frozen.search(30)
+        self.assertEqual((frozen.key(position), frozen.value(position)), (30, "v30"))
+        self.assertIsNone(frozen.search(31))
+
+    def test_extreme_keys(self):
+        largest = numpy.iinfo(numpy.int64).max
+        frozen = AVLTree.from_sorted([(-largest, "min"), (0, "zero"), (largest, "max")]).freeze()
+        self.assertEqual(frozen.search_many([largest, -largest, 1]).tolist(), [2, 0, -1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import random
+import unittest
+from IntervalAVLTree import IntervalAVLTree
+
+
+class TestIntervalAVLTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = IntervalAVLTree()
+
+    def brute_force(self, intervals, lo, hi):
+        return sorted((s, e, v) for (s, e), v in intervals.items() if s <= hi and e >= lo)
+
+    def test_overlapping_matches_brute_force(self):
+        rng = random.Random(4)
+        intervals = {}
+        for _ in range(2000):
+            start = rng.randrange(1000)
+            end = start + rng.randrange(50)
+            if intervals and rng.random() < 0.3:
+                s, e = rng.choice(list(intervals))
+                self.assertTrue(self.tree.delete(s, e))
+                del intervals[(s, e)]
+            else:
+                self.tree.insert(start, end, (start, end))
+                intervals[(start, end)] = (start, end)
+            if rng.random() < 0.1:
+                lo = rng.randrange(-20, 1060)
+                hi = lo + rng.randrange(30)
+                self.assertEqual(self.tree.overlapping(lo, hi), self.brute_force(intervals, lo, hi))
+                self.assertEqual(self.tree.overlapping(lo), self.brute_force(intervals, lo, lo))
+                self.assertEqual(self.tree.has_overlap(lo, hi), bool(self.brute_force(intervals, lo, hi)))
+        self.assertEqual(self.tree.size(), len(intervals))
+        self.assertEqual(self.tree.max_end(), max(e for _, e in intervals))
+        self.assertEqual(self.tree.avl_to_array(), sorted((s, e, v) for (s, e), v in intervals.items()))
+
+    def test_reservations(self):
+        self.tree.insert(9, 11, "standup")
+        self.tree.insert(10, 12, "review")
+        self.tree.insert(14, 15, "lunch")
+        self.tree.insert(9, 11, "moved standup")
+        self.assertEqual(self.tree.size(), 3)
+        self.assertEqual(self.tree.get(9, 11), "moved standup")
+        self.assertEqual([v for _, _, v in self.tree.overlapping(11)], ["moved standup", "review"])
+        self.assertEqual(self.tree.overlapping(12, 14), [(10, 12, "review"), (14, 15, "lunch")])
+        self.assertFalse(self.tree.has_overlap(12.5, 13.5))
+        self.assertEqual(self.tree.overlapping(13), [])
+        self.assertFalse(self.tree.delete(1, 2))
+        with self.assertRaises(ValueError):
+            self.tree.insert(5, 4, "backwards")
+
+    def test_empty(self):
+        self.assertEqual(self.tree.overlapping(0, 10), [])
+        self.assertFalse(self.tree.has_overlap(3))
+        self.assertEqual(self.tree.size(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from AVLTree import AVLTree
+from MappedAVLTree import MappedAVLTree
+
+
+class TestMappedAVLTree(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".avlm")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        tree = AVLTree()
+        for k in [50, 30, 70, 20, 40, 60, 80]:
+            tree.insert(k, str(k))
+        tree.insert(90, b"raw")
+        tree.insert(10, None)
+        tree.insert(100, {"a": 1})
+        MappedAVLTree.write(tree, self.path)
+        with MappedAVLTree(self.path) as mapped:
+            self.assertEqual(mapped.size(), tree.size())
+            self.assertEqual(mapped.avl_to_array(), tree.avl_to_array())
+            self.assertEqual(mapped.get(40), "40")
+            self.assertEqual(mapped.get(90), b"raw")
+            self.assertEqual(mapped.get(100), {"a": 1})
+            self.assertEqual(mapped.get(45, "missing"), "missing")
+            position, edges = mapped.search(50)
+            self.assertEqual(mapped.key(position), 50)
+            self.assertLessEqual(edges, 4)
+
+    def test_range_scans(self):
+        MappedAVLTree.write(AVLTree.from_sorted((k, str(k)) for k in range(0, 100, 10)), self.path)
+        with MappedAVLTree(self.path) as mapped:
+            self.assertEqual([k for k, _ in mapped.iter_items(lo=15, hi=40)], [20, 30, 40])
+            self.assertEqual([k for k, _ in mapped.iter_items(lo=15, hi=40, reverse=True)], [40, 30, 20])
+            self.assertEqual([k for k, _ in mapped.iter_items(hi=5)], [0])
+            self.assertEqual(list(mapped.iter_items(lo=95)), [])
+
+    def test_empty_and_invalid(self):
+        MappedAVLTree.write(AVLTree(), self.path)
+        with MappedAVLTree(self.path) as mapped:
+            self.assertEqual(mapped.size(), 0)
+            self.assertEqual(mapped.search(1), (None, 0))
+        with open(self.path, "wb") as fileobj:
+            fileobj.write(b"not a tree file!")
+        with self.assertRaises(ValueError):
+            MappedAVLTree(self.path)
+
+    def test_truncated_file(self):
+        tree = AVLTree.from_sorted((k, str(k)) for k in range(100))
+        MappedAVLTree.write(tree, self.path)
+        size = os.path.getsize(self.path)
+        # the last byte of the values missing, the tags or the keys cut in the middle, and a short header
+        for length in (size - 1, 16 + 16 * 100 + 8 + 50, 100, 10):
+            MappedAVLTree.write(tree, self.path)
+            with open(self.path, "r+b") as fileobj:
+                fileobj.truncate(length)
+            with self.assertRaises(ValueError):
+                MappedAVLTree(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
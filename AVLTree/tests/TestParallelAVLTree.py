@@ -0,0 +1,60 @@
+import random
+import unittest
+from AVLTree import AVLTree, SUM
+from ParallelAVLTree import parallel_union, parallel_build, parallel_filter
+
+
+def is_even(key, value):
+    return key % 2 == 0
+
+
+class TestParallelAVLTree(unittest.TestCase):
+
+    def assertValidTree(self, tree, expected_items):
+        self.assertEqual(tree.avl_to_array(), expected_items)
+        self.assertEqual(tree.size(), len(expected_items))
+        if expected_items:
+            self.assertIsNone(tree.get_root().parent)
+            self.assertEqual(tree.max_node().key, expected_items[-1][0])
+            self.assertEqual(tree.min_node().key, expected_items[0][0])
+            self.assertLessEqual(tree.get_root().height, 1.45 * len(expected_items).bit_length())
+
+    def test_parallel_union(self):
+        keys1 = random.sample(range(5000), 1000)
+        keys2 = random.sample(range(5000), 700)
+        tree1 = AVLTree.from_sorted(sorted((k, "a") for k in keys1))
+        tree2 = AVLTree.from_sorted(sorted((k, "b") for k in keys2))
+        expected = dict((k, "b") for k in keys2)
+        expected.update((k, "a") for k in keys1)
+        for workers in (1, 3):
+            result = parallel_union(tree1, tree2, workers=workers)
+            self.assertValidTree(result, sorted(expected.items()))
+        self.assertEqual(tree1.size(), 1000)
+
+    def test_parallel_build(self):
+        items = [(random.randrange(3000), i) for i in range(2000)]
+        expected = sorted(dict(items).items())
+        for workers in (1, 4):
+            self.assertValidTree(parallel_build(items, workers=workers), expected)
+        self.assertValidTree(parallel_build([], workers=4), [])
+
+    def test_parallel_filter(self):
+        tree = AVLTree.from_sorted((k, str(k)) for k in range(1000))
+        result = parallel_filter(tree, is_even, workers=3)
+        self.assertValidTree(result, [(k, str(k)) for k in range(0, 1000, 2)])
+        self.assertValidTree(parallel_filter(AVLTree(), is_even, workers=3), [])
+
+    def test_monoid_is_kept(self):
+        tree1 = AVLTree.from_sorted([(k, k) for k in range(0, 100, 2)], monoid=SUM)
+        tree2 = AVLTree.from_sorted([(k, k) for k in range(0, 100, 3)])
+        for workers in (1, 3):
+            union = parallel_union(tree1, tree2, workers=workers)
+            self.assertIs(union.monoid, SUM)
+            self.assertEqual(union.aggregate(), sum(set(range(0, 100, 2)) | set(range(0, 100, 3))))
+            self.assertEqual(parallel_filter(tree1, is_even, workers=workers).aggregate(), sum(range(0, 100, 2)))
+            built = parallel_build([(k, 1) for k in range(10)], workers=workers, monoid=SUM)
+            self.assertEqual(built.aggregate(), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import random
+import unittest
+from AVLTree import AVLTree
+from PersistentAVLTree import PersistentAVLTree
+
+
+class TestPersistentAVLTree(unittest.TestCase):
+
+    def validate(self, tree):
+        def check(node):
+            if node is None:
+                return -1, 0
+            left_height, left_size = check(node.left)
+            right_height, right_size = check(node.right)
+            self.assertLess(abs(left_height - right_height), 2)
+            self.assertEqual(node.height, 1 + max(left_height, right_height))
+            self.assertEqual(node.size, 1 + left_size + right_size)
+            return node.height, node.size
+
+        check(tree.get_root())
+        keys = [k for k, _ in tree.avl_to_array()]
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertEqual(len(keys), tree.size())
+
+    def test_versions_are_kept(self):
+        versions = [PersistentAVLTree()]
+        contents = [{}]
+        for _ in range(300):
+            key = random.randrange(200)
+            if random.random() < 0.7:
+                versions.append(versions[-1].insert(key, str(key)))
+                contents.append(dict(contents[-1]))
+                contents[-1][key] = str(key)
+            else:
+                versions.append(versions[-1].delete(key))
+                contents.append(dict((k, v) for k, v in contents[-1].items() if k != key))
+        for tree, content in zip(versions, contents):
+            self.validate(tree)
+            self.assertEqual(tree.avl_to_array(), sorted(content.items()))
+
+    def test_insert_copies_only_the_path(self):
+        tree = PersistentAVLTree.from_sorted((k, k) for k in range(1023))
+        new_tree = tree.insert(2000, 2000)
+
+        def nodes(node, seen):
+            if node is not None:
+                seen.add(id(node))
+                nodes(node.left, seen)
+                nodes(node.right, seen)
+            return seen
+
+        self.assertLessEqual(len(nodes(new_tree.root, set()) - nodes(tree.root, set())), 2 * 11)
+        self.assertIsNone(tree.search(2000)[0])
+
+    def test_snapshot(self):
+        tree = PersistentAVLTree().insert(1, "a")
+        snapshot = tree.snapshot()
+        tree = tree.insert(2, "b").delete(1)
+        self.assertEqual(snapshot.avl_to_array(), [(1, "a")])
+        self.assertEqual(tree.avl_to_array(), [(2, "b")])
+
+    def test_split_and_join(self):
+        tree = PersistentAVLTree.from_sorted((k, str(k)) for k in range(100))
+        left, right = tree.split(40)
+        self.validate(left)
+        self.validate(right)
+        self.assertEqual(left.size(), 40)
+        self.assertEqual(right.min_node().key, 41)
+        small, _ = left.split(3)
+        joined = right.join(small, 20, "20")
+        self.validate(joined)
+        self.assertEqual([k for k, _ in joined.avl_to_array()], [0, 1, 2, 20] + list(range(41, 100)))
+        self.assertEqual(tree.size(), 100)
+
+    def test_iter_items(self):
+        tree = PersistentAVLTree.from_tree(AVLTree.from_sorted((k, str(k)) for k in range(0, 100, 10)))
+        self.assertEqual([k for k, _ in tree.iter_items(lo=15, hi=40)], [20, 30, 40])
+        self.assertEqual([k for k, _ in tree.iter_items(lo=15, hi=40, reverse=True)], [40, 30, 20])
+        self.assertEqual([k for k, _ in tree.iter_items(reverse=True)], list(range(90, -10, -10)))
+        self.assertEqual(tree.max_node().key, 90)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import random
+import threading
+import unittest
+from ShardedAVLTree import ShardedAVLTree
+
+
+class TestShardedAVLTree(unittest.TestCase):
+
+    def assertValidShards(self, tree, expected):
+        shards = tree.shards()
+        for lo, hi, size in shards:
+            keys = [k for k in expected if (lo is None or k >= lo) and (hi is None or k < hi)]
+            self.assertEqual(size, len(keys))
+        self.assertEqual(tree.avl_to_array(), sorted(expected.items()))
+        self.assertEqual(len(tree), len(expected))
+
+    def test_matches_dict(self):
+        tree = ShardedAVLTree(max_shard_size=64, min_shard_size=8, rebalance_every=50)
+        expected = {}
+        rng = random.Random(8)
+        for step in range(5000):
+            op = rng.random()
+            key = rng.randrange(2000)
+            if op < 0.5:
+                tree.insert(key, step)
+                expected[key] = step
+            elif op < 0.8:
+                self.assertEqual(tree.delete(key), expected.pop(key, None) is not None)
+            elif op < 0.95:
+                self.assertEqual(tree.get(key), expected.get(key))
+            else:
+                hi = key + rng.randrange(100)
+                removed = [k for k in expected if key <= k <= hi]
+                self.assertEqual(tree.delete_range(key, hi), len(removed))
+                for k in removed:
+                    del expected[k]
+            if step % 500 == 0:
+                self.assertValidShards(tree, expected)
+                lo = rng.randrange(2000)
+                hi = lo + rng.randrange(300)
+                self.assertEqual(list(tree.iter_items(lo, hi)), sorted((k, v) for k, v in expected.items() if lo <= k <= hi))
+        self.assertGreater(len(tree.shards()), 1)
+        self.assertValidShards(tree, expected)
+
+    def test_split_and_merge(self):
+        tree = ShardedAVLTree(max_shard_size=100, min_shard_size=10, rebalance_every=10 ** 9)
+        tree.insert_many((k, k) for k in range(1000))
+        shards = tree.shards()
+        self.assertTrue(all(size <= 100 for _, _, size in shards))
+        self.assertEqual(sum(size for _, _, size in shards), 1000)
+        # shards emptied of most keys are merged back by their neighbors
+        tree.delete_range(0, 995)
+        tree.rebalance()
+        self.assertEqual(tree.shards(), [(None, None, 4)])
+        self.assertEqual(tree.avl_to_array(), [(k, k) for k in range(996, 1000)])
+        self.assertIn(999, tree)
+        self.assertNotIn(5, tree)
+
+    def test_hot_shard_is_split(self):
+        tree = ShardedAVLTree(max_shard_size=1000, min_shard_size=10, rebalance_every=10 ** 9, hot_factor=1.5)
+        tree.insert_many((k, k) for k in range(1000))
+        tree.insert_many((k, k) for k in range(1000, 1600))
+        self.assertEqual(len(tree.shards()), 2)
+        tree.rebalance()
+        for _ in range(200):
+            tree.get(1500)
+        tree.rebalance()
+        shards = tree.shards()
+        self.assertEqual(len(shards), 3)
+        self.assertEqual([size for _, _, size in shards], [800, 400, 400])
+
+    def test_concurrent_writers(self):
+        tree = ShardedAVLTree(max_shard_size=200, min_shard_size=20, rebalance_every=300)
+
+        def write(offset):
+            for k in range(offset, 4000, 4):
+                tree.insert(k, k)
+            for k in range(offset, 4000, 8):
+                tree.delete(k)
+
+        threads = [threading.Thread(target=write, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        expected = {k: k for k in range(4000) if (k - k % 4) % 8 != 0}
+        self.assertValidShards(tree, expected)
+
+    def test_concurrent_readers_are_counted(self):
+        tree = ShardedAVLTree(max_shard_size=100, min_shard_size=10, rebalance_every=10 ** 9)
+        tree.insert_many((k, k) for k in range(400))
+
+        def read():
+            for k in range(2000):
+                tree.get(k % 400)
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(tree._hits), 1 + 8 * 2000)
+        self.assertEqual(tree._operations, 1 + 8 * 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -366,9 +366,9 @@ class Test:
         self._validate_trees()
 
         content_tests = {
-            #"rank": self._check_rank,
-            #"select": self._check_select,
-            # "in_order": self._check_inorder
+            "rank": self._check_rank,
+            "select": self._check_select,
+            "in_order": self._check_inorder,
         }
         for tree_index in range(len(self.key_lists)):
             exceptions = dict()
@@ -411,20 +411,20 @@ class Test:
             node = tree.search(key)[0]
             assert node is not None, f"Unexpected result for search({key}): key not found"
             assert node.key == key, f"Unexpected result for search({key}): returned node's key is {node.key}."
-            #rank = tree.rank(node)
-            #assert rank == i + 1, (
-            #    f"Unexpected result for rank({key}): {rank}. Expected result is {i + 1}"
-            #)
+            rank = tree.rank(node)
+            assert rank == i + 1, (
+                f"Unexpected result for rank({key}): {rank}. Expected result is {i + 1}"
+            )
 
     def _check_select(self, tree_index):
         tree = self.trees[tree_index]
         key_list = self.key_lists[tree_index]
-        #for i, key in enumerate(key_list):
-            #selected_node = tree.select(i + 1)
-            #assert selected_node.key == key, (
-            #    f"Unexpected result for select({i + 1}): {selected_node.key}. "
-            #    f"Expected result is {key}"
-            #)
+        for i, key in enumerate(key_list):
+            selected_node = tree.select(i + 1)
+            assert selected_node.key == key, (
+                f"Unexpected result for select({i + 1}): {selected_node.key}. "
+                f"Expected result is {key}"
+            )
 
     def _validate_trees(self):
         for tree in self.trees:
@@ -479,7 +479,7 @@ class Test:
 
         tester_size = size_left + size_right + 1
         avl_size = node._size
-        assert avl_size == avl_size, f"Incorrect size for node {key}: {avl_size}. Correct size is {tester_size}"
+        assert avl_size == tester_size, f"Incorrect size for node {key}: {avl_size}. Correct size is {tester_size}"
 
         left_key = node.left.key
         left_parent_key = getattr(node.left.parent, "get_key", lambda: None)()